@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#-------------------------------------------------------------------------
+# Archivo: benchmark_codec.py
+# Capitulo: 3 Estilo Publica-Subscribe
+# Autor(es): Perla Velasco & Yonathan Mtz.
+# Version: 1.0.0 Octubre 2026
+# Descripción:
+#
+#   Éste programa compara el tiempo y el tamaño de los mensajes del codec contra el formato
+#   str(dict) y la función string_to_json() que utilizaban los suscriptores.
+#
+#   Uso:
+#
+#       (venv)$ cd smam/benchmarks
+#       (venv)$ python benchmark_codec.py [repeticiones]
+#
+#-------------------------------------------------------------------------
+import sys
+import timeit
+sys.path.append('../')
+import codec
+
+MENSAJES = {
+    'body_temperature': {'body_temperature': 69.48213397413345},
+    'heart_rate': {'heart_rate': 112},
+    'blood_preasure': {'blood_preasure': 157},
+    'positions': {'x_position': 0.4415205427740364, 'y_position': 0.9166297766125004,
+                  'z_position': 0.2181549187733468},
+    'medicine': {'medicine': 'Paracetamol', 'dose': 2, 'first_intake': '7:15', 'hour': 8},
+}
+
+for vital, message in MENSAJES.items():
+    message.update({'id': 39722608, 'timestamp': 1792307742000, 'datetime': '18:10:2026:07:15:42',
+                    'producer': 'Xiaomi', 'model': 'Xiaomi My Band 2',
+                    'hardware_version': '2.0.3.2.1', 'software_version': '10.2.3.1'})
+
+
+def measure(function, repetitions):
+    # Mejor tiempo de cinco corridas, en microsegundos por mensaje
+    return min(timeit.repeat(function, number=repetitions, repeat=5)) / repetitions * 1e6
+
+
+def run(repetitions):
+    print('{:<18}{:<8}{:>10}{:>14}{:>14}'.format('signo vital', 'formato', 'bytes', 'encode (us)',
+                                                 'decode (us)'))
+    for vital, message in MENSAJES.items():
+        legacy = str(message).encode('utf-8')
+        print('{:<18}{:<8}{:>10}{:>14.2f}{:>14.2f}'.format(
+            vital, 'str', len(legacy),
+            measure(lambda: str(message).encode('utf-8'), repetitions),
+            measure(lambda: codec.string_to_json(legacy), repetitions)))
+        for name, content_type in (('json', codec.CONTENT_TYPE_JSON), ('struct', codec.CONTENT_TYPE_STRUCT)):
+            body = codec.encode(vital, message, content_type)
+            print('{:<18}{:<8}{:>10}{:>14.2f}{:>14.2f}'.format(
+                vital, name, len(body),
+                measure(lambda: codec.encode(vital, message, content_type), repetitions),
+                measure(lambda: codec.decode(body, content_type), repetitions)))
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#-------------------------------------------------------------------------
+# Archivo: benchmark_lotes.py
+# Capitulo: 3 Estilo Publica-Subscribe
+# Autor(es): Perla Velasco & Yonathan Mtz.
+# Version: 1.0.0 Octubre 2026
+# Descripción:
+#
+#   Éste programa compara los mensajes por segundo que evalúan los procesadores uno por uno
+#   (decode() y process()) contra la evaluación por lotes con numpy (process_batch()).
+#
+#   Uso:
+#
+#       (venv)$ cd smam/benchmarks
+#       (venv)$ python benchmark_lotes.py [mensajes] [tamaño del lote]
+#
+#-------------------------------------------------------------------------
+import contextlib
+import os
+import sys
+import time
+sys.path.append('../')
+sys.path.append('../publicadores')
+sys.path.append('../suscriptores')
+import codec
+from xiaomi_my_band import XiaomiMyBand
+from lote_de_mensajes import LoteDeMensajes
+from procesador_de_temperatura import ProcesadorTemperatura
+from procesador_de_ritmo_cardiaco import ProcesadorRitmoCardiaco
+from procesador_de_presion import ProcesadorPresion
+from procesador_de_posicion import ProcesadorPosicion
+
+
+def messages(vital, total):
+    sensor = XiaomiMyBand(39722608, broker=object())
+    return [codec.encode(vital, sensor.simulate_message(vital)) for x in range(0, total)]
+
+
+def measure(function):
+    # Mejor tiempo de tres corridas, la salida del monitor se descarta
+    best = None
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+        for x in range(0, 3):
+            start = time.perf_counter()
+            function()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run(total, batch):
+    print('{:<18}{:>16}{:>16}{:>10}'.format('signo vital', 'uno a uno (m/s)', 'lotes (m/s)',
+                                            'mejora'))
+    for procesador in (ProcesadorTemperatura(), ProcesadorRitmoCardiaco(), ProcesadorPresion(),
+                       ProcesadorPosicion()):
+        vital = procesador.queue
+        bodies = messages(vital, total)
+        content_types = [codec.CONTENT_TYPE_STRUCT] * total
+
+        def one_by_one():
+            for body in bodies:
+                procesador.process(codec.decode(body, codec.CONTENT_TYPE_STRUCT))
+
+        def batches():
+            for x in range(0, total, batch):
+                procesador.process_batch(LoteDeMensajes(vital, bodies[x:x + batch],
+                                                        content_types[x:x + batch]))
+        single = total / measure(one_by_one)
+        vectorized = total / measure(batches)
+        print('{:<18}{:>16.0f}{:>16.0f}{:>9.1f}x'.format(vital, single, vectorized,
+                                                         vectorized / single))
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 500)
@@ -0,0 +1,290 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#-------------------------------------------------------------------------
+# Archivo: suite_de_benchmarks.py
+# Capitulo: 3 Estilo Publica-Subscribe
+# Autor(es): Perla Velasco & Yonathan Mtz.
+# Version: 1.0.0 Octubre 2026
+# Descripción:
+#
+#   Éste programa mide todo el camino de un signo vital: codificación, evaluación de las
+#   reglas, publicación y la latencia desde que el wearable publica hasta que el procesador
+#   termina de evaluar el mensaje y notifica al monitor. Se usa el distribuidor en memoria
+#   (host memoria, ver transporte.py), por lo que no se necesita RabbitMQ.
+#
+#   Los resultados se guardan en JSON para comparar dos corridas, por ejemplo antes y después
+#   de un cambio.
+#
+#   Uso:
+#
+#       (venv)$ cd smam/benchmarks
+#       (venv)$ python suite_de_benchmarks.py --salida antes.json
+#       (venv)$ python suite_de_benchmarks.py --salida despues.json --comparar antes.json
+#
+#-------------------------------------------------------------------------
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+sys.path.append('../')
+sys.path.append('../publicadores')
+sys.path.append('../suscriptores')
+import codec
+import transporte
+import benchmark_codec
+import benchmark_lotes
+from pool_de_conexiones import PoolDeConexiones, SIGNOS_VITALES
+from xiaomi_my_band import XiaomiMyBand
+from lote_de_mensajes import LoteDeMensajes
+import lote_de_mensajes
+from motor_de_consumo import MotorDeConsumo
+from procesador_de_signos_vitales import default_registry
+from correlacion_de_eventos import CorrelacionDeEventos
+import topologia
+
+GRUPOS = ('codec', 'reglas', 'publicador', 'extremo')
+FORMATOS = (('json', codec.CONTENT_TYPE_JSON), ('struct', codec.CONTENT_TYPE_STRUCT))
+HOST = 'memoria://benchmark'
+
+
+class MotorMedido(MotorDeConsumo):
+
+    def __init__(self, handlers, **config):
+        MotorDeConsumo.__init__(self, handlers, **config)
+        # Etiqueta de entrega -> time.perf_counter() al publicar el mensaje
+        self.published = {}
+        self.latencies = []
+
+    def on_message(self, queue, channel, method, properties, body):
+        self.published[method.delivery_tag] = properties.timestamp
+        MotorDeConsumo.on_message(self, queue, channel, method, properties, body)
+
+    def work(self, handler, queue, tag, properties, body):
+        MotorDeConsumo.work(self, handler, queue, tag, properties, body)
+        self.record((tag,))
+
+    def work_batch(self, handler, queue, tags, content_types, bodies):
+        MotorDeConsumo.work_batch(self, handler, queue, tags, content_types, bodies)
+        self.record(tags)
+
+    def record(self, tags):
+        # La latencia incluye la evaluación de la regla y la notificación al monitor
+        now = time.perf_counter()
+        self.latencies.extend(now - self.published.pop(tag) for tag in tags)
+
+
+def percentile(values, p):
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def bench_codec(results, total):
+    repetitions = max(1, total // 5)
+    for vital, message in benchmark_codec.MENSAJES.items():
+        legacy = str(message).encode('utf-8')
+        results.append(('codec', vital + '/str/decode',
+                        benchmark_codec.measure(lambda: codec.string_to_json(legacy), repetitions),
+                        'us/mensaje'))
+        for name, content_type in FORMATOS:
+            body = codec.encode(vital, message, content_type)
+            results.append(('codec', vital + '/' + name + '/bytes', len(body), 'bytes'))
+            results.append(('codec', vital + '/' + name + '/encode',
+                            benchmark_codec.measure(lambda: codec.encode(vital, message, content_type),
+                                                    repetitions), 'us/mensaje'))
+            results.append(('codec', vital + '/' + name + '/decode',
+                            benchmark_codec.measure(lambda: codec.decode(body, content_type),
+                                                    repetitions), 'us/mensaje'))
+
+
+def bench_rules(results, total, batch):
+    registry = default_registry()
+    for vital in registry.queues():
+        bodies = benchmark_lotes.messages(vital, total)
+        content_types = [codec.CONTENT_TYPE_STRUCT] * total
+        handler = registry.handlers([vital])[vital]
+
+        def one_by_one():
+            for body in bodies:
+                handler(codec.decode(body, codec.CONTENT_TYPE_STRUCT))
+        results.append(('reglas', vital + '/uno_a_uno', total / benchmark_lotes.measure(one_by_one),
+                        'mensajes/s'))
+        if lote_de_mensajes.numpy is None:
+            continue
+        batch_handler = registry.handlers([vital], batch=True)[vital]
+
+        def batches():
+            for x in range(0, total, batch):
+                batch_handler(LoteDeMensajes(vital, bodies[x:x + batch], content_types[x:x + batch]))
+        results.append(('reglas', vital + '/lotes', total / benchmark_lotes.measure(batches),
+                        'mensajes/s'))
+
+
+def bench_correlation(results, total, batch):
+    # Caídas y ritmo cardiaco intercalados de 1000 wearables, como los recibe la correlación
+    sensors = [XiaomiMyBand(39722608 + x, broker=object()) for x in range(0, 1000)]
+    start = int(time.time() * 1000)
+    bodies = dict((vital, []) for vital in ('positions', 'heart_rate'))
+    for x in range(0, total):
+        vital = 'positions' if x % 2 else 'heart_rate'
+        message = sensors[(x // 2) % len(sensors)].simulate_message(vital)
+        message.timestamp = start + x
+        bodies[vital].append(codec.encode(vital, message))
+    decoded = [(vital, codec.decode(body, codec.CONTENT_TYPE_STRUCT))
+               for x in range(0, total // 2) for vital, body in
+               (('heart_rate', bodies['heart_rate'][x]), ('positions', bodies['positions'][x]))]
+
+    def one_by_one():
+        correlation = CorrelacionDeEventos()
+        for vital, message in decoded:
+            correlation.process(vital, message)
+    results.append(('reglas', 'correlacion/uno_a_uno',
+                    len(decoded) / benchmark_lotes.measure(one_by_one), 'mensajes/s'))
+    if lote_de_mensajes.numpy is None:
+        return
+
+    def batches():
+        correlation = CorrelacionDeEventos()
+        for x in range(0, total // 2, batch):
+            for vital in bodies:
+                chunk = bodies[vital][x:x + batch]
+                correlation.process_batch(vital, LoteDeMensajes(
+                    vital, chunk, [codec.CONTENT_TYPE_STRUCT] * len(chunk)))
+    results.append(('reglas', 'correlacion/lotes',
+                    len(decoded) / benchmark_lotes.measure(batches), 'mensajes/s'))
+
+
+def bench_publisher(results, total):
+    broker = transporte.broker(transporte.parse(HOST)[1])
+    for exchange in ('', topologia.EXCHANGE):
+        for name, content_type in FORMATOS:
+            pool = PoolDeConexiones(HOST, exchange=exchange)
+            if exchange:
+                # Sin colas enlazadas el distribuidor descartaría los mensajes
+                channel = pool.connect()[1]
+                for vital in SIGNOS_VITALES:
+                    topologia.declare(channel, vital)
+            sensor = XiaomiMyBand(39722608, broker=pool, content_type=content_type)
+            messages = [sensor.simulate_message(SIGNOS_VITALES[x % len(SIGNOS_VITALES)])
+                        for x in range(0, total)]
+            start = time.perf_counter()
+            for x in range(0, total):
+                sensor.send(SIGNOS_VITALES[x % len(SIGNOS_VITALES)], messages[x])
+            elapsed = time.perf_counter() - start
+            results.append(('publicador', (exchange or 'colas') + '/' + name,
+                            total / elapsed, 'mensajes/s'))
+            broker.purge()
+
+
+def bench_end_to_end(results, total, rate, devices, batch, workers):
+    registry = default_registry()
+    motor = MotorMedido(registry.handlers(batch=bool(batch)), host=HOST, prefetch=1000,
+                        workers=workers, batch=batch)
+    consumer = threading.Thread(target=motor.start, name='motor')
+    consumer.daemon = True
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+        consumer.start()
+        # Las colas se declaran al iniciar el motor, antes no hay a dónde enrutar
+        while not motor.running:
+            time.sleep(0.01)
+        pool = PoolDeConexiones(HOST, exchange=topologia.EXCHANGE)
+        sensors = [XiaomiMyBand(39722608 + x, broker=pool) for x in range(0, devices)]
+        start = time.perf_counter()
+        for x in range(0, total):
+            if rate:
+                # Se publica a una tasa constante para no medir sólo el tiempo en la cola
+                delay = start + x / float(rate) - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            sensor = sensors[x % devices]
+            vital = SIGNOS_VITALES[(x // devices) % len(SIGNOS_VITALES)]
+            sensor.send(vital, sensor.simulate_message(vital))
+        deadline = time.time() + 60
+        while motor.processed + motor.errors < total and time.time() < deadline:
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - start
+        motor.stop()
+        consumer.join(5)
+        motor.close()
+    latencies = sorted(motor.latencies)
+    name = 'lotes' if batch else 'uno_a_uno'
+    results.append(('extremo', name + '/procesados', motor.processed, 'mensajes'))
+    results.append(('extremo', name + '/throughput', motor.processed / elapsed, 'mensajes/s'))
+    if latencies:
+        for p in (50, 95, 99):
+            results.append(('extremo', name + '/p' + str(p), percentile(latencies, p) * 1000, 'ms'))
+        results.append(('extremo', name + '/max', latencies[-1] * 1000, 'ms'))
+
+
+def commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL).decode('utf-8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, path):
+    with open(path) as file:
+        previous = dict(((r['grupo'], r['nombre']), r['valor']) for r in json.load(file)['resultados'])
+    print('{:<12}{:<36}{:>14}{:>14}{:>9}'.format('grupo', 'nombre', 'anterior', 'actual', 'cambio'))
+    for group, name, value, unit in results:
+        before = previous.get((group, name))
+        if before is None:
+            continue
+        change = '{:+.1f}%'.format((value - before) * 100.0 / before) if before else '-'
+        print('{:<12}{:<36}{:>14.2f}{:>14.2f}{:>9}'.format(group, name, before, value, change))
+
+
+def run(args):
+    results = []
+    if 'codec' in args.grupos:
+        bench_codec(results, args.mensajes)
+    if 'reglas' in args.grupos:
+        bench_rules(results, args.mensajes, args.lote)
+        bench_correlation(results, args.mensajes, args.lote)
+    if 'publicador' in args.grupos:
+        bench_publisher(results, args.mensajes)
+    if 'extremo' in args.grupos:
+        bench_end_to_end(results, args.mensajes, args.tasa, args.wearables, 0, args.hilos)
+        if lote_de_mensajes.numpy is not None:
+            bench_end_to_end(results, args.mensajes, args.tasa, args.wearables, args.lote,
+                             args.hilos)
+    for group, name, value, unit in results:
+        print('{:<12}{:<36}{:>14.2f} {}'.format(group, name, value, unit))
+    report = {
+        'fecha': datetime.datetime.now().isoformat(),
+        'commit': commit(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'numpy': getattr(lote_de_mensajes.numpy, '__version__', None),
+        'parametros': {'mensajes': args.mensajes, 'lote': args.lote, 'tasa': args.tasa,
+                       'wearables': args.wearables, 'hilos': args.hilos},
+        'resultados': [{'grupo': group, 'nombre': name, 'valor': value, 'unidad': unit}
+                       for group, name, value, unit in results],
+    }
+    with open(args.salida, 'w') as file:
+        json.dump(report, file, indent=2)
+    print('Resultados guardados en ' + args.salida)
+    if args.comparar:
+        compare(results, args.comparar)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks del SMAM')
+    parser.add_argument('--grupos', nargs='+', choices=GRUPOS, default=list(GRUPOS),
+                        help='benchmarks que se ejecutan')
+    parser.add_argument('--mensajes', type=int, default=20000, help='mensajes por benchmark')
+    parser.add_argument('--lote', type=int, default=500, help='mensajes por lote')
+    parser.add_argument('--tasa', type=int, default=5000,
+                        help='mensajes por segundo de extremo a extremo, 0 sin límite')
+    parser.add_argument('--wearables', type=int, default=100,
+                        help='wearables que publican de extremo a extremo')
+    parser.add_argument('--hilos', type=int, default=4, help='hilos de trabajo del motor')
+    parser.add_argument('--salida', default='resultados.json', help='archivo JSON de resultados')
+    parser.add_argument('--comparar', help='archivo JSON de una corrida anterior')
+    run(parser.parse_args())
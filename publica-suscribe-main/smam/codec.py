@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#-------------------------------------------------------------------------
+# Archivo: codec.py
+# Capitulo: 3 Estilo Publica-Subscribe
+# Autor(es): Perla Velasco & Yonathan Mtz.
+# Version: 1.0.0 Octubre 2026
+# Descripción:
+#
+#   Éste módulo define el formato en que viajan los signos vitales entre los publicadores y
+#   los suscriptores.
+#
+#   Las características de éste módulo son las siguientes:
+#
+#                                             codec.py
+#           +-----------------------+-------------------------+------------------------+
+#           |  Nombre del elemento  |     Responsabilidad     |      Propiedades       |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Codificar y decodi-  |  - Formato binario de  |
+#           |        Codec          |    ficar los mensajes   |    registros de campos |
+#           |                       |    de los signos vita-  |    fijos (struct).     |
+#           |                       |    les.                 |  - Formato JSON como   |
+#           |                       |                         |    alternativa.        |
+#           |                       |                         |  - El formato se indi- |
+#           |                       |                         |    ca en el content_   |
+#           |                       |                         |    type del mensaje.   |
+#           |                       |                         |  - Los mensajes bina-  |
+#           |                       |                         |    rios se decodifican |
+#           |                       |                         |    como lecturas (ver  |
+#           |                       |                         |    lecturas.py).       |
+#           +-----------------------+-------------------------+------------------------+
+#
+#   A continuación se describen las funciones que se implementaron en éste módulo:
+#
+#                                             Funciones:
+#           +------------------------+--------------------------+-----------------------+
+#           |         Nombre         |        Parámetros        |        Función        |
+#           +------------------------+--------------------------+-----------------------+
+#           |                        |  - vital: cola del signo |  - Codifica un mensaje|
+#           |        encode()        |     vital.               |    en el formato indi-|
+#           |                        |  - message: lectura o    |    cado.              |
+#           |                        |     diccionario con el   |                       |
+#           |                        |     mensaje.             |                       |
+#           |                        |  - content_type: formato.|                       |
+#           +------------------------+--------------------------+-----------------------+
+#           |                        |  - body: mensaje recibi- |  - Decodifica un men- |
+#           |        decode()        |     do.                  |    saje de acuerdo a  |
+#           |                        |  - content_type: formato |    su content_type.   |
+#           |                        |     del mensaje.         |                       |
+#           +------------------------+--------------------------+-----------------------+
+#           |    encode_device()     |  - dispositivo: datos del|  - Codifica el regis- |
+#           |                        |     wearable.            |    tro de un wearable.|
+#           +------------------------+--------------------------+-----------------------+
+#           |    decode_device()     |  - body: registro reci-  |  - Decodifica el re-  |
+#           |                        |     bido.                |    gistro de un weara-|
+#           |                        |                          |    ble.               |
+#           +------------------------+--------------------------+-----------------------+
+#           |      timestamp()       |  - message: mensaje deco-|  - Regresa los milise-|
+#           |                        |     dificado.            |    gundos desde epoch |
+#           |                        |                          |    del mensaje.       |
+#           +------------------------+--------------------------+-----------------------+
+#           |    string_to_json()    |  - string: texto a con-  |  - Convierte el texto |
+#           |                        |     vertir en JSON.      |    que envían los pu- |
+#           |                        |                          |    blicadores anterio-|
+#           |                        |                          |    res en un objeto   |
+#           |                        |                          |    JSON.              |
+#           +------------------------+--------------------------+-----------------------+
+#
+#           Nota: el formato binario de cada mensaje es:
+#            versión (1 byte) | tipo (1 byte) | id (4 bytes) | timestamp (8 bytes) |
+#            campos numéricos | textos
+#            donde timestamp son los milisegundos desde epoch en que se generó el mensaje y
+#            los textos se codifican en UTF-8 separados por el caracter \x1f. Los mensajes
+#            de la versión 1 no tienen timestamp y se siguen decodificando. Desde la versión 3
+#            los textos del wearable (fecha, fabricante, modelo y versiones) no viajan en cada
+#            mensaje: la fecha se calcula del timestamp y los demás se envían una vez en el
+#            registro del wearable (content_type application/x-smam-device).
+#
+#-------------------------------------------------------------------------
+import json
+import struct
+import time
+import lecturas
+
+CONTENT_TYPE_STRUCT = 'application/x-smam-struct'
+CONTENT_TYPE_JSON = 'application/json'
+CONTENT_TYPE_DISPOSITIVO = 'application/x-smam-device'
+
+VERSION = 3
+SEPARADOR = '\x1f'
+
+# Campos que se enviaban como texto en todos los signos vitales hasta la versión 2
+TEXTOS = ('datetime', 'producer', 'model', 'hardware_version', 'software_version')
+
+
+class Esquema:
+
+    def __init__(self, tipo, vital, numeric, strings=(), version=VERSION):
+        if version > 1:
+            numeric = (('timestamp', 'q'),) + tuple(numeric)
+        self.version = version
+        self.tipo = tipo
+        self.vital = vital
+        self.numeric = tuple(name for name, code in numeric)
+        self.codes = ('I',) + tuple(code for name, code in numeric)
+        self.strings = strings
+        # Nombres en el orden en que se decodifican: id, campos numéricos y textos
+        self.names = ('id',) + self.numeric + self.strings
+        self.struct = struct.Struct('<BBI' + ''.join(code for name, code in numeric))
+        # Desde la versión 3 los mensajes se decodifican como lecturas y no como diccionarios
+        self.lectura = lecturas.LECTURAS.get(vital) if version > 2 else None
+
+
+ESQUEMAS = {}
+# Esquemas de todas las versiones por (versión, tipo) para decodificar mensajes anteriores
+ESQUEMAS_POR_TIPO = {}
+
+for version in (1, 2, VERSION):
+    textos = TEXTOS if version < 3 else ()
+    for esquema in (
+            Esquema(1, 'body_temperature', (('body_temperature', 'd'),), textos, version),
+            Esquema(2, 'heart_rate', (('heart_rate', 'H'),), textos, version),
+            Esquema(3, 'blood_preasure', (('blood_preasure', 'H'),), textos, version),
+            Esquema(4, 'positions', (('x_position', 'd'), ('y_position', 'd'), ('z_position', 'd')),
+                    textos, version),
+            Esquema(5, 'medicine', (('dose', 'B'), ('hour', 'B')), ('medicine', 'first_intake') + textos,
+                    version)):
+        ESQUEMAS[esquema.vital] = esquema
+        ESQUEMAS_POR_TIPO[(version, esquema.tipo)] = esquema
+
+# Registro de un wearable, se envía una vez antes de sus lecturas
+DISPOSITIVO = Esquema(0, 'devices', (('battery_level', 'B'),), lecturas.METADATOS)
+
+
+def encode(vital, message, content_type=CONTENT_TYPE_STRUCT):
+    if content_type == CONTENT_TYPE_JSON:
+        if isinstance(message, lecturas.Lectura):
+            message = message.as_dict()
+        return json.dumps(message, separators=(',', ':')).encode('utf-8')
+    esquema = ESQUEMAS[vital]
+    if 'timestamp' not in message:
+        message = dict(message, timestamp=timestamp(message))
+    return esquema.struct.pack(VERSION, esquema.tipo, int(message['id']),
+                               *[message[name] for name in esquema.numeric]) + encode_strings(
+                                   [message[name] for name in esquema.strings])
+
+
+def encode_strings(strings):
+    text = SEPARADOR.join(strings)
+    if strings and text.count(SEPARADOR) != len(strings) - 1:
+        raise ValueError('Los textos del mensaje no pueden contener el caracter \\x1f')
+    return text.encode('utf-8')
+
+
+def decode(body, content_type=None):
+    if content_type == CONTENT_TYPE_STRUCT:
+        return decode_struct(body)
+    if content_type == CONTENT_TYPE_JSON:
+        message = json.loads(body.decode('utf-8'))
+        # Los mensajes sin los datos del wearable se envían desde una lectura
+        return message if 'model' in message else lecturas.from_dict(message)
+    # Los mensajes sin content_type provienen de publicadores que envían str(dict)
+    return string_to_json(body)
+
+
+def decode_struct(body):
+    esquema = ESQUEMAS_POR_TIPO.get((body[0], body[1]))
+    if esquema is None:
+        raise ValueError('Versión o tipo de mensaje no soportado: ' + str(body[0]) + ', ' + str(body[1]))
+    values = esquema.struct.unpack_from(body)[2:]
+    if esquema.strings:
+        values += tuple(body[esquema.struct.size:].decode('utf-8').split(SEPARADOR))
+    if esquema.lectura is not None:
+        return esquema.lectura(*values)
+    return dict(zip(esquema.names, values))
+
+
+def encode_device(dispositivo):
+    return DISPOSITIVO.struct.pack(VERSION, DISPOSITIVO.tipo, int(dispositivo.id),
+                                   int(dispositivo.timestamp), int(dispositivo.battery_level)) + \
+        encode_strings([getattr(dispositivo, name) for name in DISPOSITIVO.strings])
+
+
+def decode_device(body):
+    if body[1] != DISPOSITIVO.tipo:
+        raise ValueError('El mensaje no es el registro de un wearable')
+    id, timestamp, battery_level = DISPOSITIVO.struct.unpack_from(body)[2:]
+    return lecturas.Dispositivo(id, *body[DISPOSITIVO.struct.size:].decode('utf-8').split(SEPARADOR),
+                                battery_level=battery_level, timestamp=timestamp)
+
+
+_minutes = {}
+
+
+def timestamp(message):
+    value = message.get('timestamp')
+    if value is not None:
+        return int(value)
+    # Los mensajes anteriores sólo tienen la fecha dd:mm:aaaa:hh:mm:ss, se calcula una vez por minuto
+    datetime = message['datetime']
+    minute = _minutes.get(datetime[:16])
+    if minute is None:
+        values = datetime.split(':')
+        minute = int(time.mktime((int(values[2]), int(values[1]), int(values[0]), int(values[3]),
+                                  int(values[4]), 0, 0, 0, -1))) * 1000
+        if len(_minutes) > 1440:
+            _minutes.clear()
+        _minutes[datetime[:16]] = minute
+    return minute + int(datetime[17:19]) * 1000
+
+
+def string_to_json(string):
+    message = {}
+    string = string.decode('utf-8')
+    string = string.replace('{', '')
+    string = string.replace('}', '')
+    values = string.split(', ')
+    for x in values:
+        v = x.split(': ')
+        message[v[0].replace('\'', '')] = v[1].replace('\'', '')
+    return message
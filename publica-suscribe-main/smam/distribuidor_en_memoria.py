@@ -0,0 +1,523 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#-------------------------------------------------------------------------
+# Archivo: distribuidor_en_memoria.py
+# Capitulo: 3 Estilo Publica-Subscribe
+# Autor(es): Perla Velasco & Yonathan Mtz.
+# Version: 1.0.0 Octubre 2026
+# Descripción:
+#
+#   Éste módulo simula al Distribuidor de Mensajes (RabbitMQ) dentro del mismo proceso, para
+#   ejecutar los wearables y los procesadores en un solo proceso (por ejemplo en una instala-
+#   ción pequeña o en pruebas) y para medirlos sin red y sin instalar RabbitMQ.
+#
+#   Las características de éste módulo son las siguientes:
+#
+#                                   distribuidor_en_memoria.py
+#           +-----------------------+-------------------------+------------------------+
+#           |  Nombre del elemento  |     Responsabilidad     |      Propiedades       |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Guardar las colas y  |  - Exchanges de tipo   |
+#           |     Distribuidor      |    los exchanges.       |    topic.              |
+#           |      en Memoria       |  - Enrutar cada mensaje |  - Las colas son deques|
+#           |                       |    a sus colas.         |    y se publica y con- |
+#           |                       |                         |    sume sin candados.  |
+#           |                       |                         |  - Marca cada mensaje  |
+#           |                       |                         |    con la hora en que  |
+#           |                       |                         |    se publicó.         |
+#           |                       |                         |  - Borra las colas ex- |
+#           |                       |                         |    clusivas y auto_de- |
+#           |                       |                         |    lete igual que Rab- |
+#           |                       |                         |    bitMQ.              |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Entregar los mensajes|  - Misma interfaz que  |
+#           |     Conexión y        |    de las colas consu-  |    pika.Blocking-      |
+#           |   Canal en Memoria    |    midas.               |    Connection.         |
+#           |                       |  - Llevar los mensajes  |  - Respeta el prefetch |
+#           |                       |    sin confirmar.       |    del canal.          |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Publicar con confir- |  - Misma interfaz que  |
+#           |  Conexión Asíncrona   |    maciones desde un    |    pika.SelectConnec-  |
+#           |      en Memoria       |    ciclo de eventos.    |    tion, la usa el pu- |
+#           |                       |                         |    blicador por lotes. |
+#           +-----------------------+-------------------------+------------------------+
+#
+#   A continuación se describen los métodos que se implementaron en éste módulo:
+#
+#                                               Métodos:
+#           +------------------------+--------------------------+-----------------------+
+#           |         Nombre         |        Parámetros        |        Función        |
+#           +------------------------+--------------------------+-----------------------+
+#           |   declare_exchange(),  |  - exchange, queue, rout-|  - Declaran exchanges |
+#           |   declare_queue(),     |     ing_key.             |    y colas, y enlazan |
+#           |        bind()          |                          |    una cola con un    |
+#           |                        |                          |    patrón.            |
+#           +------------------------+--------------------------+-----------------------+
+#           |        route()         |  - exchange, routing_key:|  - Agrega el mensaje a|
+#           |                        |     destino.             |    las colas enlaza-  |
+#           |                        |  - body, properties: men-|    das.               |
+#           |                        |     saje.                |                       |
+#           +------------------------+--------------------------+-----------------------+
+#           |         wait()         |  - ready: función que in-|  - Espera a que se    |
+#           |                        |     dica si hay trabajo. |    publique un mensaje|
+#           |                        |  - timeout: segundos.    |    o se avise.        |
+#           +------------------------+--------------------------+-----------------------+
+#           |   subscribe(),         |  - queue: cola.          |  - Cuentan los consu- |
+#           |   unsubscribe()        |                          |    midores y borran   |
+#           |                        |                          |    las colas auto_de- |
+#           |                        |                          |    lete sin ellos.    |
+#           +------------------------+--------------------------+-----------------------+
+#           |       release()        |  - connection: conexión  |  - Borra las colas ex-|
+#           |                        |     que se cierra.       |    clusivas de la co- |
+#           |                        |                          |    nexión.            |
+#           +------------------------+--------------------------+-----------------------+
+#           |     delete_queue()     |  - queue: cola.          |  - Borra la cola, sus |
+#           |                        |                          |    mensajes y sus en- |
+#           |                        |                          |    laces.             |
+#           +------------------------+--------------------------+-----------------------+
+#           |   pending(), purge()   |          Ninguno         |  - Cuentan o descartan|
+#           |                        |                          |    los mensajes en    |
+#           |                        |                          |    las colas.         |
+#           +------------------------+--------------------------+-----------------------+
+#           |   basic_publish(),     |  - Los mismos que en pi- |  - Igual que en pika. |
+#           |   basic_consume(),     |     ka.                  |                       |
+#           |   basic_ack(), ...     |                          |                       |
+#           +------------------------+--------------------------+-----------------------+
+#           |        deliver()       |          Ninguno         |  - Entrega los mensa- |
+#           |                        |                          |    jes que permite el |
+#           |                        |                          |    prefetch.          |
+#           +------------------------+--------------------------+-----------------------+
+#           |  process_data_events() |  - time_limit: segundos. |  - Entrega mensajes y |
+#           |                        |                          |    ejecuta callbacks. |
+#           +------------------------+--------------------------+-----------------------+
+#           |   start(), stop(),     |  - callback, delay.      |  - Ciclo de eventos de|
+#           |   call_later(), ...    |                          |    la conexión asín-  |
+#           |                        |                          |    crona.             |
+#           +------------------------+--------------------------+-----------------------+
+#
+#           Nota: sólo se implementa lo que usan los publicadores y el motor de consumo del
+#           SMAM, los mensajes no se guardan en disco y sólo los reciben los suscriptores del
+#           mismo proceso.
+#
+#-------------------------------------------------------------------------
+import collections
+import heapq
+import re
+import threading
+import time
+import pika.spec
+
+
+class Propiedades:
+    __slots__ = ('content_type', 'delivery_mode', 'reply_to', 'timestamp')
+
+    def __init__(self, content_type, delivery_mode, reply_to, timestamp):
+        self.content_type = content_type
+        self.delivery_mode = delivery_mode
+        self.reply_to = reply_to
+        # time.perf_counter() al publicar, para medir la latencia de extremo a extremo
+        self.timestamp = timestamp
+
+
+class Entrega:
+    __slots__ = ('delivery_tag', 'routing_key')
+
+    def __init__(self, delivery_tag, routing_key):
+        self.delivery_tag = delivery_tag
+        self.routing_key = routing_key
+
+
+class Resultado:
+    __slots__ = ('method', 'queue', 'message_count')
+
+    def __init__(self, queue, message_count=0):
+        self.queue = queue
+        self.message_count = message_count
+        self.method = self
+
+
+class Confirmacion:
+    __slots__ = ('method',)
+
+    def __init__(self, method):
+        self.method = method
+
+
+def compile_pattern(pattern):
+    # '*' es exactamente una palabra y '#' cero o más palabras
+    if pattern == '#':
+        return re.compile('.*$')
+    regex = ''
+    separator = ''
+    for word in pattern.split('.'):
+        if word == '#':
+            regex += '(?:\\.[^.]+)*' if separator else '(?:[^.]+\\.)*'
+            continue
+        regex += separator + ('[^.]+' if word == '*' else re.escape(word))
+        separator = '\\.'
+    return re.compile(regex + '$')
+
+
+class DistribuidorEnMemoria:
+
+    def __init__(self):
+        self.queues = {}
+        # exchange -> [(patrón, expresión, cola)]
+        self.exchanges = {}
+        # Colas destino de cada (exchange, routing key), se limpia al enlazar una cola
+        self.routes = {}
+        # El candado sólo protege las declaraciones y la espera de los consumidores, append()
+        # y popleft() de un deque no necesitan candado
+        self.lock = threading.Lock()
+        self.ready = threading.Condition(self.lock)
+        self.waiting = 0
+        self.anonymous = 0
+        # cola -> (conexión dueña si es exclusiva, True si se borra sin consumidores)
+        self.temporary = {}
+        # cola -> consumidores de todos los canales
+        self.consumers = collections.Counter()
+
+    def declare_exchange(self, exchange):
+        with self.lock:
+            self.exchanges.setdefault(exchange, [])
+
+    def declare_queue(self, queue, owner=None, auto_delete=False):
+        with self.lock:
+            if not queue:
+                self.anonymous += 1
+                queue = 'amq.gen-' + str(self.anonymous)
+            if queue not in self.queues:
+                self.queues[queue] = collections.deque()
+                if owner is not None or auto_delete:
+                    self.temporary[queue] = (owner, auto_delete)
+        return queue
+
+    def subscribe(self, queue):
+        with self.lock:
+            self.consumers[queue] += 1
+
+    def unsubscribe(self, queue):
+        with self.lock:
+            self.consumers[queue] -= 1
+            if self.consumers[queue] > 0:
+                return
+            del self.consumers[queue]
+            # Igual que RabbitMQ, una cola auto_delete se borra al cancelar su último consumidor
+            if self.temporary.get(queue, (None, False))[1]:
+                self.delete_queue(queue)
+
+    def release(self, connection):
+        # Las colas exclusivas se borran al cerrar la conexión que las declaró
+        with self.lock:
+            for queue in [queue for queue, (owner, auto_delete) in self.temporary.items()
+                          if owner is connection]:
+                self.delete_queue(queue)
+
+    def delete_queue(self, queue):
+        # Se llama con el candado tomado, los mensajes de la cola se descartan
+        self.queues.pop(queue, None)
+        self.temporary.pop(queue, None)
+        self.consumers.pop(queue, None)
+        for exchange, bindings in self.exchanges.items():
+            bindings[:] = [binding for binding in bindings if binding[2] != queue]
+        self.routes = {}
+
+    def bind(self, queue, exchange, routing_key):
+        with self.lock:
+            bindings = self.exchanges.setdefault(exchange, [])
+            if all(binding[0] != routing_key or binding[2] != queue for binding in bindings):
+                bindings.append((routing_key, compile_pattern(routing_key), queue))
+                self.routes = {}
+
+    def route(self, exchange, routing_key, body, properties):
+        if exchange == '':
+            queues = (routing_key,)
+        else:
+            queues = self.routes.get((exchange, routing_key))
+            if queues is None:
+                with self.lock:
+                    queues = tuple(binding[2] for binding in self.exchanges.get(exchange, ())
+                                   if binding[1].match(routing_key))
+                    self.routes[(exchange, routing_key)] = queues
+        message = (routing_key, body, Propiedades(getattr(properties, 'content_type', None),
+                                                  getattr(properties, 'delivery_mode', None),
+                                                  getattr(properties, 'reply_to', None),
+                                                  time.perf_counter()))
+        for queue in queues:
+            # Igual que RabbitMQ, un mensaje sin colas declaradas se descarta
+            deque = self.queues.get(queue)
+            if deque is not None:
+                deque.append(message)
+        if self.waiting:
+            self.notify()
+
+    def notify(self):
+        with self.lock:
+            self.ready.notify_all()
+
+    def wait(self, ready, timeout):
+        with self.lock:
+            # Se vuelve a revisar después de registrarse, así no se pierde un aviso
+            self.waiting += 1
+            try:
+                if not ready():
+                    self.ready.wait(timeout)
+            finally:
+                self.waiting -= 1
+
+    def pending(self):
+        return sum(len(queue) for queue in list(self.queues.values()))
+
+    def purge(self):
+        for queue in list(self.queues.values()):
+            queue.clear()
+
+
+class CanalEnMemoria:
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.broker = connection.broker
+        self.is_open = True
+        self.prefetch = 0
+        self.tag = 0
+        # cola -> (callback, auto_ack)
+        self.consumers = collections.OrderedDict()
+        self.unacked = collections.OrderedDict()
+
+    def exchange_declare(self, exchange, exchange_type='direct', durable=False, **kwargs):
+        self.broker.declare_exchange(exchange)
+
+    def queue_declare(self, queue, durable=False, exclusive=False, auto_delete=False, **kwargs):
+        queue = self.broker.declare_queue(queue, self.connection if exclusive else None,
+                                          auto_delete)
+        return Resultado(queue, len(self.broker.queues[queue]))
+
+    def queue_bind(self, queue, exchange, routing_key=None, **kwargs):
+        self.broker.bind(queue, exchange, routing_key or queue)
+
+    def basic_qos(self, prefetch_count=0, **kwargs):
+        self.prefetch = prefetch_count
+
+    def basic_consume(self, queue, on_message_callback, auto_ack=False, **kwargs):
+        if queue not in self.consumers:
+            self.broker.subscribe(queue)
+        self.consumers[queue] = (on_message_callback, auto_ack)
+        return 'ctag-' + queue
+
+    def basic_cancel(self, consumer_tag):
+        queue = consumer_tag[len('ctag-'):]
+        if self.consumers.pop(queue, None) is not None:
+            self.broker.unsubscribe(queue)
+        return []
+
+    def basic_publish(self, exchange, routing_key, body, properties=None, **kwargs):
+        self.broker.route(exchange, routing_key, body, properties)
+
+    def basic_ack(self, delivery_tag, multiple=False):
+        if multiple:
+            while self.unacked and next(iter(self.unacked)) <= delivery_tag:
+                self.unacked.popitem(last=False)
+        else:
+            self.unacked.pop(delivery_tag, None)
+
+    def basic_nack(self, delivery_tag, multiple=False, requeue=True):
+        entry = self.unacked.pop(delivery_tag, None)
+        if requeue and entry is not None:
+            self.requeue(*entry)
+
+    def requeue(self, queue, message):
+        # Si la cola ya se borró el mensaje se descarta
+        deque = self.broker.queues.get(queue)
+        if deque is not None:
+            deque.appendleft(message)
+
+    def ready(self):
+        if not self.is_open or (self.prefetch and len(self.unacked) >= self.prefetch):
+            return False
+        return any(self.broker.queues.get(queue) for queue in self.consumers)
+
+    def deliver(self):
+        delivered = 0
+        for queue, (callback, auto_ack) in list(self.consumers.items()):
+            deque = self.broker.queues.get(queue)
+            while deque is not None and queue in self.consumers and (auto_ack or not self.prefetch or
+                                               len(self.unacked) < self.prefetch):
+                try:
+                    message = deque.popleft()
+                except IndexError:
+                    break
+                self.tag += 1
+                if not auto_ack:
+                    self.unacked[self.tag] = (queue, message)
+                callback(self, Entrega(self.tag, message[0]), message[2], message[1])
+                delivered += 1
+        return delivered
+
+    def close(self):
+        # Los mensajes sin confirmar regresan a su cola
+        for queue, message in reversed(list(self.unacked.values())):
+            self.requeue(queue, message)
+        self.unacked.clear()
+        for queue in list(self.consumers):
+            self.broker.unsubscribe(queue)
+        self.consumers.clear()
+        self.is_open = False
+
+
+class ConexionEnMemoria:
+
+    def __init__(self, broker):
+        self.broker = broker
+        self.channels = []
+        self.callbacks = collections.deque()
+        self.is_open = True
+        self.is_closed = False
+
+    def channel(self):
+        channel = CanalEnMemoria(self)
+        self.channels.append(channel)
+        return channel
+
+    def add_callback_threadsafe(self, callback):
+        self.callbacks.append(callback)
+        self.broker.notify()
+
+    def ready(self):
+        return bool(self.callbacks) or any(channel.ready() for channel in self.channels)
+
+    def process_data_events(self, time_limit=0):
+        deadline = time.time() + (time_limit or 0)
+        while True:
+            done = 0
+            for channel in self.channels:
+                if channel.is_open:
+                    done += channel.deliver()
+            while self.callbacks:
+                self.callbacks.popleft()()
+                done += 1
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return
+            if not done:
+                # Se espera a que se publique un mensaje o se pida un callback
+                self.broker.wait(self.ready, remaining)
+
+    def close(self):
+        for channel in self.channels:
+            if channel.is_open:
+                channel.close()
+        self.broker.release(self)
+        self.is_open = False
+        self.is_closed = True
+
+
+class BucleEnMemoria:
+
+    def __init__(self):
+        self.callbacks = collections.deque()
+        # (hora, número, callback) de los callbacks programados con call_later()
+        self.timers = []
+        self.sequence = 0
+        self.condition = threading.Condition()
+        self.running = False
+
+    def add_callback_threadsafe(self, callback):
+        with self.condition:
+            self.callbacks.append(callback)
+            self.condition.notify()
+
+    def call_later(self, delay, callback):
+        with self.condition:
+            self.sequence += 1
+            heapq.heappush(self.timers, (time.time() + delay, self.sequence, callback))
+            self.condition.notify()
+
+    def start(self):
+        self.running = True
+        while self.running:
+            with self.condition:
+                now = time.time()
+                while self.timers and self.timers[0][0] <= now:
+                    self.callbacks.append(heapq.heappop(self.timers)[2])
+                if not self.callbacks:
+                    self.condition.wait(self.timers[0][0] - now if self.timers else None)
+                    continue
+                callbacks, self.callbacks = self.callbacks, collections.deque()
+            for callback in callbacks:
+                callback()
+
+    def stop(self):
+        self.running = False
+        with self.condition:
+            self.condition.notify()
+
+
+class CanalAsincronoEnMemoria:
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.broker = connection.broker
+        self.is_open = True
+        self.on_confirm = None
+        self.on_close = None
+        self.tag = 0
+
+    def add_on_close_callback(self, callback):
+        # El distribuidor en memoria no cierra canales por errores, sólo se guarda
+        self.on_close = callback
+
+    def exchange_declare(self, exchange, exchange_type='direct', durable=False, callback=None,
+                         **kwargs):
+        self.broker.declare_exchange(exchange)
+        if callback is not None:
+            self.connection.ioloop.add_callback_threadsafe(lambda: callback(None))
+
+    def queue_declare(self, queue, durable=False, exclusive=False, auto_delete=False,
+                      callback=None, **kwargs):
+        queue = self.broker.declare_queue(queue, self.connection if exclusive else None,
+                                          auto_delete)
+        result = Resultado(queue, len(self.broker.queues[queue]))
+        if callback is not None:
+            self.connection.ioloop.add_callback_threadsafe(lambda: callback(result))
+
+    def confirm_delivery(self, ack_nack_callback, callback=None):
+        self.on_confirm = ack_nack_callback
+        if callback is not None:
+            self.connection.ioloop.add_callback_threadsafe(lambda: callback(None))
+
+    def basic_publish(self, exchange, routing_key, body, properties=None, **kwargs):
+        self.broker.route(exchange, routing_key, body, properties)
+        if self.on_confirm is not None:
+            # El mensaje ya está en sus colas, se confirma en la siguiente vuelta del ciclo
+            self.tag += 1
+            frame = Confirmacion(pika.spec.Basic.Ack(delivery_tag=self.tag))
+            self.connection.ioloop.add_callback_threadsafe(lambda: self.on_confirm(frame))
+
+
+class ConexionAsincronaEnMemoria:
+
+    def __init__(self, broker, on_open_callback=None, on_open_error_callback=None,
+                 on_close_callback=None):
+        self.broker = broker
+        self.ioloop = BucleEnMemoria()
+        self.on_close_callback = on_close_callback
+        self.is_open = True
+        self.is_closed = False
+        if on_open_callback is not None:
+            self.ioloop.add_callback_threadsafe(lambda: on_open_callback(self))
+
+    def channel(self, on_open_callback=None):
+        channel = CanalAsincronoEnMemoria(self)
+        if on_open_callback is not None:
+            self.ioloop.add_callback_threadsafe(lambda: on_open_callback(channel))
+        return channel
+
+    def close(self):
+        self.broker.release(self)
+        self.is_open = False
+        self.is_closed = True
+        if self.on_close_callback is not None:
+            self.ioloop.add_callback_threadsafe(lambda: self.on_close_callback(self, None))
+        else:
+            self.ioloop.stop()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#-------------------------------------------------------------------------
+# Archivo: ejecucion_local.py
+# Capitulo: 3 Estilo Publica-Subscribe
+# Autor(es): Perla Velasco & Yonathan Mtz.
+# Version: 1.0.0 Octubre 2026
+# Descripción:
+#
+#   Éste programa ejecuta todo el SMAM en un solo proceso y sin RabbitMQ: los wearables del
+#   simulador publican en el distribuidor en memoria y los procesadores de todos los signos
+#   vitales los evalúan en el mismo proceso. Sirve para instalaciones pequeñas de un solo
+#   equipo y para probar el sistema a tasas altas sin instalar el distribuidor.
+#
+#   Uso:
+#
+#       (venv)$ cd smam
+#       (venv)$ python ejecucion_local.py --wearables 1000 --tasa 5 --duracion 30
+#
+#-------------------------------------------------------------------------
+import argparse
+import sys
+import threading
+import time
+sys.path.append('publicadores')
+sys.path.append('suscriptores')
+import metricas
+import transporte
+from simulador import Simulador, MODELOS
+from motor_de_consumo import MotorDeConsumo
+from procesador_de_signos_vitales import default_registry
+from correlacion_de_eventos import CorrelacionDeEventos
+from configuracion_de_reglas import ConfiguracionDeReglas
+
+
+def run(args):
+    host = 'memoria'
+    broker = transporte.broker(transporte.parse(host)[1])
+    rules = ConfiguracionDeReglas(args.umbrales, args.ventana)
+    rules.start()
+    registry = default_registry(args.ventana, rules)
+    if args.correlacion:
+        for rule in CorrelacionDeEventos(rules=rules).rules():
+            registry.register(rule)
+    if args.metricas is not None:
+        # Los wearables y los procesadores comparten el registro de métricas del proceso
+        metricas.serve(args.metricas)
+    motor = MotorDeConsumo(registry.handlers(batch=bool(args.lote)), host=host,
+                           workers=args.hilos, batch=args.lote, cooldown=args.enfriamiento,
+                           metrics=args.metricas)
+    consumer = threading.Thread(target=motor.start, name='procesadores')
+    consumer.daemon = True
+    consumer.start()
+    # Las colas las declara el motor, antes de eso el distribuidor descartaría los mensajes
+    while not motor.running:
+        time.sleep(0.01)
+    simulador = Simulador(asynchronous=True, batch_size=args.tamano_lote, rate=args.tasa,
+                          duration=args.duracion, topic=True, host=host, models=args.modelos)
+    simulador.add_sensors(args.wearables, verbose=False)
+    print('| wearables: ' + str(args.wearables) + ', ' + str(args.tasa) +
+          ' mensajes por segundo cada uno durante ' + str(args.duracion) + ' segundos')
+    simulador.start_sensors()
+    # Se espera a que los procesadores terminen los mensajes pendientes
+    deadline = time.time() + 30
+    while (broker.pending() or motor.delivered) and time.time() < deadline:
+        time.sleep(0.05)
+    motor.stop()
+    consumer.join(5)
+    motor.close()
+    print('| mensajes procesados: ' + str(motor.processed) + ', con error: ' + str(motor.errors))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='SMAM en un solo proceso, sin RabbitMQ')
+    parser.add_argument('--wearables', type=int, default=100, help='wearables simulados')
+    parser.add_argument('--tasa', type=float, default=1.0, help='mensajes por segundo de cada wearable')
+    parser.add_argument('--duracion', type=float, default=60, help='segundos de simulación')
+    parser.add_argument('--tamano-lote', type=int, default=100,
+                        help='mensajes que junta el publicador antes de enviarlos')
+    parser.add_argument('--lote', type=int, default=0,
+                        help='mensajes que se evalúan juntos con numpy, 0 para uno por uno')
+    parser.add_argument('--hilos', type=int, default=4, help='hilos de trabajo de los procesadores')
+    parser.add_argument('--ventana', type=float,
+                        help='segundos que debe mantenerse un valor extremo para notificar')
+    parser.add_argument('--umbrales',
+                        help='archivo JSON con los umbrales y ventanas por signo vital y por '
+                             'wearable, se recarga cuando cambia')
+    parser.add_argument('--enfriamiento', type=float, default=60,
+                        help='segundos en que se omiten las alertas repetidas de un wearable')
+    parser.add_argument('--metricas', type=int,
+                        help='puerto del endpoint HTTP local con las métricas en formato de '
+                             'Prometheus (/metrics)')
+    parser.add_argument('--correlacion', action='store_true',
+                        help='busca además caídas seguidas de ritmo cardiaco elevado en el mismo '
+                             'wearable')
+    parser.add_argument('--modelos', nargs='+', choices=sorted(MODELOS), default=['xiaomi'],
+                        help='modelos de wearable que se asignan por turnos')
+    run(parser.parse_args())
@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#-------------------------------------------------------------------------
+# Archivo: generador_de_carga.py
+# Capitulo: 3 Patrón Publica-Subscribe
+# Autor(es): Perla Velasco & Yonathan Mtz.
+# Version: 1.0.0 Octubre 2026
+# Descripción:
+#
+#   Éste programa ejecuta el simulador sin pedir datos al usuario para realizar pruebas de
+#   capacidad repetibles.
+#
+#   Las características de éste programa son las siguientes:
+#
+#                                      generador_de_carga.py
+#           +-----------------------+-------------------------+------------------------+
+#           |  Nombre del elemento  |     Responsabilidad     |      Propiedades       |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Generar una carga    |  - Se configura por    |
+#           |     Generador de      |    constante de signos  |    argumentos de la    |
+#           |        Carga          |    vitales.             |    línea de comandos.  |
+#           |                       |  - Reportar el rendi-   |  - Reporta mensajes por|
+#           |                       |    miento obtenido.     |    segundo y percenti- |
+#           |                       |                         |    les de latencia de  |
+#           |                       |                         |    publicación.        |
+#           |                       |                         |  - Los registros de los|
+#           |                       |                         |    wearables se confir-|
+#           |                       |                         |    man antes de medir y|
+#           |                       |                         |    no se cuentan.      |
+#           +-----------------------+-------------------------+------------------------+
+#
+#   A continuación se describen las funciones que se implementaron en éste programa:
+#
+#                                             Funciones:
+#           +------------------------+--------------------------+-----------------------+
+#           |         Nombre         |        Parámetros        |        Función        |
+#           +------------------------+--------------------------+-----------------------+
+#           |      parse_mix()       |  - text: mezcla en la    |  - Regresa la secuen- |
+#           |                        |     forma vital=peso,... |    cia de signos vita-|
+#           |                        |                          |    les a enviar.      |
+#           +------------------------+--------------------------+-----------------------+
+#           |     percentiles()      |  - values: latencias.    |  - Calcula los percen-|
+#           |                        |                          |    tiles de latencia. |
+#           +------------------------+--------------------------+-----------------------+
+#           |         run()          |  - args: argumentos de la|  - Ejecuta la prueba  |
+#           |                        |     línea de comandos.   |    y regresa el re-   |
+#           |                        |                          |    porte.             |
+#           +------------------------+--------------------------+-----------------------+
+#
+#   Uso:
+#
+#       (venv)$ python generador_de_carga.py --dispositivos 5000 --tasa 10000 --duracion 120 \
+#                   --rampa lineal --segundos-rampa 30 --mezcla heart_rate=2,positions=1
+#
+#-------------------------------------------------------------------------
+import argparse
+import json
+import sys
+import time
+sys.path.append('publicadores')
+from xiaomi_my_band import XiaomiMyBand
+from pool_de_conexiones import SIGNOS_VITALES
+from publicador_por_lotes import PublicadorPorLotes
+from simulador_asincrono import SimuladorAsincrono
+import topologia
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def parse_mix(text):
+    vitals = []
+    for item in text.split(','):
+        vital, weight = (item.split('=') + ['1'])[:2]
+        vital = vital.strip()
+        if vital not in SIGNOS_VITALES:
+            raise argparse.ArgumentTypeError('signo vital desconocido: ' + vital)
+        vitals.extend([vital] * int(weight))
+    if not vitals:
+        raise argparse.ArgumentTypeError('la mezcla de signos vitales está vacía')
+    return vitals
+
+
+def percentiles(values):
+    values = sorted(values)
+    if not values:
+        return {}
+    result = {}
+    for p in PERCENTILES:
+        result['p' + str(p)] = values[min(len(values) - 1, int(len(values) * p / 100))]
+    result['max'] = values[-1]
+    return result
+
+
+def run(args):
+    broker = PublicadorPorLotes(host=args.host, batch_size=args.tamano_lote, linger=args.espera,
+                                max_outstanding=args.sin_confirmar, track_latency=True,
+                                exchange=topologia.EXCHANGE if args.topico else '')
+    sensores = [XiaomiMyBand(args.id_inicial + x, broker, 0, shards=args.fragmentos)
+                for x in range(0, args.dispositivos)]
+    # Los wearables se registran antes de la prueba, así el reporte sólo cuenta las lecturas
+    for sensor in sensores:
+        sensor.register()
+    deadline = time.time() + 10
+    while broker.confirmed < len(sensores) and time.time() < deadline:
+        time.sleep(0.01)
+    registered = broker.confirmed
+    del broker.latencies[:]
+    steps = args.escalones if args.rampa == 'escalones' else 0
+    ramp = 0 if args.rampa == 'ninguna' else args.segundos_rampa
+    simulador = SimuladorAsincrono(sensores, args.tasa / args.dispositivos, args.duracion,
+                                   args.mezcla, ramp, steps)
+    stats = simulador.run()
+    broker.close()
+    latencies = percentiles(broker.latencies)
+    return {
+        'devices': args.dispositivos,
+        'target_rate': args.tasa,
+        'duration': args.duracion,
+        'ramp': args.rampa,
+        'registered': registered,
+        'published': stats['sent'],
+        'confirmed': broker.confirmed - len(sensores),
+        'nacked': broker.nacked,
+        'throughput': stats['rate'],
+        'max_schedule_lag': stats['max_lag'],
+        'backpressure_waits': stats['waits'],
+        'latency_ms': dict((k, v * 1000) for k, v in latencies.items()),
+    }
+
+
+def print_report(report):
+    print('+---------------------------------------------+')
+    print('|           RESULTADO DE LA PRUEBA            |')
+    print('+---------------------------------------------+')
+    print('| wearables: ' + str(report['devices']) + ' (' + str(report['registered']) +
+          ' registros confirmados antes de la prueba)')
+    print('| mensajes publicados: ' + str(report['published']))
+    print('| mensajes confirmados: ' + str(report['confirmed']))
+    print('| mensajes rechazados: ' + str(report['nacked']))
+    print('| tasa objetivo: ' + str(report['target_rate']) + ' mensajes/s')
+    print('| tasa obtenida: ' + str(round(report['throughput'], 1)) + ' mensajes/s')
+    print('| retraso máximo del calendario: ' + str(round(report['max_schedule_lag'], 3)) + ' s')
+    print('+---------------------------------------------+')
+    print('|        LATENCIA DE PUBLICACIÓN (ms)         |')
+    print('+---------------------------------------------+')
+    for name, value in report['latency_ms'].items():
+        print('| ' + name + ': ' + str(round(value, 2)))
+    print('+---------------------------------------------+')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generador de carga del SMAM')
+    parser.add_argument('--dispositivos', type=int, default=1000, help='número de wearables')
+    parser.add_argument('--tasa', type=float, default=1000,
+                        help='mensajes por segundo del total de wearables')
+    parser.add_argument('--duracion', type=float, default=60, help='segundos de la prueba')
+    parser.add_argument('--rampa', choices=('ninguna', 'lineal', 'escalones'), default='ninguna',
+                        help='perfil con el que se incorporan los wearables')
+    parser.add_argument('--segundos-rampa', type=float, default=10,
+                        help='segundos en que se incorporan todos los wearables')
+    parser.add_argument('--escalones', type=int, default=5, help='escalones de la rampa')
+    parser.add_argument('--mezcla', type=parse_mix, default=list(SIGNOS_VITALES),
+                        help='proporción de signos vitales, por ejemplo heart_rate=3,positions=1')
+    parser.add_argument('--id-inicial', type=int, default=39722608,
+                        help='id del primer wearable')
+    parser.add_argument('--host', default='localhost', help='distribuidor de mensajes')
+    parser.add_argument('--tamano-lote', type=int, default=500, help='mensajes por lote')
+    parser.add_argument('--espera', type=float, default=0.01,
+                        help='segundos máximos de espera de un lote incompleto')
+    parser.add_argument('--sin-confirmar', type=int, default=50000,
+                        help='mensajes sin confirmar permitidos')
+    parser.add_argument('--topico', action='store_true',
+                        help='publica en el exchange de los signos vitales (vitals.<tipo>.<id>)')
+    parser.add_argument('--fragmentos', type=int, default=0,
+                        help='fragmentos en que se reparten los wearables por el hash de su id '
+                             '(tópico)')
+    parser.add_argument('--json', action='store_true', help='imprime el reporte en JSON')
+    args = parser.parse_args()
+    report = run(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
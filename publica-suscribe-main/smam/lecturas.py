@@ -0,0 +1,336 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#-------------------------------------------------------------------------
+# Archivo: lecturas.py
+# Capitulo: 3 Estilo Publica-Subscribe
+# Autor(es): Perla Velasco & Yonathan Mtz.
+# Version: 1.0.0 Octubre 2026
+# Descripción:
+#
+#   Éste módulo define las lecturas de cada signo vital y los datos de los wearables que las
+#   envían. Las lecturas sólo llevan el id del wearable; su fabricante, modelo y versiones se
+#   envían una sola vez en un registro del wearable y se buscan por id.
+#
+#   Las características de éste módulo son las siguientes:
+#
+#                                           lecturas.py
+#           +-----------------------+-------------------------+------------------------+
+#           |  Nombre del elemento  |     Responsabilidad     |      Propiedades       |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Guardar los valores  |  - Una clase con       |
+#           |       Lectura         |    de un signo vital.   |    __slots__ por signo |
+#           |                       |                         |    vital.              |
+#           |                       |                         |  - Se leen como un dic-|
+#           |                       |                         |    cionario, por ejem- |
+#           |                       |                         |    plo lectura['id'].  |
+#           |                       |                         |  - La fecha y los datos|
+#           |                       |                         |    del wearable se cal-|
+#           |                       |                         |    culan al leerlos.   |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Guardar el fabrican- |  - Se envía una vez al |
+#           |      Dispositivo      |    te, modelo, versio-  |    iniciar el wearable.|
+#           |                       |    nes y batería de un  |  - Se busca por id.    |
+#           |                       |    wearable.            |                        |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Guardar en memoria   |  - LRU con capacidad   |
+#           |       Cache de        |    los wearables que    |    fija.               |
+#           |     Dispositivos      |    usa el proceso.      |  - Busca los demás en  |
+#           |                       |                         |    una fuente, por     |
+#           |                       |                         |    ejemplo el archivo  |
+#           |                       |                         |    del registro.       |
+#           |                       |                         |  - Los avisos del re-  |
+#           |                       |                         |    gistro reemplazan   |
+#           |                       |                         |    su copia.           |
+#           |                       |                         |  - Recuerda por unos   |
+#           |                       |                         |    segundos los weara- |
+#           |                       |                         |    bles que no están en|
+#           |                       |                         |    la fuente.          |
+#           +-----------------------+-------------------------+------------------------+
+#
+#   A continuación se describen las funciones que se implementaron en éste módulo:
+#
+#                                             Funciones:
+#           +------------------------+--------------------------+-----------------------+
+#           |         Nombre         |        Parámetros        |        Función        |
+#           +------------------------+--------------------------+-----------------------+
+#           |       register()       |  - dispositivo: datos del|  - Guarda los datos   |
+#           |                        |     wearable.            |    del wearable en la |
+#           |                        |                          |    cache.             |
+#           +------------------------+--------------------------+-----------------------+
+#           |        device()        |  - id: id del wearable.  |  - Regresa los datos  |
+#           |                        |                          |    del wearable de la |
+#           |                        |                          |    cache o los de un  |
+#           |                        |                          |    wearable descono-  |
+#           |                        |                          |    cido.              |
+#           +------------------------+--------------------------+-----------------------+
+#           |   get(), put(), up-    |  - id o dispositivo.     |  - Buscan, guardan,   |
+#           |   date(), invalidate() |                          |    reemplazan o des-  |
+#           |                        |                          |    cartan un wearable |
+#           |                        |                          |    de la cache.       |
+#           +------------------------+--------------------------+-----------------------+
+#           |       from_dict()      |  - message: diccionario  |  - Regresa la lectura |
+#           |                        |     con una lectura.     |    del signo vital que|
+#           |                        |                          |    tiene el mensaje.  |
+#           +------------------------+--------------------------+-----------------------+
+#           |   format_datetime()    |  - timestamp: milisegun- |  - Regresa la fecha   |
+#           |                        |     dos desde epoch.     |    dd:mm:aaaa:hh:mm:ss|
+#           |                        |                          |    una vez por segun- |
+#           |                        |                          |    do.                |
+#           +------------------------+--------------------------+-----------------------+
+#
+#-------------------------------------------------------------------------
+import collections
+import threading
+import time
+
+# Datos del wearable que no viajan en las lecturas
+METADATOS = ('producer', 'model', 'hardware_version', 'software_version')
+# Wearables que guarda en memoria cada proceso, los demás se buscan en el registro
+CAPACIDAD = 100000
+# Segundos en que no se vuelve a buscar en la fuente un wearable que no se encontró
+AUSENCIA = 5.0
+
+
+class Dispositivo:
+    __slots__ = ('id', 'timestamp', 'battery_level') + METADATOS
+
+    def __init__(self, id, producer, model, hardware_version, software_version, battery_level=0,
+                 timestamp=0):
+        self.id = id
+        self.producer = producer
+        self.model = model
+        self.hardware_version = hardware_version
+        self.software_version = software_version
+        self.battery_level = battery_level
+        # Momento del registro, un registro anterior no reemplaza a uno más reciente
+        self.timestamp = timestamp
+
+    def same(self, other):
+        return all(getattr(self, name) == getattr(other, name)
+                   for name in ('id', 'battery_level') + METADATOS)
+
+
+DESCONOCIDO = Dispositivo(0, 'desconocido', 'desconocido', 'desconocido', 'desconocido')
+
+
+class CacheDeDispositivos:
+
+    def __init__(self, capacity=CAPACIDAD, source=None, ttl=AUSENCIA):
+        self.capacity = capacity
+        # Función id -> Dispositivo o None con la que se buscan los wearables que no están
+        # en memoria, por ejemplo el archivo del registro de dispositivos
+        self.source = source
+        self.ttl = ttl
+        self.entries = collections.OrderedDict()
+        # id -> momento hasta el que no se vuelve a buscar el wearable en la fuente
+        self.missing = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, id):
+        with self.lock:
+            dispositivo = self.entries.get(id)
+            if dispositivo is not None:
+                self.entries.move_to_end(id)
+                return dispositivo
+            if self.source is None or self.missing.get(id, 0) > time.time():
+                return DESCONOCIDO
+        # La fuente se consulta sin el candado de la cache
+        dispositivo = self.source(id)
+        if dispositivo is None:
+            # Sólo se recuerda unos segundos, el registro puede llegar después de la lectura
+            with self.lock:
+                self.missing[id] = time.time() + self.ttl
+                self.missing.move_to_end(id)
+                if len(self.missing) > self.capacity:
+                    self.missing.popitem(last=False)
+            return DESCONOCIDO
+        self.put(dispositivo)
+        return dispositivo
+
+    def put(self, dispositivo):
+        with self.lock:
+            self.store(dispositivo)
+
+    def update(self, dispositivo):
+        # Aviso del registro: se reemplaza la copia en memoria; si no la hay y existe una
+        # fuente, el wearable se busca hasta que llegue una lectura suya, salvo que no se haya
+        # encontrado hace poco
+        with self.lock:
+            if dispositivo.id in self.entries or dispositivo.id in self.missing or \
+                    self.source is None:
+                self.store(dispositivo)
+
+    def store(self, dispositivo):
+        current = self.entries.get(dispositivo.id)
+        if current is not None and current.timestamp > dispositivo.timestamp:
+            return
+        self.entries[dispositivo.id] = dispositivo
+        self.entries.move_to_end(dispositivo.id)
+        self.missing.pop(dispositivo.id, None)
+        if len(self.entries) > self.capacity:
+            # Se descarta el wearable usado hace más tiempo
+            self.entries.popitem(last=False)
+
+    def invalidate(self, id):
+        with self.lock:
+            self.entries.pop(id, None)
+            self.missing.pop(id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.missing.clear()
+
+
+# Wearables conocidos por el proceso
+CACHE = CacheDeDispositivos()
+
+
+def register(dispositivo):
+    CACHE.put(dispositivo)
+
+
+def device(id):
+    return CACHE.get(id)
+
+
+_last_datetime = (None, None)
+
+
+def format_datetime(timestamp):
+    global _last_datetime
+    # Las lecturas del mismo segundo comparten el texto de la fecha
+    second, text = _last_datetime
+    if second != timestamp // 1000:
+        second = timestamp // 1000
+        text = time.strftime("%d:%m:%Y:%H:%M:%S", time.localtime(second))
+        _last_datetime = (second, text)
+    return text
+
+
+class Lectura:
+    __slots__ = ('id', 'timestamp')
+    vital = None
+    # Campos del signo vital en el orden del registro binario
+    campos = ()
+
+    def __getitem__(self, name):
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name)
+
+    def __contains__(self, name):
+        return hasattr(self, name)
+
+    def get(self, name, default=None):
+        return getattr(self, name, default)
+
+    def keys(self):
+        return ('id', 'timestamp') + self.campos + ('datetime', 'battery_level') + METADATOS
+
+    def as_dict(self):
+        message = {'id': self.id, 'timestamp': self.timestamp}
+        for name in self.campos:
+            message[name] = getattr(self, name)
+        return message
+
+    def __repr__(self):
+        return type(self).__name__ + '(' + repr(self.as_dict()) + ')'
+
+    @property
+    def datetime(self):
+        return format_datetime(self.timestamp)
+
+    @property
+    def producer(self):
+        return device(self.id).producer
+
+    @property
+    def model(self):
+        return device(self.id).model
+
+    @property
+    def hardware_version(self):
+        return device(self.id).hardware_version
+
+    @property
+    def software_version(self):
+        return device(self.id).software_version
+
+    @property
+    def battery_level(self):
+        return device(self.id).battery_level
+
+
+class LecturaDeTemperatura(Lectura):
+    __slots__ = ('body_temperature',)
+    vital = 'body_temperature'
+    campos = ('body_temperature',)
+
+    def __init__(self, id, timestamp, body_temperature):
+        self.id = id
+        self.timestamp = timestamp
+        self.body_temperature = body_temperature
+
+
+class LecturaDeRitmoCardiaco(Lectura):
+    __slots__ = ('heart_rate',)
+    vital = 'heart_rate'
+    campos = ('heart_rate',)
+
+    def __init__(self, id, timestamp, heart_rate):
+        self.id = id
+        self.timestamp = timestamp
+        self.heart_rate = heart_rate
+
+
+class LecturaDePresion(Lectura):
+    __slots__ = ('blood_preasure',)
+    vital = 'blood_preasure'
+    campos = ('blood_preasure',)
+
+    def __init__(self, id, timestamp, blood_preasure):
+        self.id = id
+        self.timestamp = timestamp
+        self.blood_preasure = blood_preasure
+
+
+class LecturaDePosicion(Lectura):
+    __slots__ = ('x_position', 'y_position', 'z_position')
+    vital = 'positions'
+    campos = ('x_position', 'y_position', 'z_position')
+
+    def __init__(self, id, timestamp, x_position, y_position, z_position):
+        self.id = id
+        self.timestamp = timestamp
+        self.x_position = x_position
+        self.y_position = y_position
+        self.z_position = z_position
+
+
+class LecturaDeMedicamento(Lectura):
+    __slots__ = ('dose', 'hour', 'medicine', 'first_intake')
+    vital = 'medicine'
+    campos = ('dose', 'hour', 'medicine', 'first_intake')
+
+    def __init__(self, id, timestamp, dose, hour, medicine, first_intake):
+        self.id = id
+        self.timestamp = timestamp
+        self.dose = dose
+        self.hour = hour
+        self.medicine = medicine
+        self.first_intake = first_intake
+
+
+LECTURAS = dict((cls.vital, cls) for cls in (LecturaDeTemperatura, LecturaDeRitmoCardiaco,
+                                             LecturaDePresion, LecturaDePosicion,
+                                             LecturaDeMedicamento))
+
+
+def from_dict(message):
+    # El primer campo de cada signo vital sólo aparece en sus lecturas
+    for cls in LECTURAS.values():
+        if cls.campos[0] in message:
+            return cls(message['id'], message['timestamp'], *[message[name] for name in cls.campos])
+    raise ValueError('El mensaje no tiene los campos de ningún signo vital')
@@ -0,0 +1,359 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#-------------------------------------------------------------------------
+# Archivo: metricas.py
+# Capitulo: 3 Estilo Publica-Subscribe
+# Autor(es): Perla Velasco & Yonathan Mtz.
+# Version: 1.0.0 Octubre 2026
+# Descripción:
+#
+#   Éste módulo lleva las métricas de los publicadores y suscriptores (contadores, histogramas
+#   y medidores) y las publica en el formato de texto de Prometheus en un endpoint HTTP local.
+#
+#   Las características de éste módulo son las siguientes:
+#
+#                                           metricas.py
+#           +-----------------------+-------------------------+------------------------+
+#           |  Nombre del elemento  |     Responsabilidad     |      Propiedades       |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Contar eventos, por  |  - Cada hilo incrementa|
+#           |      Contador e       |    ejemplo mensajes     |    sus propias celdas, |
+#           |      Histograma       |    procesados.          |    sin candados.       |
+#           |                       |  - Repartir duraciones  |  - Las celdas de todos |
+#           |                       |    en cubetas.          |    los hilos se suman  |
+#           |                       |                         |    al consultar.       |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Indicar un valor ac- |  - Un valor o una fun- |
+#           |        Medidor        |    tual, por ejemplo    |    ción que se evalúa  |
+#           |                       |    mensajes en la cola. |    al consultar.       |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Guardar las métricas |  - GET /metrics en     |
+#           |     Registro de       |    del proceso.         |    127.0.0.1:<puerto>. |
+#           |      Métricas         |  - Escribirlas en el    |                        |
+#           |                       |    formato de Prometheus|                        |
+#           +-----------------------+-------------------------+------------------------+
+#
+#   A continuación se describen los métodos que se implementaron en éste módulo:
+#
+#                                               Métodos:
+#           +------------------------+--------------------------+-----------------------+
+#           |         Nombre         |        Parámetros        |        Función        |
+#           +------------------------+--------------------------+-----------------------+
+#           |        labels()        |  - values: valores de las|  - Regresa la métrica |
+#           |                        |     etiquetas.           |    de esas etiquetas. |
+#           +------------------------+--------------------------+-----------------------+
+#           |         inc()          |  - amount: incremento.   |  - Incrementa el con- |
+#           |                        |                          |    tador del hilo.    |
+#           +------------------------+--------------------------+-----------------------+
+#           |       observe()        |  - value: valor.         |  - Agrega el valor a  |
+#           |                        |                          |    su cubeta.         |
+#           +------------------------+--------------------------+-----------------------+
+#           |   set(), set_function()|  - value o function.     |  - Fija el valor del  |
+#           |                        |                          |    medidor.           |
+#           +------------------------+--------------------------+-----------------------+
+#           |        samples()       |          Ninguno         |  - Regresa los valores|
+#           |                        |                          |    sumados de todos   |
+#           |                        |                          |    los hilos.         |
+#           +------------------------+--------------------------+-----------------------+
+#           |        items()         |          Ninguno         |  - Copia las métricas |
+#           |                        |                          |    de cada etiqueta   |
+#           |                        |                          |    con el candado.    |
+#           +------------------------+--------------------------+-----------------------+
+#           |  counter(), histogram()|  - name: nombre.         |  - Regresan la métrica|
+#           |        gauge()         |  - help: descripción.    |    del registro, la   |
+#           |                        |  - labelnames: etiquetas.|    crean si no existe.|
+#           +------------------------+--------------------------+-----------------------+
+#           |       exposition()     |          Ninguno         |  - Regresa el texto de|
+#           |                        |                          |    todas las métricas.|
+#           +------------------------+--------------------------+-----------------------+
+#           |        serve()         |  - port: puerto.         |  - Inicia el endpoint |
+#           |                        |                          |    HTTP en un hilo.   |
+#           +------------------------+--------------------------+-----------------------+
+#
+#           Nota: incrementar un contador sólo suma en la lista del hilo actual, por lo que
+#           las métricas se pueden dejar activas en producción.
+#
+#-------------------------------------------------------------------------
+import bisect
+import http.server
+import socketserver
+import threading
+
+# Cubetas en segundos de los histogramas de duración, de 10 microsegundos a 10 segundos
+DURACIONES = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+              0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def format_labels(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(name + '="' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+                          for name, value in zip(names, values)) + '}'
+
+
+class Celdas:
+
+    def __init__(self, size):
+        self.size = size
+        self.local = threading.local()
+        # Celdas de cada hilo, se conservan al terminar el hilo para no perder sus cuentas
+        self.cells = []
+        self.lock = threading.Lock()
+
+    def cell(self):
+        try:
+            return self.local.cell
+        except AttributeError:
+            cell = [0] * self.size
+            with self.lock:
+                self.cells.append(cell)
+            self.local.cell = cell
+            return cell
+
+    def sum(self):
+        with self.lock:
+            cells = list(self.cells)
+        total = [0] * self.size
+        for cell in cells:
+            for x in range(0, self.size):
+                total[x] += cell[x]
+        return total
+
+
+class ContadorHijo(Celdas):
+
+    def __init__(self):
+        Celdas.__init__(self, 1)
+
+    def inc(self, amount=1):
+        try:
+            self.local.cell[0] += amount
+        except AttributeError:
+            self.cell()[0] += amount
+
+    def value(self):
+        return self.sum()[0]
+
+
+class HistogramaHijo(Celdas):
+
+    def __init__(self, buckets):
+        # Una celda por cubeta más la de +Inf, la suma y el número de observaciones
+        Celdas.__init__(self, len(buckets) + 3)
+        self.buckets = buckets
+
+    def observe(self, value):
+        try:
+            cell = self.local.cell
+        except AttributeError:
+            cell = self.cell()
+        cell[bisect.bisect_left(self.buckets, value)] += 1
+        cell[-2] += value
+        cell[-1] += 1
+
+    def values(self):
+        return self.sum()
+
+
+class MedidorHijo:
+
+    def __init__(self):
+        self.current = 0
+        self.function = None
+
+    def set(self, value):
+        self.current = value
+
+    def inc(self, amount=1):
+        self.current += amount
+
+    def set_function(self, function):
+        self.function = function
+
+    def value(self):
+        return self.function() if self.function is not None else self.current
+
+
+class Metrica:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.children = {}
+        self.lock = threading.Lock()
+        if not self.labelnames:
+            # Las métricas sin etiquetas aparecen desde el inicio aunque no se usen
+            self.labels()
+
+    def labels(self, *values):
+        child = self.children.get(values)
+        if child is None:
+            with self.lock:
+                child = self.children.get(values)
+                if child is None:
+                    child = self.children[values] = self.new_child()
+        return child
+
+    def items(self):
+        # Los hilos de trabajo agregan etiquetas mientras se consulta, se copia con el candado
+        with self.lock:
+            return sorted(self.children.items())
+
+    def new_child(self):
+        raise NotImplementedError
+
+    def samples(self):
+        raise NotImplementedError
+
+    def exposition(self):
+        lines = ['# HELP ' + self.name + ' ' + self.help, '# TYPE ' + self.name + ' ' + self.kind]
+        for name, labelnames, values, value in self.samples():
+            lines.append(name + format_labels(labelnames, values) + ' ' + format_value(value))
+        return '\n'.join(lines)
+
+
+class Contador(Metrica):
+    kind = 'counter'
+
+    def new_child(self):
+        return ContadorHijo()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def samples(self):
+        return [(self.name, self.labelnames, values, child.value())
+                for values, child in self.items()]
+
+
+class Histograma(Metrica):
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DURACIONES):
+        Metrica.__init__(self, name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def new_child(self):
+        return HistogramaHijo(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def samples(self):
+        result = []
+        names = self.labelnames + ('le',)
+        for values, child in self.items():
+            counts = child.values()
+            cumulative = 0
+            # Las cubetas de Prometheus son acumulativas
+            for x in range(0, len(self.buckets) + 1):
+                cumulative += counts[x]
+                bound = self.buckets[x] if x < len(self.buckets) else float('inf')
+                result.append((self.name + '_bucket', names, values + (format_value(bound),),
+                               cumulative))
+            result.append((self.name + '_sum', self.labelnames, values, counts[-2]))
+            result.append((self.name + '_count', self.labelnames, values, counts[-1]))
+        return result
+
+
+class Medidor(Metrica):
+    kind = 'gauge'
+
+    def new_child(self):
+        return MedidorHijo()
+
+    def set(self, value):
+        self.labels().set(value)
+
+    def set_function(self, function):
+        self.labels().set_function(function)
+
+    def samples(self):
+        result = []
+        for values, child in self.items():
+            try:
+                result.append((self.name, self.labelnames, values, child.value()))
+            except Exception:
+                # Un medidor que no se puede evaluar no impide leer los demás
+                continue
+        return result
+
+
+class Servidor(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    # http.server.ThreadingHTTPServer no existe en Python 3.6
+    daemon_threads = True
+
+
+class RegistroDeMetricas:
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+        self.server = None
+
+    def get(self, cls, name, help, labelnames=(), **kwargs):
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, help, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError('La métrica ' + name + ' ya existe con otro tipo o etiquetas')
+            return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self.get(Contador, name, help, labelnames)
+
+    def histogram(self, name, help, labelnames=(), buckets=DURACIONES):
+        return self.get(Histograma, name, help, labelnames, buckets=buckets)
+
+    def gauge(self, name, help, labelnames=()):
+        return self.get(Medidor, name, help, labelnames)
+
+    def exposition(self):
+        with self.lock:
+            metrics = sorted(self.metrics.items())
+        return '\n'.join(metric.exposition() for name, metric in metrics) + '\n'
+
+    def serve(self, port, host='127.0.0.1'):
+        if self.server is not None:
+            return self.server
+        registry = self
+
+        class Manejador(http.server.BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                body = registry.exposition().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Las consultas no se imprimen junto a las alertas
+                pass
+
+        self.server = Servidor((host, port), Manejador)
+        thread = threading.Thread(target=self.server.serve_forever, name='metricas')
+        thread.daemon = True
+        thread.start()
+        return self.server
+
+
+# Registro de las métricas del proceso
+REGISTRO = RegistroDeMetricas()
+counter = REGISTRO.counter
+histogram = REGISTRO.histogram
+gauge = REGISTRO.gauge
+serve = REGISTRO.serve
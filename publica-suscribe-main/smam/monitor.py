@@ -15,8 +15,13 @@
 #           +-----------------------+-------------------------+------------------------+
 #           |  Nombre del elemento  |     Responsabilidad     |      Propiedades       |
 #           +-----------------------+-------------------------+------------------------+
-#           |        Monitor        |  - Mostrar datos a los  |         Ninguna        |
-#           |                       |    usuarios finales.    |                        |
+#           |        Monitor        |  - Mostrar datos a los  |  - Si se asigna un sink|
+#           |                       |    usuarios finales.    |    las notificaciones  |
+#           |                       |                         |    se escriben a tra-  |
+#           |                       |                         |    vés de él.          |
+#           |                       |                         |  - Busca el modelo del |
+#           |                       |                         |    wearable por id si  |
+#           |                       |                         |    no se indica.       |
 #           +-----------------------+-------------------------+------------------------+
 #
 #   A continuación se describen los métodos que se implementaron en ésta clase:
@@ -51,36 +56,101 @@
 #           |                        |      valo de los medica- |                       |
 #           |                        |      mentos              |                       |
 #           +------------------------+--------------------------+-----------------------+
+#           |print_correlation_noti- |  - datetime: fecha del   |  - Imprime la emergen-|
+#           |      fication()        |     segundo evento.      |    cia que encuentra  |
+#           |                        |  - id: identificador del |    la correlación de  |
+#           |                        |     dispositivo.         |    eventos.           |
+#           |                        |  - description: patrón.  |                       |
+#           |                        |  - elapsed: segundos en- |                       |
+#           |                        |     tre los eventos.     |                       |
+#           |                        |  - model: modelo, None   |                       |
+#           |                        |     para buscarlo.       |                       |
+#           +------------------------+--------------------------+-----------------------+
+#           |        emit()          |  - id, name_param, value,|  - Envía la notifica- |
+#           |                        |     datetime, model: da- |    ción al sink o la  |
+#           |                        |     tos de la alerta.    |    imprime y la cuenta|
+#           |                        |                          |    en las métricas.   |
+#           +------------------------+--------------------------+-----------------------+
+#           |     device_model()     |  - id: identificador del |  - Regresa el modelo  |
+#           |                        |     dispositivo.         |    del wearable en el |
+#           |                        |  - model: modelo indica- |    registro de dispo- |
+#           |                        |     do, None para bus-   |    sitivos si no se   |
+#           |                        |     carlo.               |    indica.            |
+#           |                        |  - text: notificación.   |                       |
+#           +------------------------+--------------------------+-----------------------+
 #           |   format_datetime()    |  - datetime: fecha que se|  - Formatea la fecha  |
 #           |                        |     formateará.          |    en que se recibió  |
-#           |                        |                          |    el mensaje.        |
+#           |                        |                          |    el mensaje, una vez|
+#           |                        |                          |    por minuto.        |
 #           +------------------------+--------------------------+-----------------------+
 #
 #-------------------------------------------------------------------------
+import lecturas
+import metricas
+
+ALERTAS = metricas.counter('smam_alertas_total', 'Alertas que recibe el monitor por parámetro',
+                           ('parametro', 'resultado'))
 
 
 class Monitor:
+    # Sumidero de alertas compartido por todos los monitores del proceso
+    sink = None
+    # Fechas ya formateadas por minuto
+    formatted = {}
 
-    def print_notification(self, datetime, id, value, name_param, model):
-        print("  ---------------------------------------------------")
-        print("    ADVERTENCIA")
-        print("  ---------------------------------------------------")
-        print("    Se ha detectado un incremento de " + str(name_param) + " (" + str(value) + ")" + " a las " + str(self.format_datetime(datetime)) + " en el adulto mayor que utiliza el dispositivo " + str(model) + ":" + str(id))
-        print("")
-        print("")
+    def print_notification(self, datetime, id, value, name_param, model=None):
+        model = self.device_model(id, model)
+        # La notificación se imprime de una sola vez para que no se mezcle con la de otros hilos
+        self.emit(id, name_param, value, datetime, model,
+              "  ---------------------------------------------------\n"
+              "    ADVERTENCIA\n"
+              "  ---------------------------------------------------\n"
+              "    Se ha detectado un incremento de " + str(name_param) + " (" + str(value) + ")" + " a las " + str(self.format_datetime(datetime)) + " en el adulto mayor que utiliza el dispositivo " + str(model) + ":" + str(id) + "\n"
+              "\n")
 
     def print_med_notification(self, datetime, id, dose, name_param, model, hours):
-        print("  ---------------------------------------------------")
-        print("    ADVERTENCIA")
-        print("  ---------------------------------------------------")
-        print("    Se debe dar medicamento " + str(name_param) + " (" + str(dose) + " tabletas) por ingesta cada " +str(hours) + " horas. A las " + str(self.format_datetime(datetime)) + " al adulto mayor que utiliza el dispositivo " + str(model) + ":" + str(id))
-        print("")
-        print("")
+        model = self.device_model(id, model)
+        self.emit(id, name_param, dose, datetime, model,
+              "  ---------------------------------------------------\n"
+              "    ADVERTENCIA\n"
+              "  ---------------------------------------------------\n"
+              "    Se debe dar medicamento " + str(name_param) + " (" + str(dose) + " tabletas) por ingesta cada " +str(hours) + " horas. A las " + str(self.format_datetime(datetime)) + " al adulto mayor que utiliza el dispositivo " + str(model) + ":" + str(id) + "\n"
+              "\n")
+
+    def print_correlation_notification(self, datetime, id, description, elapsed, model=None):
+        model = self.device_model(id, model)
+        self.emit(id, 'emergencia', round(elapsed, 1), datetime, model,
+              "  ---------------------------------------------------\n"
+              "    EMERGENCIA\n"
+              "  ---------------------------------------------------\n"
+              "    Se ha detectado " + str(description) + " (" + str(round(elapsed, 1)) + " segundos entre ambos)" + " a las " + str(self.format_datetime(datetime)) + " en el adulto mayor que utiliza el dispositivo " + str(model) + ":" + str(id) + "\n"
+              "\n")
+
+    def emit(self, id, name_param, value, datetime, model, text):
+        if Monitor.sink is None:
+            print(text)
+            ALERTAS.labels(name_param, 'emitida').inc()
+        elif Monitor.sink.notify(id, name_param, value, self.format_datetime(datetime), model, text):
+            ALERTAS.labels(name_param, 'emitida').inc()
+        else:
+            # El sumidero la omite por repetirse durante el enfriamiento
+            ALERTAS.labels(name_param, 'omitida').inc()
 
+    def device_model(self, id, model):
+        # Las lecturas no llevan el modelo, se busca por id en la cache del registro
+        if model is None:
+            return lecturas.device(int(id)).model
+        return model
 
     def format_datetime(self, datetime):
-        values_datetime = datetime.split(':')
-        f_datetime = values_datetime[3] + ":" + values_datetime[4] + " del " + \
-            values_datetime[0] + "/" + \
-            values_datetime[1] + "/" + values_datetime[2]
+        # La fecha formateada sólo depende del minuto, los segundos no se muestran
+        f_datetime = Monitor.formatted.get(datetime[:16])
+        if f_datetime is None:
+            values_datetime = datetime.split(':')
+            f_datetime = values_datetime[3] + ":" + values_datetime[4] + " del " + \
+                values_datetime[0] + "/" + \
+                values_datetime[1] + "/" + values_datetime[2]
+            if len(Monitor.formatted) > 1440:
+                Monitor.formatted.clear()
+            Monitor.formatted[datetime[:16]] = f_datetime
         return f_datetime
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#-------------------------------------------------------------------------
+# Archivo: fitbit_charge.py
+# Capitulo: 3 Patrón Publica-Subscribe
+# Autor(es): Perla Velasco & Yonathan Mtz.
+# Version: 1.0.0 Octubre 2026
+# Descripción:
+#
+#   Ésta clase define otro modelo de wearable que publica los mismos signos vitales que el
+#   Xiaomi My Band. Sus datos se envían en su registro, por lo que sus lecturas ocupan lo mismo.
+#
+#   Las características de ésta clase son las siguientes:
+#
+#                                       fitbit_charge.py
+#           +-----------------------+-------------------------+------------------------+
+#           |  Nombre del elemento  |     Responsabilidad     |      Propiedades       |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Enviar mensajes      |  - Simula información  |
+#           |      Publicador       |                         |    sobre algunos signos|
+#           |                       |                         |    vitales.            |
+#           |                       |                         |  - Fabricante, modelo y|
+#           |                       |                         |    versiones propios.  |
+#           +-----------------------+-------------------------+------------------------+
+#
+#   A continuación se describen los métodos que se implementaron en ésta clase:
+#
+#                                             Métodos:
+#           +-----------------------------+--------------------------+-----------------------+
+#           |         Nombre              |        Parámetros        |        Función        |
+#           +-----------------------------+--------------------------+-----------------------+
+#           |                             |          Ninguno         |  - Simula el ritmo    |
+#           |    simulate_heart_rate()    |                          |    cardiaco, medido en|
+#           |                             |                          |    intervalos de 5.   |
+#           +-----------------------------+--------------------------+-----------------------+
+#
+#           Nota: los demás métodos son los de XiaomiMyBand.
+#
+#-------------------------------------------------------------------------
+import random
+from xiaomi_my_band import XiaomiMyBand
+
+
+class FitbitCharge(XiaomiMyBand):
+    producer = "Fitbit"
+    model = "Fitbit Charge 4"
+    hardware_version = "1.4.0"
+    software_version = "1.101.23"
+    battery_level = 64
+
+    def simulate_heart_rate(self):
+        return random.randrange(60, 155, 5)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#-------------------------------------------------------------------------
+# Archivo: pool_de_conexiones.py
+# Capitulo: 3 Patrón Publica-Subscribe
+# Autor(es): Perla Velasco & Yonathan Mtz.
+# Version: 1.0.0 Octubre 2026
+# Descripción:
+#
+#   Ésta clase mantiene un conjunto de conexiones persistentes con el distribuidor de mensajes
+#   que comparten todos los publicadores de un simulador.
+#
+#   Las características de ésta clase son las siguientes:
+#
+#                                     pool_de_conexiones.py
+#           +-----------------------+-------------------------+------------------------+
+#           |  Nombre del elemento  |     Responsabilidad     |      Propiedades       |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Reutilizar las cone- |  - Declara las colas   |
+#           |       Pool de         |    xiones y canales con |    una sola vez al     |
+#           |      Conexiones       |    el distribuidor de   |    establecer cada co- |
+#           |                       |    mensajes.            |    nexión.             |
+#           |                       |                         |  - Se reconecta cuando |
+#           |                       |                         |    el distribuidor     |
+#           |                       |                         |    cierra la conexión. |
+#           +-----------------------+-------------------------+------------------------+
+#
+#   A continuación se describen los métodos que se implementaron en ésta clase:
+#
+#                                             Métodos:
+#           +-----------------------------+--------------------------+-----------------------+
+#           |         Nombre              |        Parámetros        |        Función        |
+#           +-----------------------------+--------------------------+-----------------------+
+#           |                             |  - host: dirección del   |  - Abre las conexiones|
+#           |       __init__()            |     distribuidor.        |    y declara las colas|
+#           |                             |  - size: número de cone- |    de los signos vita-|
+#           |                             |     xiones.              |    les.               |
+#           |                             |  - queues: colas a de-   |                       |
+#           |                             |     clarar.              |                       |
+#           |                             |  - retries: reintentos   |                       |
+#           |                             |     por publicación.     |                       |
+#           |                             |  - exchange: exchange de |                       |
+#           |                             |     tipo topic, '' para  |                       |
+#           |                             |     publicar directo en  |                       |
+#           |                             |     las colas.           |                       |
+#           +-----------------------------+--------------------------+-----------------------+
+#           |                             |  - routing_key: cola o   |  - Publica un mensaje |
+#           |        publish()            |     routing key destino. |    usando una conexión|
+#           |                             |  - body: mensaje.        |    del pool y se re-  |
+#           |                             |  - properties: propieda- |    conecta si es nece-|
+#           |                             |     des del mensaje.     |    sario.             |
+#           +-----------------------------+--------------------------+-----------------------+
+#           |        shared()             |          Ninguno         |  - Regresa el pool    |
+#           |                             |                          |    compartido por omi-|
+#           |                             |                          |    sión.              |
+#           +-----------------------------+--------------------------+-----------------------+
+#           |        connect()            |          Ninguno         |  - Abre una conexión, |
+#           |                             |                          |    su canal y declara |
+#           |                             |                          |    las colas o el ex- |
+#           |                             |                          |    change.            |
+#           +-----------------------------+--------------------------+-----------------------+
+#           |         close()             |          Ninguno         |  - Cierra todas las   |
+#           |                             |                          |    conexiones.        |
+#           +-----------------------------+--------------------------+-----------------------+
+#
+#-------------------------------------------------------------------------
+import pika
+import pika.exceptions
+import queue
+import time
+import topologia
+import transporte
+
+# Colas en las que los wearables publican sus signos vitales
+SIGNOS_VITALES = ('body_temperature', 'heart_rate', 'blood_preasure', 'positions', 'medicine')
+# Colas que declaran los publicadores: los signos vitales y la de los registros de los wearables
+COLAS = SIGNOS_VITALES + (topologia.DISPOSITIVOS,)
+
+# Errores tras los cuales la conexión ya no es utilizable y hay que abrir otra
+ERRORES_DE_CONEXION = (pika.exceptions.AMQPConnectionError, pika.exceptions.AMQPChannelError,
+                       pika.exceptions.ConnectionWrongStateError, pika.exceptions.ChannelWrongStateError)
+
+PERSISTENTE = pika.BasicProperties(delivery_mode=2)
+PROPIEDADES = {}
+
+
+def persistent(content_type):
+    # Propiedades de un mensaje persistente cuyo formato se indica en content_type
+    if content_type not in PROPIEDADES:
+        PROPIEDADES[content_type] = pika.BasicProperties(delivery_mode=2, content_type=content_type)
+    return PROPIEDADES[content_type]
+
+
+class PoolDeConexiones:
+    compartido = None
+
+    def __init__(self, host='localhost', size=1, queues=COLAS, retries=3, exchange=''):
+        self.host = host
+        self.exchange = exchange
+        # Con un exchange las colas las declaran los suscriptores
+        self.queues = () if exchange else queues
+        self.retries = retries
+        self.size = size
+        self.available = queue.Queue()
+        # Las conexiones se abren al inicio para declarar las colas una sola vez
+        for x in range(0, size):
+            self.available.put(self.connect())
+
+    @classmethod
+    def shared(cls):
+        # Pool utilizado por los wearables que se crean sin indicar uno
+        if cls.compartido is None:
+            cls.compartido = cls()
+        return cls.compartido
+
+    def connect(self):
+        # Se establece la conexión con el Distribuidor de Mensajes (RabbitMQ o en memoria)
+        connection = transporte.connect(self.host)
+        # Se solicita un canal por el cuál se enviarán los signos vitales
+        channel = connection.channel()
+        if self.exchange:
+            channel.exchange_declare(exchange=self.exchange, exchange_type='topic', durable=True)
+        # Se declaran las colas para persistir los mensajes enviados
+        for q in self.queues:
+            channel.queue_declare(queue=q, durable=True)
+        return connection, channel
+
+    def publish(self, routing_key, body, properties=PERSISTENTE):
+        connection, channel = self.available.get()
+        try:
+            for attempt in range(0, self.retries + 1):
+                try:
+                    if connection is None:
+                        connection, channel = self.connect()
+                    channel.basic_publish(exchange=self.exchange, routing_key=routing_key, body=body,
+                                          properties=properties)
+                    return
+                except ERRORES_DE_CONEXION:
+                    # El distribuidor cerró la conexión, se descarta y se abre una nueva
+                    self.close_connection(connection)
+                    connection, channel = None, None
+                    if attempt == self.retries:
+                        raise
+                    time.sleep(0.5 * (attempt + 1))
+        finally:
+            self.available.put((connection, channel))
+
+    def close_connection(self, connection):
+        if connection is None or connection.is_closed:
+            return
+        try:
+            connection.close()
+        except ERRORES_DE_CONEXION:
+            pass
+
+    def close(self):
+        # Los lugares del pool quedan vacíos y se reconectan si se vuelve a publicar
+        for x in range(0, self.size):
+            connection, channel = self.available.get()
+            self.close_connection(connection)
+            self.available.put((None, None))
@@ -0,0 +1,252 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#-------------------------------------------------------------------------
+# Archivo: publicador_con_respaldo.py
+# Capitulo: 3 Patrón Publica-Subscribe
+# Autor(es): Perla Velasco & Yonathan Mtz.
+# Version: 1.0.0 Octubre 2026
+# Descripción:
+#
+#   Ésta clase guarda primero los signos vitales en un respaldo en disco y los envía al
+#   distribuidor de mensajes desde un hilo propio, así los wearables no esperan al distribuidor
+#   y los mensajes no se pierden mientras el distribuidor se reinicia.
+#
+#   Las características de ésta clase son las siguientes:
+#
+#                                   publicador_con_respaldo.py
+#           +-----------------------+-------------------------+------------------------+
+#           |  Nombre del elemento  |     Responsabilidad     |      Propiedades       |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Guardar los mensajes |  - publish() sólo es-  |
+#           |     Publicador con    |    en el respaldo en    |    cribe en el archivo |
+#           |       Respaldo        |    disco.               |    proyectado en memo- |
+#           |                       |  - Enviar los mensajes  |    ria.                |
+#           |                       |    pendientes al dis-   |  - Un mensaje se libera|
+#           |                       |    tribuidor.           |    del respaldo hasta  |
+#           |                       |                         |    que el distribuidor |
+#           |                       |                         |    lo confirma.        |
+#           |                       |                         |  - Si hay demasiados   |
+#           |                       |                         |    mensajes sin confir-|
+#           |                       |                         |    mar se deja de leer |
+#           |                       |                         |    el respaldo.        |
+#           |                       |                         |  - Al iniciar se envían|
+#           |                       |                         |    los mensajes que    |
+#           |                       |                         |    quedaron pendientes.|
+#           +-----------------------+-------------------------+------------------------+
+#
+#   A continuación se describen los métodos que se implementaron en ésta clase:
+#
+#                                             Métodos:
+#           +-----------------------------+--------------------------+-----------------------+
+#           |         Nombre              |        Parámetros        |        Función        |
+#           +-----------------------------+--------------------------+-----------------------+
+#           |                             |  - path: archivo del res-|  - Abre el respaldo e |
+#           |       __init__()            |     paldo.               |    inicia el hilo que |
+#           |                             |  - capacity: bytes del   |    lo envía al distri-|
+#           |                             |     respaldo.            |    buidor.            |
+#           |                             |  - host: dirección del   |                       |
+#           |                             |     distribuidor.        |                       |
+#           |                             |  - exchange: exchange de |                       |
+#           |                             |     tipo topic, '' para  |                       |
+#           |                             |     publicar directo en  |                       |
+#           |                             |     las colas.           |                       |
+#           |                             |  - batch_size: mensajes  |                       |
+#           |                             |     por lote.            |                       |
+#           |                             |  - linger: segundos máxi-|                       |
+#           |                             |     mos de espera de un  |                       |
+#           |                             |     lote.                |                       |
+#           |                             |  - max_outstanding: men- |                       |
+#           |                             |     sajes sin confirmar  |                       |
+#           |                             |     permitidos.          |                       |
+#           |                             |  - flush_interval: segun-|                       |
+#           |                             |     dos entre escrituras |                       |
+#           |                             |     a disco.             |                       |
+#           +-----------------------------+--------------------------+-----------------------+
+#           |                             |  - routing_key: cola o   |  - Guarda el mensaje  |
+#           |        publish()            |     routing key destino. |    en el respaldo.    |
+#           |                             |  - body: mensaje.        |  - Lanza ValueError si|
+#           |                             |  - properties: propieda- |    el mensaje es mayor|
+#           |                             |     des del mensaje.     |    que el respaldo.   |
+#           |                             |  - block: esperar si el  |                       |
+#           |                             |     respaldo está lleno. |                       |
+#           +-----------------------------+--------------------------+-----------------------+
+#           |          run()              |          Ninguno         |  - Lee los mensajes   |
+#           |                             |                          |    pendientes del res-|
+#           |                             |                          |    paldo y los envía. |
+#           +-----------------------------+--------------------------+-----------------------+
+#           |        connect()            |          Ninguno         |  - Se conecta con el  |
+#           |                             |                          |    distribuidor si aún|
+#           |                             |                          |    no lo está.        |
+#           +-----------------------------+--------------------------+-----------------------+
+#           |          send()             |  - records: registros    |  - Envía los registros|
+#           |                             |     leídos del respaldo. |    al distribuidor.   |
+#           +-----------------------------+--------------------------+-----------------------+
+#           |      on_confirmed()         |  - token: posición del   |  - Libera del respaldo|
+#           |                             |     registro confirmado. |    los registros con- |
+#           |                             |                          |    firmados.          |
+#           +-----------------------------+--------------------------+-----------------------+
+#           |         close()             |  - timeout: segundos     |  - Espera a que se    |
+#           |                             |     para vaciar el res-  |    confirmen los men- |
+#           |                             |     paldo.               |    sajes y cierra.    |
+#           +-----------------------------+--------------------------+-----------------------+
+#
+#           Nota: los mensajes se envían al menos una vez, un mensaje enviado antes de que el
+#           publicador se detenga de forma inesperada se vuelve a enviar al iniciar.
+#
+#-------------------------------------------------------------------------
+import collections
+import struct
+import threading
+import time
+from pool_de_conexiones import PERSISTENTE, persistent
+from publicador_por_lotes import PublicadorPorLotes
+from respaldo_en_disco import RespaldoEnDisco
+
+# Longitud de la routing key y del content_type al inicio de cada registro
+ENCABEZADO = struct.Struct('<HH')
+
+
+class PublicadorConRespaldo:
+
+    def __init__(self, path='respaldo.smam', capacity=64 * 1024 * 1024, host='localhost',
+                 exchange='', batch_size=500, linger=0.01, max_outstanding=10000,
+                 flush_interval=1.0):
+        self.disk = RespaldoEnDisco(path, capacity)
+        self.host = host
+        self.exchange = exchange
+        self.batch_size = batch_size
+        self.linger = linger
+        self.max_outstanding = max_outstanding
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        # Los wearables esperan espacio en el respaldo y el hilo de envío espera mensajes
+        self.space = threading.Condition(self.lock)
+        self.data = threading.Condition(self.lock)
+        # Posición del siguiente registro por enviar, los anteriores esperan confirmación
+        self.cursor = self.disk.head
+        # Posición de cada registro enviado -> [posición del siguiente, confirmado]
+        self.inflight = collections.OrderedDict()
+        self.broker = None
+        self.closing = False
+        self.closed = False
+        self.deadline = None
+        self.published = 0
+        self.confirmed = 0
+        self.waits = 0
+        self.thread = threading.Thread(target=self.run, name='publicador-con-respaldo', daemon=True)
+        self.thread.start()
+
+    def publish(self, routing_key, body, properties=PERSISTENTE, block=True):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        key = routing_key.encode('utf-8')
+        content_type = (properties.content_type or '').encode('utf-8')
+        payload = ENCABEZADO.pack(len(key), len(content_type)) + key + content_type + body
+        with self.lock:
+            # append() lanza ValueError antes de esperar si el mensaje nunca cabría
+            while not self.disk.append(payload):
+                # El respaldo está lleno, con block=False se regresa False en lugar de esperar
+                if not block:
+                    return False
+                self.waits += 1
+                self.space.wait()
+            self.published += 1
+            self.data.notify()
+        return True
+
+    def run(self):
+        last_flush = time.time()
+        while True:
+            with self.lock:
+                if self.cursor == self.disk.tail:
+                    if not self.closing:
+                        self.data.wait(self.flush_interval)
+                    elif self.disk.used() != 0:
+                        # Todo se envió y faltan confirmaciones, se esperan sin ocupar el
+                        # procesador hasta que lleguen o se cumpla el plazo del cierre
+                        self.data.wait(max(0, min(self.flush_interval,
+                                                  self.deadline - time.time())))
+                if self.closing and (self.disk.used() == 0 or time.time() > self.deadline):
+                    break
+                records = []
+                position = self.cursor
+                while position < self.disk.tail and len(records) < self.batch_size:
+                    payload, end = self.disk.read(position)
+                    records.append((position, end, payload))
+                    position = end
+            if time.time() - last_flush >= self.flush_interval:
+                # Las páginas modificadas se escriben a disco sin detener a los wearables
+                self.disk.flush()
+                last_flush = time.time()
+            if not records:
+                continue
+            if self.connect():
+                self.send(records)
+            else:
+                time.sleep(1)
+
+    def connect(self):
+        if self.broker is None:
+            try:
+                self.broker = PublicadorPorLotes(self.host, self.batch_size, self.linger,
+                                                 max_outstanding=self.max_outstanding,
+                                                 exchange=self.exchange,
+                                                 callback=self.on_confirmed)
+            except RuntimeError:
+                # El distribuidor no está disponible, los mensajes siguen en el respaldo
+                return False
+        return True
+
+    def send(self, records):
+        for start, end, payload in records:
+            key_length, type_length = ENCABEZADO.unpack_from(payload)
+            offset = ENCABEZADO.size
+            routing_key = payload[offset:offset + key_length].decode('utf-8')
+            offset += key_length
+            content_type = payload[offset:offset + type_length].decode('utf-8')
+            body = payload[offset + type_length:]
+            with self.lock:
+                self.inflight[start] = [end, False]
+            # Con demasiados mensajes sin confirmar se deja de leer el respaldo
+            while not self.broker.publish(routing_key, body,
+                                          persistent(content_type) if content_type else PERSISTENTE,
+                                          block=False, token=start):
+                if self.closing and time.time() > self.deadline:
+                    with self.lock:
+                        del self.inflight[start]
+                    return
+                time.sleep(self.linger)
+            self.cursor = end
+
+    def on_confirmed(self, token):
+        with self.lock:
+            if self.closed or token not in self.inflight:
+                return
+            self.inflight[token][1] = True
+            self.confirmed += 1
+            # Se libera el prefijo de registros confirmados, aunque lleguen en otro orden
+            head = None
+            while self.inflight:
+                start, entry = next(iter(self.inflight.items()))
+                if not entry[1]:
+                    break
+                self.inflight.popitem(last=False)
+                head = entry[0]
+            if head is not None:
+                self.disk.commit(head)
+                self.space.notify_all()
+                # Al cerrar, el hilo de envío espera a que se vacíe el respaldo
+                self.data.notify()
+
+    def close(self, timeout=10):
+        with self.lock:
+            self.deadline = time.time() + timeout
+            self.closing = True
+            self.data.notify()
+        self.thread.join(timeout + 1)
+        if self.broker is not None:
+            self.broker.close(max(0, self.deadline - time.time()))
+        with self.lock:
+            # Los mensajes sin confirmar se quedan en el respaldo para la siguiente ejecución
+            self.closed = True
+            self.disk.close()
@@ -0,0 +1,258 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#-------------------------------------------------------------------------
+# Archivo: publicador_por_lotes.py
+# Capitulo: 3 Patrón Publica-Subscribe
+# Autor(es): Perla Velasco & Yonathan Mtz.
+# Version: 1.0.0 Octubre 2026
+# Descripción:
+#
+#   Ésta clase agrupa los signos vitales de muchos wearables y los envía en ráfagas al
+#   distribuidor de mensajes, esperando sus confirmaciones de forma asíncrona.
+#
+#   Las características de ésta clase son las siguientes:
+#
+#                                    publicador_por_lotes.py
+#           +-----------------------+-------------------------+------------------------+
+#           |  Nombre del elemento  |     Responsabilidad     |      Propiedades       |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Enviar los mensajes  |  - Envía un lote cuan- |
+#           |     Publicador por    |    en lotes.            |    do junta batch_size |
+#           |         Lotes         |  - Recibir las confir-  |    mensajes o pasan    |
+#           |                       |    maciones del distri- |    linger segundos.    |
+#           |                       |    buidor sin bloquear  |  - Reenvía los mensa-  |
+#           |                       |    a los wearables.     |    jes rechazados o no |
+#           |                       |                         |    confirmados.        |
+#           +-----------------------+-------------------------+------------------------+
+#
+#   A continuación se describen los métodos que se implementaron en ésta clase:
+#
+#                                             Métodos:
+#           +-----------------------------+--------------------------+-----------------------+
+#           |         Nombre              |        Parámetros        |        Función        |
+#           +-----------------------------+--------------------------+-----------------------+
+#           |                             |  - host: dirección del   |  - Inicia el hilo que |
+#           |       __init__()            |     distribuidor.        |    atiende la conexión|
+#           |                             |  - batch_size: mensajes  |    con el distribui-  |
+#           |                             |     por lote.            |    dor.               |
+#           |                             |  - linger: segundos máxi-|                       |
+#           |                             |     mos de espera de un  |                       |
+#           |                             |     lote incompleto.     |                       |
+#           |                             |  - max_outstanding: men- |                       |
+#           |                             |     sajes sin confirmar  |                       |
+#           |                             |     permitidos.          |                       |
+#           |                             |  - track_latency: regis- |                       |
+#           |                             |     tra la latencia de   |                       |
+#           |                             |     cada confirmación.   |                       |
+#           |                             |  - exchange: exchange de |                       |
+#           |                             |     tipo topic, '' para  |                       |
+#           |                             |     publicar directo en  |                       |
+#           |                             |     las colas.           |                       |
+#           |                             |  - callback: función que |                       |
+#           |                             |     recibe el token de   |                       |
+#           |                             |     cada mensaje confir- |                       |
+#           |                             |     mado.                |                       |
+#           +-----------------------------+--------------------------+-----------------------+
+#           |                             |  - routing_key: cola o   |  - Agrega un mensaje  |
+#           |        publish()            |     routing key destino. |    al lote en curso.  |
+#           |                             |  - body: mensaje.        |                       |
+#           |                             |  - properties: propieda- |                       |
+#           |                             |     des del mensaje.     |                       |
+#           |                             |  - block: esperar si hay |                       |
+#           |                             |     demasiados mensajes  |                       |
+#           |                             |     sin confirmar.       |                       |
+#           |                             |  - token: dato que se    |                       |
+#           |                             |     entrega a callback al|                       |
+#           |                             |     confirmar el mensaje.|                       |
+#           +-----------------------------+--------------------------+-----------------------+
+#           |         flush()             |          Ninguno         |  - Envía en una ráfa- |
+#           |                             |                          |    ga los mensajes    |
+#           |                             |                          |    pendientes.        |
+#           +-----------------------------+--------------------------+-----------------------+
+#           |       on_confirm()          |  - frame: confirmación   |  - Libera los mensajes|
+#           |                             |     del distribuidor.    |    confirmados y re-  |
+#           |                             |                          |    encola los recha-  |
+#           |                             |                          |    zados.             |
+#           +-----------------------------+--------------------------+-----------------------+
+#           |    on_channel_closed()      |  - channel, reason: pro- |  - Cierra la conexión |
+#           |                             |     pios de pika.        |    para reconectar si |
+#           |                             |                          |    el distribuidor    |
+#           |                             |                          |    cierra el canal.   |
+#           +-----------------------------+--------------------------+-----------------------+
+#           |         close()             |  - timeout: segundos     |  - Espera las confir- |
+#           |                             |     para vaciar el lote. |    maciones pendien-  |
+#           |                             |                          |    tes y cierra.      |
+#           +-----------------------------+--------------------------+-----------------------+
+#
+#           Nota: los métodos on_*() se ejecutan en el hilo de la conexión, que es el único
+#            que utiliza el canal; publish() puede llamarse desde cualquier hilo.
+#
+#-------------------------------------------------------------------------
+import array
+import collections
+import pika
+import threading
+import time
+import transporte
+from pool_de_conexiones import COLAS, PERSISTENTE
+
+
+class PublicadorPorLotes:
+
+    def __init__(self, host='localhost', batch_size=100, linger=0.05, queues=COLAS,
+                 max_outstanding=10000, timeout=10, track_latency=False, exchange='',
+                 callback=None):
+        self.host = host
+        self.exchange = exchange
+        self.callback = callback
+        # Con un exchange las colas las declaran los suscriptores
+        if exchange:
+            queues = ()
+        self.batch_size = batch_size
+        self.linger = linger
+        self.queues = queues
+        self.pending = collections.deque()
+        # delivery_tag -> mensaje enviado que aún no confirma el distribuidor
+        self.unconfirmed = collections.OrderedDict()
+        self.space = threading.BoundedSemaphore(max_outstanding)
+        self.ready = threading.Event()
+        self.stopped = threading.Event()
+        self.connection = None
+        self.channel = None
+        self.delivery_tag = 0
+        self.declared = 0
+        self.flush_scheduled = False
+        self.closing = False
+        self.deadline = None
+        self.confirmed = 0
+        self.nacked = 0
+        # Segundos desde publish() hasta la confirmación de cada mensaje
+        self.latencies = array.array('d') if track_latency else None
+        self.thread = threading.Thread(target=self.run, name='publicador-por-lotes', daemon=True)
+        self.thread.start()
+        if not self.ready.wait(timeout):
+            self.closing = True
+            raise RuntimeError('No fue posible conectarse al distribuidor de mensajes en ' + host)
+
+    def run(self):
+        # Se reconecta mientras no se solicite el cierre del publicador
+        while not self.closing:
+            # El flush programado en la conexión anterior ya no se ejecutará
+            self.flush_scheduled = False
+            self.connection = transporte.connect_async(self.host, self.on_connection_open,
+                                                       self.on_connection_error,
+                                                       self.on_connection_closed)
+            self.connection.ioloop.start()
+            if not self.closing:
+                time.sleep(1)
+        self.stopped.set()
+
+    def publish(self, routing_key, body, properties=PERSISTENTE, block=True, token=None):
+        # Se bloquea únicamente si hay demasiados mensajes sin confirmar, con block=False
+        # se regresa False en lugar de bloquear
+        if not self.space.acquire(block):
+            return False
+        self.pending.append((routing_key, body, properties, time.perf_counter(), token))
+        if len(self.pending) >= self.batch_size and not self.flush_scheduled:
+            self.flush_scheduled = True
+            self.connection.ioloop.add_callback_threadsafe(self.flush)
+        return True
+
+    def flush(self):
+        self.flush_scheduled = False
+        if self.channel is None or not self.channel.is_open:
+            return
+        # Los mensajes se envían en ráfaga, sin esperar confirmación uno por uno
+        while self.pending:
+            message = self.pending.popleft()
+            routing_key, body, properties, published, token = message
+            self.channel.basic_publish(exchange=self.exchange, routing_key=routing_key, body=body,
+                                       properties=properties)
+            self.delivery_tag += 1
+            self.unconfirmed[self.delivery_tag] = message
+
+    def on_connection_open(self, connection):
+        connection.channel(on_open_callback=self.on_channel_open)
+
+    def on_connection_error(self, connection, error):
+        connection.ioloop.stop()
+
+    def on_connection_closed(self, connection, reason):
+        self.channel = None
+        # Los mensajes sin confirmar se vuelven a enviar en la siguiente conexión
+        while self.unconfirmed:
+            tag, message = self.unconfirmed.popitem()
+            self.pending.appendleft(message)
+        connection.ioloop.stop()
+
+    def on_channel_open(self, channel):
+        channel.add_on_close_callback(self.on_channel_closed)
+        self.declared = 0
+        if self.exchange:
+            channel.exchange_declare(exchange=self.exchange, exchange_type='topic', durable=True,
+                                     callback=lambda frame: self.on_declared(channel))
+        for q in self.queues:
+            channel.queue_declare(queue=q, durable=True,
+                                  callback=lambda frame, channel=channel: self.on_declared(channel))
+
+    def on_channel_closed(self, channel, reason):
+        # El distribuidor puede cerrar sólo el canal (por ejemplo con un error 404 o 406); se
+        # cierra también la conexión para reconectar y reenviar los mensajes sin confirmar
+        self.channel = None
+        if self.connection.is_open:
+            self.connection.close()
+
+    def on_declared(self, channel):
+        self.declared += 1
+        if self.declared == len(self.queues) + (1 if self.exchange else 0):
+            channel.confirm_delivery(self.on_confirm, callback=lambda frame: self.on_confirm_ok(channel))
+
+    def on_confirm_ok(self, channel):
+        self.channel = channel
+        self.delivery_tag = 0
+        self.ready.set()
+        self.flush()
+        self.connection.ioloop.call_later(self.linger, self.on_linger)
+
+    def on_linger(self):
+        if self.channel is None:
+            return
+        self.flush()
+        if self.closing and not self.unconfirmed and not self.pending:
+            self.connection.close()
+        elif self.closing and time.time() > self.deadline:
+            self.connection.close()
+        else:
+            self.connection.ioloop.call_later(self.linger, self.on_linger)
+
+    def on_confirm(self, frame):
+        method = frame.method
+        ack = isinstance(method, pika.spec.Basic.Ack)
+        if method.multiple:
+            # Se confirman todos los mensajes hasta delivery_tag
+            while self.unconfirmed and next(iter(self.unconfirmed)) <= method.delivery_tag:
+                tag, message = self.unconfirmed.popitem(last=False)
+                self.on_confirmed(message, ack)
+        elif method.delivery_tag in self.unconfirmed:
+            self.on_confirmed(self.unconfirmed.pop(method.delivery_tag), ack)
+
+    def on_confirmed(self, message, ack):
+        if ack:
+            self.confirmed += 1
+            self.space.release()
+            if self.latencies is not None:
+                self.latencies.append(time.perf_counter() - message[3])
+            if self.callback is not None:
+                self.callback(message[4])
+        else:
+            # El distribuidor rechazó el mensaje, se reintenta en el siguiente lote
+            self.nacked += 1
+            self.pending.append(message)
+
+    def close(self, timeout=10):
+        self.deadline = time.time() + timeout
+        self.closing = True
+        if self.channel is None:
+            self.connection.ioloop.add_callback_threadsafe(self.connection.ioloop.stop)
+        self.stopped.wait(timeout)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#-------------------------------------------------------------------------
+# Archivo: respaldo_en_disco.py
+# Capitulo: 3 Patrón Publica-Subscribe
+# Autor(es): Perla Velasco & Yonathan Mtz.
+# Version: 1.0.0 Octubre 2026
+# Descripción:
+#
+#   Ésta clase guarda los mensajes en un archivo circular proyectado en memoria (mmap) para que
+#   los signos vitales no se pierdan mientras el distribuidor de mensajes no está disponible.
+#
+#   Las características de ésta clase son las siguientes:
+#
+#                                      respaldo_en_disco.py
+#           +-----------------------+-------------------------+------------------------+
+#           |  Nombre del elemento  |     Responsabilidad     |      Propiedades       |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Agregar mensajes al  |  - Sólo se escribe al  |
+#           |      Respaldo en      |    final del archivo.   |    final (tail) y sólo |
+#           |        Disco          |  - Leer los mensajes    |    se libera desde el  |
+#           |                       |    pendientes en orden. |    inicio (head).      |
+#           |                       |  - Liberar los mensajes |  - Cada registro lleva |
+#           |                       |    que ya confirmó el   |    su longitud y su    |
+#           |                       |    distribuidor.        |    crc32.              |
+#           |                       |                         |  - Al abrir un archivo |
+#           |                       |                         |    existente se descar-|
+#           |                       |                         |    tan los registros   |
+#           |                       |                         |    incompletos.        |
+#           +-----------------------+-------------------------+------------------------+
+#
+#   A continuación se describen los métodos que se implementaron en ésta clase:
+#
+#                                             Métodos:
+#           +-----------------------------+--------------------------+-----------------------+
+#           |         Nombre              |        Parámetros        |        Función        |
+#           +-----------------------------+--------------------------+-----------------------+
+#           |                             |  - path: archivo.        |  - Abre o crea el ar- |
+#           |       __init__()            |  - capacity: bytes para  |    chivo y recupera   |
+#           |                             |     mensajes.            |    los mensajes pen-  |
+#           |                             |                          |    dientes.           |
+#           +-----------------------------+--------------------------+-----------------------+
+#           |        recover()            |          Ninguno         |  - Descarta los regis-|
+#           |                             |                          |    tros incompletos   |
+#           |                             |                          |    del final.         |
+#           +-----------------------------+--------------------------+-----------------------+
+#           |      write_header()         |          Ninguno         |  - Escribe head y tail|
+#           |                             |                          |    en el encabezado.  |
+#           +-----------------------------+--------------------------+-----------------------+
+#           |      write_bytes()          |  - position: posición.   |  - Escribe bytes en el|
+#           |                             |  - data: bytes.          |    área circular.     |
+#           +-----------------------------+--------------------------+-----------------------+
+#           |       read_bytes()          |  - position: posición.   |  - Lee bytes del área |
+#           |                             |  - length: bytes.        |    circular.          |
+#           +-----------------------------+--------------------------+-----------------------+
+#           |        append()             |  - payload: bytes del    |  - Agrega un registro,|
+#           |                             |     mensaje.             |    regresa False si no|
+#           |                             |                          |    hay espacio y lanza|
+#           |                             |                          |    ValueError si es   |
+#           |                             |                          |    mayor que la capa- |
+#           |                             |                          |    cidad.             |
+#           +-----------------------------+--------------------------+-----------------------+
+#           |         read()              |  - position: posición del|  - Regresa el mensaje |
+#           |                             |     registro.            |    y la posición del  |
+#           |                             |                          |    siguiente.         |
+#           +-----------------------------+--------------------------+-----------------------+
+#           |        commit()             |  - head: posición del    |  - Libera los regis-  |
+#           |                             |     primer registro pen- |    tros anteriores a  |
+#           |                             |     diente.              |    head.              |
+#           +-----------------------------+--------------------------+-----------------------+
+#           |         used()              |          Ninguno         |  - Regresa los bytes  |
+#           |                             |                          |    ocupados.          |
+#           +-----------------------------+--------------------------+-----------------------+
+#           |         flush()             |          Ninguno         |  - Escribe en disco   |
+#           |                             |                          |    las páginas modifi-|
+#           |                             |                          |    cadas.             |
+#           +-----------------------------+--------------------------+-----------------------+
+#           |         close()             |          Ninguno         |  - Cierra el archivo. |
+#           +-----------------------------+--------------------------+-----------------------+
+#
+#           Nota: head y tail crecen sin volver a cero, la posición en el archivo es el resi-
+#           duo entre la capacidad, por lo que un registro puede continuar al inicio del área
+#           de mensajes.
+#
+#-------------------------------------------------------------------------
+import mmap
+import os
+import struct
+import zlib
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+MAGIC = b'SMAMRES1'
+# Encabezado: identificador, capacidad, head y tail
+HEADER = struct.Struct('<8sQQQ')
+# Registro: longitud y crc32 del mensaje
+RECORD = struct.Struct('<II')
+
+
+class RespaldoEnDisco:
+
+    def __init__(self, path, capacity=64 * 1024 * 1024):
+        exists = os.path.exists(path) and os.path.getsize(path) >= HEADER.size
+        self.file = open(path, 'r+b' if exists else 'w+b')
+        if fcntl is not None:
+            # Dos procesos no pueden compartir el mismo respaldo
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        if exists:
+            magic, capacity, head, tail = HEADER.unpack(self.file.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(path + ' no es un archivo de respaldo')
+        else:
+            head, tail = 0, 0
+            self.file.truncate(HEADER.size + capacity)
+        self.path = path
+        self.capacity = capacity
+        self.head = head
+        self.tail = tail
+        self.map = mmap.mmap(self.file.fileno(), HEADER.size + capacity)
+        self.recover()
+
+    def recover(self):
+        position = self.head
+        while self.tail - position >= RECORD.size:
+            length, crc = RECORD.unpack(self.read_bytes(position, RECORD.size))
+            end = position + RECORD.size + length
+            if end > self.tail or zlib.crc32(self.read_bytes(position + RECORD.size, length)) != crc:
+                break
+            position = end
+        # Lo que sigue al último registro completo se escribió a medias
+        self.tail = position
+        self.write_header()
+
+    def write_header(self):
+        self.map[0:HEADER.size] = HEADER.pack(MAGIC, self.capacity, self.head, self.tail)
+
+    def write_bytes(self, position, data):
+        offset = position % self.capacity
+        first = min(len(data), self.capacity - offset)
+        self.map[HEADER.size + offset:HEADER.size + offset + first] = data[:first]
+        if first < len(data):
+            self.map[HEADER.size:HEADER.size + len(data) - first] = data[first:]
+
+    def read_bytes(self, position, length):
+        offset = position % self.capacity
+        first = min(length, self.capacity - offset)
+        data = self.map[HEADER.size + offset:HEADER.size + offset + first]
+        if first < length:
+            data += self.map[HEADER.size:HEADER.size + length - first]
+        return data
+
+    def append(self, payload):
+        size = RECORD.size + len(payload)
+        if size > self.capacity:
+            # Nunca cabría aunque se confirmen todos los mensajes, quien publica no debe esperar
+            raise ValueError('El mensaje de ' + str(len(payload)) + ' bytes no cabe en el '
+                             'respaldo de ' + str(self.capacity) + ' bytes')
+        if size > self.capacity - self.used():
+            return False
+        self.write_bytes(self.tail, RECORD.pack(len(payload), zlib.crc32(payload)) + payload)
+        # El tail se actualiza después del registro, un registro a medias nunca es visible
+        self.tail += size
+        self.write_header()
+        return True
+
+    def read(self, position):
+        length, crc = RECORD.unpack(self.read_bytes(position, RECORD.size))
+        return self.read_bytes(position + RECORD.size, length), position + RECORD.size + length
+
+    def commit(self, head):
+        self.head = head
+        self.write_header()
+
+    def used(self):
+        return self.tail - self.head
+
+    def flush(self):
+        self.map.flush()
+
+    def close(self):
+        self.map.flush()
+        self.map.close()
+        self.file.close()
@@ -27,16 +27,42 @@
 #           +-----------------------------+--------------------------+-----------------------+
 #           |         Nombre              |        Parámetros        |        Función        |
 #           +-----------------------------+--------------------------+-----------------------+
-#           |                             |                          |  - Inicializa el      |
-#           |       __init__()            |          int: id         |    wearable indicando |
-#           |                             |                          |    su identificador.  |
+#           |                             |  - int: id               |  - Inicializa el      |
+#           |       __init__()            |  - broker: pool de cone- |    wearable indicando |
+#           |                             |     xiones compartido.   |    su identificador.  |
+#           |                             |  - pause: segundos entre |                       |
+#           |                             |     signos vitales.      |                       |
+#           |                             |  - content_type: formato |                       |
+#           |                             |     de los mensajes.     |                       |
+#           |                             |  - shards: fragmentos en |                       |
+#           |                             |     que se reparten los  |                       |
+#           |                             |     wearables, 0 para no |                       |
+#           |                             |     repartirlos.         |                       |
 #           +-----------------------------+--------------------------+-----------------------+
 #           |                             |                          |  - Envía los signos   |
 #           |        publish()            |          Ninguno         |    vitales al distri- |
 #           |                             |                          |    buidor de mensajes.|
 #           +-----------------------------+--------------------------+-----------------------+
-#           |   simulate_datetime()       |          Ninguno         |  - Simula valores de  |
-#           |                             |                          |    fecha y hora.      |
+#           |                             |  - vital: cola del signo |  - Simula la lectura |
+#           |    simulate_message()       |     vital.               |    de un signo vital. |
+#           +-----------------------------+--------------------------+-----------------------+
+#           |          device()           |          Ninguno         |  - Regresa los datos  |
+#           |                             |                          |    del wearable.      |
+#           +-----------------------------+--------------------------+-----------------------+
+#           |         register()          |          Ninguno         |  - Envía el registro  |
+#           |                             |                          |    del wearable a la  |
+#           |                             |                          |    cola devices antes |
+#           |                             |                          |    de su primera lec- |
+#           |                             |                          |    tura.              |
+#           +-----------------------------+--------------------------+-----------------------+
+#           |                             |  - vital: cola del signo |  - Codifica y publica |
+#           |         send()              |     vital.               |    un mensaje y lo    |
+#           |                             |  - message: mensaje.     |    registra en las    |
+#           |                             |                          |    métricas.          |
+#           +-----------------------------+--------------------------+-----------------------+
+#           |       routing_key()         |  - vital: signo vital.   |  - Regresa la cola o  |
+#           |                             |                          |    la routing key del |
+#           |                             |                          |    mensaje.           |
 #           +-----------------------------+--------------------------+-----------------------+
 #           |                             |          Ninguno         |  - Simula el valor de |
 #           |  simulate_x_position()      |                          |    la aceleración en  |
@@ -95,9 +121,32 @@
 #
 #
 #-------------------------------------------------------------------------
-import pika
 import random
 import time
+import codec
+import lecturas
+import metricas
+import topologia
+from pool_de_conexiones import PoolDeConexiones, SIGNOS_VITALES, persistent
+
+BYTES_PUBLICADOS = metricas.counter('smam_bytes_publicados_total',
+                                    'Bytes de los mensajes publicados por los wearables', ('vital',))
+# El número de mensajes publicados es smam_publicacion_segundos_count
+PUBLICACION = metricas.histogram('smam_publicacion_segundos',
+                                 'Segundos en codificar y publicar un mensaje', ('vital',))
+# Métricas de cada signo vital, se buscan una sola vez para no repetirlo en cada mensaje
+MEDIDORES = {}
+
+
+def record(vital, size, elapsed):
+    # Se registra un mensaje publicado en las métricas del proceso
+    try:
+        sent, publication = MEDIDORES[vital]
+    except KeyError:
+        sent, publication = MEDIDORES[vital] = (BYTES_PUBLICADOS.labels(vital),
+                                                PUBLICACION.labels(vital))
+    sent.inc(size)
+    publication.observe(elapsed)
 
 
 class XiaomiMyBand:
@@ -109,113 +158,73 @@ class XiaomiMyBand:
     battery_level = 81
     id = 0
 
-    def __init__(self, id):
+    def __init__(self, id, broker=None, pause=1, content_type=codec.CONTENT_TYPE_STRUCT,
+                 shards=0):
         self.id = id
+        # Fragmentos en que se reparten los wearables entre las instancias de los procesadores
+        self.shards = shards
+        # Formato en que se codifican los mensajes
+        self.content_type = content_type
+        # Conexión compartida con el Distribuidor de Mensajes
+        if broker is None:
+            broker = PoolDeConexiones.shared()
+        self.broker = broker
+        # Segundos de espera entre cada signo vital, en el modo por lotes no se espera
+        self.pause = pause
+        # Indica si ya se envió el registro del wearable
+        self.registered = False
 
     def publish(self):
-        message = {}
-        message['body_temperature'] = self.simulate_body_temperature()
-        message['id'] = str(self.id)
-        message['datetime'] = self.simulate_datetime()
-        message['producer'] = self.producer
-        message['model'] = self.model
-        message['hardware_version'] = self.hardware_version
-        message['software_version'] = self.software_version
-        # Se establece la conexión con el Distribuidor de Mensajes
-        connection = pika.BlockingConnection(pika.ConnectionParameters(host='localhost'))
-        # Se solicita un canal por el cuál se enviarán los signos vitales
-        channel = connection.channel()
-        # Se declara una cola para persistir los mensajes enviados
-        channel.queue_declare(queue='body_temperature', durable=True)
-        channel.basic_publish(exchange='', routing_key='body_temperature', body=str(message), properties=pika.BasicProperties(
-            delivery_mode=2,))  # Se realiza la publicación del mensaje en el Distribuidor de Mensajes
-        connection.close()  # Se cierra la conexión
-
-        time.sleep(1)
-
-        message = {}
-        message['heart_rate'] = self.simulate_heart_rate()
-        message['id'] = str(self.id)
-        message['datetime'] = self.simulate_datetime()
-        message['producer'] = self.producer
-        message['model'] = self.model
-        message['hardware_version'] = self.hardware_version
-        message['software_version'] = self.software_version
-        # Se establece la conexión con el Distribuidor de Mensajes
-        connection = pika.BlockingConnection(pika.ConnectionParameters(host='localhost'))
-        # Se solicita un canal por el cuál se enviarán los signos vitales
-        channel = connection.channel()
-        channel.queue_declare(queue='heart_rate', durable=True)
-        channel.basic_publish(exchange='', routing_key='heart_rate', body=str(message), properties=pika.BasicProperties(
-            delivery_mode=2,))  # Se realiza la publicación del mensaje en el Distribuidor de Mensajes
-        connection.close()  # Se cierra la conexión
-
-        time.sleep(1)
-        
-        message = {}
-        message['blood_preasure'] = self.simulate_blood_preasure()
-        message['id'] = str(self.id)
-        message['datetime'] = self.simulate_datetime()
-        message['producer'] = self.producer
-        message['model'] = self.model
-        message['hardware_version'] = self.hardware_version
-        message['software_version'] = self.software_version
-        # Se establece la conexión con el Distribuidor de Mensajes
-        connection = pika.BlockingConnection(pika.ConnectionParameters(host='localhost'))
-        # Se solicita un canal por el cuál se enviarán los signos vitales
-        channel = connection.channel()
-        channel.queue_declare(queue='blood_preasure', durable=True)
-        channel.basic_publish(exchange='', routing_key='blood_preasure', body=str(message), properties=pika.BasicProperties(
-            delivery_mode=2,))  # Se realiza la publicación del mensaje en el Distribuidor de Mensajes
-        connection.close()  # Se cierra la conexión
+        for x in range(0, len(SIGNOS_VITALES)):
+            if x > 0:
+                time.sleep(self.pause)
+            self.send(SIGNOS_VITALES[x], self.simulate_message(SIGNOS_VITALES[x]))
 
-        time.sleep(1)
-        
-        message = {}
-        message['x_position'] = self.simulate_x_position()
-        message['y_position'] = self.simulate_y_position()
-        message['z_position'] = self.simulate_z_position()
-        message['id'] = str(self.id)
-        message['datetime'] = self.simulate_datetime()
-        message['producer'] = self.producer
-        message['model'] = self.model
-        message['hardware_version'] = self.hardware_version
-        message['software_version'] = self.software_version
-        # Se establece la conexión con el Distribuidor de Mensajes
-        connection = pika.BlockingConnection(pika.ConnectionParameters(host='localhost'))
-        # Se solicita un canal por el cuál se enviarán los signos vitales
-        channel = connection.channel()
-        channel.queue_declare(queue='positions', durable=True)
-        channel.basic_publish(exchange='', routing_key='positions', body=str(message), properties=pika.BasicProperties(
-            delivery_mode=2,))  # Se realiza la publicación del mensaje en el Distribuidor de Mensajes
-        connection.close()  # Se cierra la conexión
+    def simulate_message(self, vital):
+        # Las lecturas sólo llevan el id, los datos del wearable se envían en su registro
+        timestamp = int(time.time() * 1000)
+        if vital == 'body_temperature':
+            return lecturas.LecturaDeTemperatura(self.id, timestamp, self.simulate_body_temperature())
+        if vital == 'heart_rate':
+            return lecturas.LecturaDeRitmoCardiaco(self.id, timestamp, self.simulate_heart_rate())
+        if vital == 'blood_preasure':
+            return lecturas.LecturaDePresion(self.id, timestamp, self.simulate_blood_preasure())
+        if vital == 'positions':
+            return lecturas.LecturaDePosicion(self.id, timestamp, self.simulate_x_position(),
+                                              self.simulate_y_position(), self.simulate_z_position())
+        return lecturas.LecturaDeMedicamento(self.id, timestamp, self.simulate_dose(),
+                                             self.simulate_med_hours(), self.simulate_meds(),
+                                             self.simulate_first_intake())
 
-        time.sleep(1)
-        
-        message = {}
-        message['medicine'] = self.simulate_meds()
-        message['dose'] = self.simulate_dose()
-        message['first_intake'] = self.simulate_first_intake()
-        message['hour'] = self.simulate_med_hours()
-        message['id'] = str(self.id)
-        message['datetime'] = self.simulate_datetime()
-        message['producer'] = self.producer
-        message['model'] = self.model
-        message['hardware_version'] = self.hardware_version
-        message['software_version'] = self.software_version
-        # Se establece la conexión con el Distribuidor de Mensajes
-        connection = pika.BlockingConnection(pika.ConnectionParameters(host='localhost'))
-        # Se solicita un canal por el cuál se enviarán los signos vitales
-        channel = connection.channel()
-        channel.queue_declare(queue='medicine', durable=True)
-        channel.basic_publish(exchange='', routing_key='medicine', body=str(message), properties=pika.BasicProperties(
-            delivery_mode=2,))  # Se realiza la publicación del mensaje en el Distribuidor de Mensajes
-        connection.close()  # Se cierra la conexión
+    def device(self):
+        return lecturas.Dispositivo(self.id, self.producer, self.model, self.hardware_version,
+                                    self.software_version, self.battery_level,
+                                    int(time.time() * 1000))
 
+    def register(self):
+        # El wearable se registra una sola vez en la cola del registro de dispositivos, los
+        # procesadores buscan sus datos por id
+        dispositivo = self.device()
+        lecturas.register(dispositivo)
+        self.broker.publish(topologia.DISPOSITIVOS, codec.encode_device(dispositivo),
+                            persistent(codec.CONTENT_TYPE_DISPOSITIVO))
+        self.registered = True
 
+    def send(self, vital, message):
+        if not self.registered:
+            self.register()
+        start = time.perf_counter()
+        body = codec.encode(vital, message, self.content_type)
+        # Se realiza la publicación del mensaje en el Distribuidor de Mensajes
+        self.broker.publish(self.routing_key(vital), body, persistent(self.content_type))
+        record(vital, len(body), time.perf_counter() - start)
 
-    def simulate_datetime(self):
-        return time.strftime("%d:%m:%Y:%H:%M:%S")
+    def routing_key(self, vital):
+        # En el exchange de los signos vitales la routing key incluye el id del wearable y, si
+        # se reparten los wearables, el fragmento que le corresponde
+        if getattr(self.broker, 'exchange', ''):
+            return topologia.routing_key(vital, self.id, self.shards)
+        return vital
 
     def simulate_x_position(self):
         return random.uniform(0, 1)
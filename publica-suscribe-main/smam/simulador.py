@@ -27,12 +27,62 @@
 #           +-------------------------+--------------------------+-----------------------+
 #           |         Nombre          |        Parámetros        |        Función        |
 #           +-------------------------+--------------------------+-----------------------+
+#           |                         |  - batch: indica si se   |  - Configura el modo  |
+#           |       __init__()        |     publica por lotes.   |    de publicación.    |
+#           |                         |  - batch_size: mensajes  |                       |
+#           |                         |     por lote.            |                       |
+#           |                         |  - linger: segundos máxi-|                       |
+#           |                         |     mos de espera de un  |                       |
+#           |                         |     lote.                |                       |
+#           |                         |  - asynchronous: indica  |                       |
+#           |                         |     si cada wearable es  |                       |
+#           |                         |     una tarea asíncrona. |                       |
+#           |                         |  - rate: mensajes por se-|                       |
+#           |                         |     gundo de cada weara- |                       |
+#           |                         |     ble (asíncrono).     |                       |
+#           |                         |  - duration: segundos de |                       |
+#           |                         |     simulación (asíncro- |                       |
+#           |                         |     no).                 |                       |
+#           |                         |  - id_inicial: id del    |                       |
+#           |                         |     primer wearable.     |                       |
+#           |                         |  - topic: publica en el  |                       |
+#           |                         |     exchange de los sig- |                       |
+#           |                         |     nos vitales.         |                       |
+#           |                         |  - shards: fragmentos en |                       |
+#           |                         |     que se reparten los  |                       |
+#           |                         |     wearables (tópico).  |                       |
+#           |                         |  - backup: archivo del   |                       |
+#           |                         |     respaldo en disco,   |                       |
+#           |                         |     None para publicar   |                       |
+#           |                         |     directamente.        |                       |
+#           |                         |  - host: distribuidor de |                       |
+#           |                         |     mensajes, memoria    |                       |
+#           |                         |     para el distribuidor |                       |
+#           |                         |     del proceso.         |                       |
+#           |                         |  - metrics: puerto del   |                       |
+#           |                         |     endpoint de métricas,|                       |
+#           |                         |     None para no publi-  |                       |
+#           |                         |     carlas.              |                       |
+#           |                         |  - models: modelos de    |                       |
+#           |                         |     wearable que se asig-|                       |
+#           |                         |     nan por turnos.      |                       |
+#           +-------------------------+--------------------------+-----------------------+
 #           |                         |                          |  - Inicializa los     |
 #           |                         |                          |    publicadores       |
 #           |     set_up_sensors()    |          Ninguno         |    necesarios para co-|
 #           |                         |                          |    menzar la simula-  |
 #           |                         |                          |    ción.              |
 #           +-------------------------+--------------------------+-----------------------+
+#           |        connect()        |          Ninguno         |  - Crea el publicador |
+#           |                         |                          |    que comparten los  |
+#           |                         |                          |    wearables e inicia |
+#           |                         |                          |    el endpoint de mé- |
+#           |                         |                          |    tricas.            |
+#           +-------------------------+--------------------------+-----------------------+
+#           |      add_sensors()      |  - count: wearables.     |  - Crea los wearables |
+#           |                         |  - verbose: imprime cada |    de la simulación.  |
+#           |                         |     wearable.            |                       |
+#           +-------------------------+--------------------------+-----------------------+
 #           |                         |                          |  - Ejecuta el método  |
 #           |                         |                          |    publish de cada    |
 #           |     start_sensors()     |          Ninguno         |    sensor para publi- |
@@ -41,14 +91,49 @@
 #           +-------------------------+--------------------------+-----------------------+
 #
 #-------------------------------------------------------------------------
+import argparse
 import sys
 sys.path.append('publicadores')
 from xiaomi_my_band import XiaomiMyBand
+from fitbit_charge import FitbitCharge
+from pool_de_conexiones import PoolDeConexiones
+from publicador_por_lotes import PublicadorPorLotes
+from publicador_con_respaldo import PublicadorConRespaldo
+from simulador_asincrono import SimuladorAsincrono
+import metricas
+import topologia
+
+# Modelos de wearable que se pueden simular
+MODELOS = {'xiaomi': XiaomiMyBand, 'fitbit': FitbitCharge}
 
 
 class Simulador:
-    sensores = []
-    id_inicial = 39722608
+
+    def __init__(self, batch=False, batch_size=100, linger=0.05, asynchronous=False, rate=1.0,
+                 duration=60, id_inicial=39722608, topic=False, shards=0,
+                 backup=None, host='localhost', metrics=None, models=('xiaomi',)):
+        # Cada simulador tiene sus propios wearables, a partir del id inicial indicado
+        self.sensores = []
+        self.id_inicial = id_inicial
+        # El modo asíncrono siempre publica por lotes
+        self.batch = batch or asynchronous
+        self.batch_size = batch_size
+        self.linger = linger
+        self.asynchronous = asynchronous
+        self.rate = rate
+        self.duration = duration
+        # Con topic cada suscriptor recibe su propia copia de los mensajes
+        self.exchange = topologia.EXCHANGE if topic else ''
+        self.shards = shards
+        self.backup = backup
+        # Distribuidor de mensajes, memoria para el distribuidor dentro del proceso
+        self.host = host
+        self.broker = None
+        self.pause = 1
+        # Puerto del endpoint de métricas de los wearables, None para no publicarlas
+        self.metrics = metrics
+        # Los wearables se asignan por turnos entre los modelos indicados
+        self.models = [MODELOS[model] for model in models]
 
     def set_up_sensors(self):
         print('+---------------------------------------------+')
@@ -65,23 +150,83 @@ class Simulador:
         print('+---------------------------------------------+')
         print('|            ASIGNACIÓN DE SENSORES           |')
         print('+---------------------------------------------+')
-        for x in range(0, int(adultos_mayores)):
-            s = XiaomiMyBand(self.id_inicial)
-            self.sensores.append(s)
-            print('| wearable Xiaomi My Band asignado, id: ' + str(self.id_inicial))
-            print('+---------------------------------------------+')
-            self.id_inicial += 1
+        self.add_sensors(int(adultos_mayores))
         print('+---------------------------------------------+')
         print('|        LISTO PARA INICIAR SIMULACIÓN            |')
         print('+---------------------------------------------+')
         input('presiona enter para iniciar: ')
         self.start_sensors()
 
+    def connect(self):
+        if self.metrics is not None:
+            metricas.serve(self.metrics)
+        # Todos los wearables comparten las conexiones con el Distribuidor de Mensajes
+        if self.backup is not None:
+            # Los signos vitales se guardan primero en disco y un hilo los envía al distribuidor
+            self.broker = PublicadorConRespaldo(self.backup, host=self.host, exchange=self.exchange)
+            self.pause = 0 if self.batch else 1
+        elif self.batch:
+            # En el modo por lotes los wearables no esperan entre cada signo vital
+            self.broker = PublicadorPorLotes(self.host, batch_size=self.batch_size,
+                                             linger=self.linger, exchange=self.exchange)
+            self.pause = 0
+        else:
+            self.broker = PoolDeConexiones(self.host, exchange=self.exchange)
+            self.pause = 1
+
+    def add_sensors(self, count, verbose=True):
+        if self.broker is None:
+            self.connect()
+        for x in range(0, count):
+            model = self.models[len(self.sensores) % len(self.models)]
+            s = model(self.id_inicial, self.broker, self.pause, shards=self.shards)
+            self.sensores.append(s)
+            if verbose:
+                print('| wearable ' + s.model + ' asignado, id: ' + str(self.id_inicial))
+                print('+---------------------------------------------+')
+            self.id_inicial += 1
+
     def start_sensors(self):
-        for x in range(0, 1000):
-            for s in self.sensores:
-                s.publish()
+        if self.asynchronous:
+            stats = SimuladorAsincrono(self.sensores, self.rate, self.duration).run()
+            print('| mensajes publicados: ' + str(stats['sent']) + ' (' +
+                  str(round(stats['rate'])) + ' por segundo)')
+        else:
+            for x in range(0, 1000):
+                for s in self.sensores:
+                    s.publish()
+        self.broker.close()
 
 if __name__ == '__main__':
-    simulador = Simulador()
+    parser = argparse.ArgumentParser(description='Simulador de wearables del SMAM')
+    parser.add_argument('--lotes', action='store_true', help='publica los signos vitales por lotes')
+    parser.add_argument('--tamano-lote', type=int, default=100, help='mensajes por lote')
+    parser.add_argument('--espera', type=float, default=0.05,
+                        help='segundos máximos de espera de un lote incompleto')
+    parser.add_argument('--asincrono', action='store_true',
+                        help='simula cada wearable como una tarea asíncrona')
+    parser.add_argument('--tasa', type=float, default=1.0,
+                        help='mensajes por segundo de cada wearable (asíncrono)')
+    parser.add_argument('--duracion', type=float, default=60,
+                        help='segundos de simulación (asíncrono)')
+    parser.add_argument('--topico', action='store_true',
+                        help='publica en el exchange de los signos vitales (vitals.<tipo>.<id>)')
+    parser.add_argument('--fragmentos', type=int, default=0,
+                        help='fragmentos en que se reparten los wearables por el hash de su id '
+                             '(tópico)')
+    parser.add_argument('--respaldo',
+                        help='archivo del respaldo en disco donde se guardan los signos vitales '
+                             'antes de enviarlos al distribuidor')
+    parser.add_argument('--host', default='localhost',
+                        help='distribuidor de mensajes (para memoria ver ejecucion_local.py)')
+    parser.add_argument('--metricas', type=int,
+                        help='puerto del endpoint HTTP local con las métricas en formato de '
+                             'Prometheus (/metrics)')
+    parser.add_argument('--modelos', nargs='+', choices=sorted(MODELOS), default=['xiaomi'],
+                        help='modelos de wearable que se asignan por turnos')
+    args = parser.parse_args()
+    simulador = Simulador(args.lotes, args.tamano_lote, args.espera, args.asincrono, args.tasa,
+                          args.duracion, topic=args.topico, shards=args.fragmentos,
+                          backup=args.respaldo, host=args.host, metrics=args.metricas,
+                          models=args.modelos)
     simulador.set_up_sensors()
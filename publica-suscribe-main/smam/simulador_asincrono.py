@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#-------------------------------------------------------------------------
+# Archivo: simulador_asincrono.py
+# Capitulo: 3 Patrón Publica-Subscribe
+# Autor(es): Perla Velasco & Yonathan Mtz.
+# Version: 1.0.0 Octubre 2026
+# Descripción:
+#
+#   Esta clase simula miles de wearables a la vez, cada uno como una tarea de asyncio con su
+#   propio calendario de envío.
+#
+#   Las características de ésta clase son las siguientes:
+#
+#                                      simulador_asincrono.py
+#           +-----------------------+-------------------------+------------------------+
+#           |  Nombre del elemento  |     Responsabilidad     |      Propiedades       |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Publicar los signos  |  - Cada wearable envía |
+#           |      Simulador        |    vitales de muchos    |    rate mensajes por   |
+#           |      Asíncrono        |    wearables a una tasa |    segundo.            |
+#           |                       |    constante.           |  - Publica con el pu-  |
+#           |                       |                         |    blicador por lotes, |
+#           |                       |                         |    que atiende la co-  |
+#           |                       |                         |    nexión en otro hilo.|
+#           +-----------------------+-------------------------+------------------------+
+#
+#   A continuación se describen los métodos que se implementaron en ésta clase:
+#
+#                                               Métodos:
+#           +-------------------------+--------------------------+-----------------------+
+#           |         Nombre          |        Parámetros        |        Función        |
+#           +-------------------------+--------------------------+-----------------------+
+#           |                         |  - sensores: wearables a |  - Configura la simu- |
+#           |       __init__()        |     simular.             |    lación.            |
+#           |                         |  - rate: mensajes por se-|                       |
+#           |                         |     gundo de cada weara- |                       |
+#           |                         |     ble.                 |                       |
+#           |                         |  - duration: segundos de |                       |
+#           |                         |     simulación.          |                       |
+#           |                         |  - vitals: signos vitales|                       |
+#           |                         |     que se envían, un    |                       |
+#           |                         |     signo repetido se en-|                       |
+#           |                         |     vía más veces.       |                       |
+#           |                         |  - ramp: segundos en que |                       |
+#           |                         |     se incorporan todos  |                       |
+#           |                         |     los wearables.       |                       |
+#           |                         |  - steps: escalones de la|                       |
+#           |                         |     rampa, 0 para una    |                       |
+#           |                         |     rampa lineal.        |                       |
+#           +-------------------------+--------------------------+-----------------------+
+#           |         run()           |          Ninguno         |  - Ejecuta la simula- |
+#           |                         |                          |    ción y regresa sus |
+#           |                         |                          |    estadísticas.      |
+#           +-------------------------+--------------------------+-----------------------+
+#           |       devices()         |          Ninguno         |  - Ejecuta la tarea de|
+#           |                         |                          |    cada wearable.     |
+#           +-------------------------+--------------------------+-----------------------+
+#           |        device()         |  - sensor: wearable.     |  - Tarea que publica  |
+#           |                         |  - start: segundos antes |    los mensajes de un |
+#           |                         |     de iniciar.          |    wearable.          |
+#           +-------------------------+--------------------------+-----------------------+
+#           |         send()          |  - sensor: wearable.     |  - Publica un mensaje |
+#           |                         |  - vital: signo vital.   |    sin bloquear el    |
+#           |                         |                          |    ciclo de eventos y |
+#           |                         |                          |    lo registra en las |
+#           |                         |                          |    métricas.          |
+#           +-------------------------+--------------------------+-----------------------+
+#
+#-------------------------------------------------------------------------
+import asyncio
+import itertools
+import random
+import sys
+import time
+sys.path.append('publicadores')
+import codec
+import xiaomi_my_band
+from pool_de_conexiones import SIGNOS_VITALES, persistent
+
+
+class SimuladorAsincrono:
+
+    def __init__(self, sensores, rate=1.0, duration=60, vitals=SIGNOS_VITALES, ramp=0, steps=0):
+        self.sensores = sensores
+        self.rate = rate
+        self.duration = duration
+        self.vitals = tuple(vitals)
+        self.ramp = ramp
+        self.steps = steps
+        self.end = None
+        self.sent = 0
+        self.waits = 0
+        self.max_lag = 0.0
+
+    def run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            start = time.time()
+            loop.run_until_complete(self.devices())
+            elapsed = time.time() - start
+        finally:
+            loop.close()
+        return {'sent': self.sent, 'elapsed': elapsed, 'rate': self.sent / elapsed,
+                'max_lag': self.max_lag, 'waits': self.waits}
+
+    async def devices(self):
+        self.end = asyncio.get_event_loop().time() + self.duration
+        total = len(self.sensores)
+        await asyncio.gather(*[self.device(self.sensores[x], self.start(x, total))
+                               for x in range(0, total)])
+
+    def start(self, x, total):
+        # Momento en que se incorpora el wearable x de acuerdo al perfil de la rampa
+        if self.steps > 0:
+            return (x * self.steps // total) * self.ramp / self.steps
+        return x * self.ramp / total
+
+    async def device(self, sensor, start=0):
+        loop = asyncio.get_event_loop()
+        period = 1.0 / self.rate
+        # Cada wearable inicia en un signo vital y un momento distintos para repartir la carga
+        offset = random.randrange(len(self.vitals))
+        vitals = itertools.cycle(self.vitals[offset:] + self.vitals[:offset])
+        scheduled = loop.time() + start + random.uniform(0, period)
+        while scheduled < self.end:
+            delay = scheduled - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                self.max_lag = max(self.max_lag, -delay)
+            await self.send(sensor, next(vitals))
+            scheduled += period
+
+    async def send(self, sensor, vital):
+        if not sensor.registered:
+            sensor.register()
+        start = time.perf_counter()
+        body = codec.encode(vital, sensor.simulate_message(vital), sensor.content_type)
+        # Si el distribuidor no alcanza a confirmar, se cede el ciclo a los demás wearables
+        while not sensor.broker.publish(sensor.routing_key(vital), body, persistent(sensor.content_type),
+                                         False):
+            self.waits += 1
+            await asyncio.sleep(0.01)
+        self.sent += 1
+        xiaomi_my_band.record(vital, len(body), time.perf_counter() - start)
@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#-------------------------------------------------------------------------
+# Archivo: sumidero_de_alertas.py
+# Capitulo: 3 Estilo Publica-Subscribe
+# Autor(es): Perla Velasco & Yonathan Mtz.
+# Version: 1.0.0 Octubre 2026
+# Descripción:
+#
+#   Ésta clase recibe las alertas del monitor, descarta las repetidas y las escribe desde un
+#   hilo propio para que los procesadores no esperen a la salida estándar.
+#
+#   Las características de ésta clase son las siguientes:
+#
+#                                      sumidero_de_alertas.py
+#           +-----------------------+-------------------------+------------------------+
+#           |  Nombre del elemento  |     Responsabilidad     |      Propiedades       |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Evitar alertas re-   |  - Una sola alerta por |
+#           |      Sumidero de      |    petidas.             |    wearable y signo    |
+#           |       Alertas         |  - Escribir las alertas |    vital durante el    |
+#           |                       |    sin bloquear a los   |    tiempo de enfria-   |
+#           |                       |    procesadores.        |    miento.             |
+#           |                       |                         |  - Las alertas omitidas|
+#           |                       |                         |    se agrupan en un    |
+#           |                       |                         |    resumen.            |
+#           |                       |                         |  - Cola de salida aco- |
+#           |                       |                         |    tada, las alertas   |
+#           |                       |                         |    que no caben se     |
+#           |                       |                         |    cuentan y descartan.|
+#           |                       |                         |  - Un error al escribir|
+#           |                       |                         |    una alerta no de-   |
+#           |                       |                         |    tiene al hilo.      |
+#           +-----------------------+-------------------------+------------------------+
+#
+#   A continuación se describen los métodos que se implementaron en ésta clase:
+#
+#                                               Métodos:
+#           +------------------------+--------------------------+-----------------------+
+#           |                        |  - cooldown: segundos en |  - Inicializa el sumi-|
+#           |       __init__()       |     que se omiten las    |    dero e inicia el   |
+#           |                        |     alertas repetidas.   |    hilo de escritura. |
+#           |                        |  - max_pending: alertas  |                       |
+#           |                        |     en espera de escri-  |                       |
+#           |                        |     birse.               |                       |
+#           |                        |  - interval: segundos en-|                       |
+#           |                        |     tre escrituras.      |                       |
+#           |                        |  - max_keys: pares wea-  |                       |
+#           |                        |     rable y signo vital  |                       |
+#           |                        |     en memoria.          |                       |
+#           |                        |  - stream: salida.       |                       |
+#           +------------------------+--------------------------+-----------------------+
+#           |                        |  - id, name_param, value,|  - Encola la alerta o |
+#           |        notify()        |     when, model: datos de|    la agrupa si se    |
+#           |                        |     la alerta.           |    repite.            |
+#           |                        |  - text: alerta completa.|                       |
+#           +------------------------+--------------------------+-----------------------+
+#           |      summarize()       |  - key: wearable y signo |  - Encola el resumen  |
+#           |                        |     vital.               |    de las alertas omi-|
+#           |                        |  - enfriamiento: alertas |    tidas.             |
+#           |                        |     omitidas.            |                       |
+#           +------------------------+--------------------------+-----------------------+
+#           |        write()         |  - text: texto a escri-  |  - Encola el texto sin|
+#           |                        |     bir.                 |    bloquear.          |
+#           +------------------------+--------------------------+-----------------------+
+#           |        expire()        |  - now: segundos, None   |  - Encola el resumen  |
+#           |                        |     para terminar todas  |    de los enfriamien- |
+#           |                        |     las alertas.         |    tos terminados.    |
+#           +------------------------+--------------------------+-----------------------+
+#           |         run()          |          Ninguno         |  - Escribe en lotes el|
+#           |                        |                          |    contenido de la    |
+#           |                        |                          |    cola de salida.    |
+#           +------------------------+--------------------------+-----------------------+
+#           |         emit()         |  - texts: alertas.       |  - Escribe las alertas|
+#           |                        |                          |    y cuenta las que no|
+#           |                        |                          |    se pueden escribir.|
+#           +------------------------+--------------------------+-----------------------+
+#           |         stats()        |          Ninguno         |  - Regresa los conta- |
+#           |                        |                          |    dores de alertas.  |
+#           +------------------------+--------------------------+-----------------------+
+#           |         close()        |          Ninguno         |  - Escribe los resú-  |
+#           |                        |                          |    menes y alertas    |
+#           |                        |                          |    pendientes.        |
+#           +------------------------+--------------------------+-----------------------+
+#
+#-------------------------------------------------------------------------
+import collections
+import queue
+import sys
+import threading
+import time
+import metricas
+
+DESCARTADAS = metricas.counter('smam_alertas_descartadas_total',
+                               'Alertas descartadas porque la cola de salida está llena')
+PENDIENTES = metricas.gauge('smam_alertas_pendientes', 'Alertas que esperan ser escritas')
+FALLIDAS = metricas.counter('smam_alertas_fallidas_total',
+                            'Alertas que no se pudieron escribir en la salida')
+
+
+class Enfriamiento:
+    __slots__ = ('start', 'count', 'value', 'first', 'last', 'model')
+
+    def __init__(self, start, model):
+        self.start = start
+        self.count = 0
+        self.value = None
+        self.first = None
+        self.last = None
+        self.model = model
+
+
+class SumideroDeAlertas:
+
+    def __init__(self, cooldown=60, max_pending=10000, interval=0.2, max_keys=100000,
+                 stream=None):
+        self.cooldown = cooldown
+        self.interval = interval
+        self.max_keys = max_keys
+        self.stream = stream if stream is not None else sys.stdout
+        self.output = queue.Queue(max_pending)
+        # Enfriamientos en curso ordenados por el momento en que iniciaron
+        self.cooldowns = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.emitted = 0
+        self.suppressed = 0
+        self.summaries = 0
+        self.dropped = 0
+        self.failed = 0
+        PENDIENTES.set_function(self.output.qsize)
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name='sumidero-de-alertas')
+        self.thread.daemon = True
+        self.thread.start()
+
+    def notify(self, id, name_param, value, when, model, text):
+        key = (id, name_param)
+        now = time.time()
+        with self.lock:
+            enfriamiento = self.cooldowns.get(key)
+            if enfriamiento is not None and now - enfriamiento.start < self.cooldown:
+                # La alerta se repite durante el enfriamiento y sólo se cuenta para el resumen
+                enfriamiento.count += 1
+                enfriamiento.value = value
+                if enfriamiento.first is None:
+                    enfriamiento.first = when
+                enfriamiento.last = when
+                self.suppressed += 1
+                return False
+            if enfriamiento is not None:
+                self.summarize(key, self.cooldowns.pop(key))
+            self.cooldowns[key] = Enfriamiento(now, model)
+            if len(self.cooldowns) > self.max_keys:
+                old_key, old = self.cooldowns.popitem(last=False)
+                self.summarize(old_key, old)
+            self.emitted += 1
+        self.write(text)
+        return True
+
+    def summarize(self, key, enfriamiento):
+        if enfriamiento.count == 0:
+            return
+        self.summaries += 1
+        self.write("  ---------------------------------------------------\n"
+                   "    RESUMEN\n"
+                   "  ---------------------------------------------------\n"
+                   "    Se agruparon " + str(enfriamiento.count) + " alertas más de " + str(key[1]) + " (último valor " + str(enfriamiento.value) + ") entre las " + str(enfriamiento.first) + " y las " + str(enfriamiento.last) + " en el adulto mayor que utiliza el dispositivo " + str(enfriamiento.model) + ":" + str(key[0]) + "\n"
+                   "\n")
+
+    def write(self, text):
+        try:
+            self.output.put_nowait(text)
+        except queue.Full:
+            # Antes que detener a los procesadores se descarta la alerta
+            self.dropped += 1
+            DESCARTADAS.inc()
+
+    def expire(self, now=None):
+        with self.lock:
+            while self.cooldowns:
+                key, enfriamiento = next(iter(self.cooldowns.items()))
+                if now is not None and now - enfriamiento.start < self.cooldown:
+                    break
+                del self.cooldowns[key]
+                self.summarize(key, enfriamiento)
+
+    def run(self):
+        while self.running:
+            try:
+                texts = [self.output.get(timeout=self.interval)]
+            except queue.Empty:
+                texts = []
+            self.expire(time.time())
+            while True:
+                try:
+                    texts.append(self.output.get_nowait())
+                except queue.Empty:
+                    break
+            if texts:
+                self.emit(texts)
+
+    def emit(self, texts):
+        try:
+            # Una sola escritura por lote de alertas
+            self.stream.write('\n'.join(texts) + '\n')
+        except Exception:
+            # Si el lote no se puede escribir se escribe cada alerta por separado, una alerta
+            # que falla se cuenta y el hilo sigue vaciando la cola
+            for text in texts:
+                try:
+                    self.stream.write(text + '\n')
+                except UnicodeEncodeError:
+                    # Por ejemplo "presión" en una salida ASCII, se escribe sin los acentos
+                    encoding = getattr(self.stream, 'encoding', None) or 'ascii'
+                    try:
+                        self.stream.write(text.encode(encoding, 'replace').decode(encoding) + '\n')
+                    except Exception:
+                        self.fail()
+                except Exception:
+                    self.fail()
+        try:
+            self.stream.flush()
+        except Exception:
+            pass
+
+    def fail(self):
+        self.failed += 1
+        FALLIDAS.inc()
+
+    def stats(self):
+        return {'emitted': self.emitted, 'suppressed': self.suppressed,
+                'summaries': self.summaries, 'dropped': self.dropped, 'failed': self.failed}
+
+    def close(self):
+        self.running = False
+        # El hilo puede haber terminado antes, join() no falla en ese caso
+        self.thread.join()
+        self.expire()
+        texts = []
+        while not self.output.empty():
+            texts.append(self.output.get_nowait())
+        if self.suppressed or self.dropped or self.failed:
+            texts.append("    Alertas omitidas por repetirse: " + str(self.suppressed) +
+                         ", descartadas por saturación: " + str(self.dropped) +
+                         ", con error al escribirse: " + str(self.failed))
+        if texts:
+            self.emit(texts)
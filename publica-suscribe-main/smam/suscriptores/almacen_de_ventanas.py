@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#-------------------------------------------------------------------------
+# Archivo: almacen_de_ventanas.py
+# Capitulo: 3 Estilo Publica-Subscribe
+# Autor(es): Perla Velasco & Yonathan Mtz.
+# Version: 1.0.0 Octubre 2026
+# Descripción:
+#
+#   Éstas clases guardan en memoria una ventana deslizante de los valores recientes de cada
+#   wearable para que las reglas evalúen condiciones sostenidas y no valores aislados.
+#
+#   Las características de éstas clases son las siguientes:
+#
+#                                     almacen_de_ventanas.py
+#           +-----------------------+-------------------------+------------------------+
+#           |  Nombre del elemento  |     Responsabilidad     |      Propiedades       |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Acumular los valores |  - La ventana se divi- |
+#           |       Ventana         |    de un wearable en una|    de en cubetas de ta-|
+#           |      Deslizante       |    ventana de tiempo.   |    maño fijo guardadas |
+#           |                       |  - Calcular media, míni-|    en arreglos circula-|
+#           |                       |    mo, máximo y EWMA.   |    res (array).        |
+#           |                       |                         |  - O(1) por mensaje.   |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Mantener una ventana |  - Limita el número de |
+#           |      Almacén de       |    por wearable.        |    wearables en memo-  |
+#           |       Ventanas        |                         |    ria, descarta el    |
+#           |                       |                         |    menos reciente.     |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Detectar que un valor|  - Notifica una sola   |
+#           |    Regla Sostenida    |    extremo se mantiene  |    vez mientras la con-|
+#           |                       |    durante la ventana.  |    dición se mantenga. |
+#           +-----------------------+-------------------------+------------------------+
+#
+#   A continuación se describen los métodos que se implementaron en éstas clases:
+#
+#                                               Métodos:
+#           +------------------------+--------------------------+-----------------------+
+#           |         Nombre         |        Parámetros        |        Función        |
+#           +------------------------+--------------------------+-----------------------+
+#           |   VentanaDeslizante.   |  - timestamp: segundos.  |  - Agrega un valor a  |
+#           |        update()        |  - value: valor medido.  |    su cubeta.         |
+#           +------------------------+--------------------------+-----------------------+
+#           |   VentanaDeslizante.   |  - now: segundos.        |  - Regresa cantidad,  |
+#           |        stats()         |                          |    media, mínimo y má-|
+#           |                        |                          |    ximo de la ventana.|
+#           +------------------------+--------------------------+-----------------------+
+#           |   VentanaDeslizante.   |  - now: segundos.        |  - Indica si hay datos|
+#           |        covers()        |                          |    desde el inicio de |
+#           |                        |                          |    la ventana.        |
+#           +------------------------+--------------------------+-----------------------+
+#           |  AlmacenDeVentanas.    |  - id: wearable.         |  - Agrega el valor a  |
+#           |        update()        |  - timestamp, value.     |    la ventana del wea-|
+#           |                        |                          |    rable y la regresa.|
+#           +------------------------+--------------------------+-----------------------+
+#           |   ReglaSostenida.      |  - id: wearable.         |  - Regresa True cuando|
+#           |        check()         |  - timestamp, value.     |    el mínimo de toda  |
+#           |                        |  - threshold: umbral, por|    la ventana supera  |
+#           |                        |     omisión el de la re- |    el umbral.         |
+#           |                        |     gla.                 |                       |
+#           +------------------------+--------------------------+-----------------------+
+#
+#-------------------------------------------------------------------------
+import array
+import collections
+import math
+import threading
+
+INFINITO = float('inf')
+
+
+class VentanaDeslizante:
+    __slots__ = ('width', 'size', 'slots', 'counts', 'sums', 'mins', 'maxs', 'ewma', 'last',
+                 'tau', 'alerting')
+
+    def __init__(self, window, buckets, tau):
+        self.width = window / buckets
+        self.size = buckets
+        # Número absoluto de la cubeta que ocupa cada posición del arreglo circular
+        self.slots = array.array('q', [-1]) * buckets
+        self.counts = array.array('l', [0]) * buckets
+        self.sums = array.array('d', [0.0]) * buckets
+        self.mins = array.array('d', [INFINITO]) * buckets
+        self.maxs = array.array('d', [-INFINITO]) * buckets
+        self.ewma = None
+        self.last = None
+        self.tau = tau
+        self.alerting = False
+
+    def update(self, timestamp, value):
+        bucket = int(timestamp // self.width)
+        slot = bucket % self.size
+        if self.slots[slot] != bucket:
+            if self.slots[slot] > bucket:
+                # El valor llegó después de que su cubeta salió de la ventana
+                return
+            self.slots[slot] = bucket
+            self.counts[slot] = 0
+            self.sums[slot] = 0.0
+            self.mins[slot] = INFINITO
+            self.maxs[slot] = -INFINITO
+        self.counts[slot] += 1
+        self.sums[slot] += value
+        if value < self.mins[slot]:
+            self.mins[slot] = value
+        if value > self.maxs[slot]:
+            self.maxs[slot] = value
+        # Promedio móvil exponencial con decaimiento de acuerdo al tiempo transcurrido
+        if self.ewma is None:
+            self.ewma = value
+        elif timestamp > self.last:
+            alpha = 1.0 - math.exp((self.last - timestamp) / self.tau)
+            self.ewma += alpha * (value - self.ewma)
+        if self.last is None or timestamp > self.last:
+            self.last = timestamp
+
+    def stats(self, now):
+        oldest = int(now // self.width) - self.size + 1
+        count = 0
+        total = 0.0
+        minimum = INFINITO
+        maximum = -INFINITO
+        for slot in range(0, self.size):
+            if self.slots[slot] >= oldest:
+                count += self.counts[slot]
+                total += self.sums[slot]
+                if self.mins[slot] < minimum:
+                    minimum = self.mins[slot]
+                if self.maxs[slot] > maximum:
+                    maximum = self.maxs[slot]
+        if count == 0:
+            return 0, None, None, None
+        return count, total / count, minimum, maximum
+
+    def covers(self, now):
+        # Alguna de las dos cubetas más antiguas de la ventana debe tener valores
+        oldest = int(now // self.width) - self.size + 1
+        return self.slots[oldest % self.size] == oldest or \
+            self.slots[(oldest + 1) % self.size] == oldest + 1
+
+
+class AlmacenDeVentanas:
+
+    def __init__(self, window=60, buckets=12, max_devices=10000, tau=None):
+        self.window = window
+        self.buckets = buckets
+        self.max_devices = max_devices
+        self.tau = tau if tau else window
+        self.windows = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def update(self, id, timestamp, value):
+        with self.lock:
+            return self.update_unlocked(id, timestamp, value)
+
+    def update_unlocked(self, id, timestamp, value):
+        ventana = self.windows.get(id)
+        if ventana is None:
+            ventana = VentanaDeslizante(self.window, self.buckets, self.tau)
+            self.windows[id] = ventana
+            # Se descarta la ventana del wearable que lleva más tiempo sin enviar datos
+            if len(self.windows) > self.max_devices:
+                self.windows.popitem(last=False)
+        else:
+            self.windows.move_to_end(id)
+        ventana.update(timestamp, value)
+        return ventana
+
+    def get(self, id):
+        return self.windows.get(id)
+
+
+class ReglaSostenida:
+
+    def __init__(self, threshold, window=60, buckets=12, max_devices=10000):
+        self.threshold = threshold
+        self.store = AlmacenDeVentanas(window, buckets, max_devices)
+
+    def check(self, id, timestamp, value, threshold=None):
+        # El umbral de la llamada reemplaza al de la regla, por ejemplo el de un wearable
+        if threshold is None:
+            threshold = self.threshold
+        with self.store.lock:
+            ventana = self.store.update_unlocked(id, timestamp, value)
+            count, mean, minimum, maximum = ventana.stats(timestamp)
+            sustained = count > 0 and minimum > threshold and ventana.covers(timestamp)
+            # Se notifica al iniciar la condición y no con cada mensaje mientras se mantiene
+            fire = sustained and not ventana.alerting
+            ventana.alerting = sustained
+            return fire
@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#-------------------------------------------------------------------------
+# Archivo: archivador_de_signos_vitales.py
+# Capitulo: 3 Estilo Publica-Subscribe
+# Autor(es): Perla Velasco & Yonathan Mtz.
+# Version: 1.0.0 Octubre 2026
+# Descripción:
+#
+#   Esta clase define el rol de un suscriptor que guarda todas las lecturas de los signos
+#   vitales en el archivo histórico para su revisión posterior.
+#
+#   Las características de ésta clase son las siguientes:
+#
+#                                 archivador_de_signos_vitales.py
+#           +-----------------------+-------------------------+------------------------+
+#           |  Nombre del elemento  |     Responsabilidad     |      Propiedades       |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Guardar cada lectura |  - Se suscribe con sus |
+#           |      Archivador de    |    en el archivo del    |    propias colas (por  |
+#           |    Signos Vitales     |    signo vital y del    |    omisión archivo.<si-|
+#           |                       |    día.                 |    gno vital>).        |
+#           |                       |                         |  - Escribe un bloque al|
+#           |                       |                         |    juntar chunk_rows   |
+#           |                       |                         |    lecturas o cada     |
+#           |                       |                         |    interval segundos.  |
+#           |                       |                         |  - Con --lote agrega   |
+#           |                       |                         |    las columnas del    |
+#           |                       |                         |    lote sin decodificar|
+#           |                       |                         |    cada mensaje.       |
+#           +-----------------------+-------------------------+------------------------+
+#
+#   A continuación se describen los métodos que se implementaron en ésta clase:
+#
+#                                               Métodos:
+#           +------------------------+--------------------------+-----------------------+
+#           |         Nombre         |        Parámetros        |        Función        |
+#           +------------------------+--------------------------+-----------------------+
+#           |                        |  - root: carpeta del ar- |  - Inicializa el ar-  |
+#           |       __init__()       |     chivo.               |    chivador.          |
+#           |                        |  - chunk_rows: lecturas  |                       |
+#           |                        |     por bloque.          |                       |
+#           |                        |  - interval: segundos    |                       |
+#           |                        |     máximos antes de es- |                       |
+#           |                        |     cribir un bloque.    |                       |
+#           |                        |  - fsync: sincroniza el  |                       |
+#           |                        |     disco en cada bloque.|                       |
+#           +------------------------+--------------------------+-----------------------+
+#           |        writer()        |  - vital: signo vital.   |  - Regresa el escritor|
+#           |                        |  - day: número de día.   |    del archivo del    |
+#           |                        |                          |    día.               |
+#           +------------------------+--------------------------+-----------------------+
+#           |       process()        |  - vital: signo vital.   |  - Agrega la lectura  |
+#           |                        |  - message: lectura.     |    a su archivo y re- |
+#           |                        |                          |    gresa el evento de |
+#           |                        |                          |    su bloque.         |
+#           +------------------------+--------------------------+-----------------------+
+#           |    process_batch()     |  - vital: signo vital.   |  - Agrega las colum-  |
+#           |                        |  - lote: lote de mensa-  |    nas del lote a su  |
+#           |                        |     jes.                 |    archivo.           |
+#           +------------------------+--------------------------+-----------------------+
+#           |   append_columns()     |  - vital, day.           |  - Agrega columnas al |
+#           |                        |  - columns: columnas del |    escritor del día,  |
+#           |                        |     lote.                |    aunque otro hilo lo|
+#           |                        |                          |    haya cerrado.      |
+#           +------------------------+--------------------------+-----------------------+
+#           |         run()          |          Ninguno         |  - Escribe los bloques|
+#           |                        |                          |    que esperan más de |
+#           |                        |                          |    interval segundos. |
+#           +------------------------+--------------------------+-----------------------+
+#           |       consume()        |  - config: opciones del  |  - Recibe los signos  |
+#           |                        |     motor de consumo.    |    vitales de todas   |
+#           |                        |                          |    las colas.         |
+#           +------------------------+--------------------------+-----------------------+
+#           |        close()         |          Ninguno         |  - Escribe los bloques|
+#           |                        |                          |    pendientes y cierra|
+#           |                        |                          |    los archivos.      |
+#           +------------------------+--------------------------+-----------------------+
+#
+#           Nota: process() y process_batch() regresan el evento del bloque de cada lectura
+#           y el motor confirma los mensajes hasta que su bloque está en el archivo, así que si
+#           el archivador se detiene de forma inesperada las lecturas del bloque en curso se
+#           vuelven a entregar. Sin --fsync el bloque sólo se entrega al sistema operativo y un
+#           apagado del equipo puede perder los bloques que aún no llegan al disco.
+#
+#-------------------------------------------------------------------------
+import argparse
+import functools
+import sys
+import threading
+import time
+import traceback
+sys.path.append('../')
+import codec
+import archivo_de_signos
+from archivo_de_signos import EscritorDeArchivo, DIA
+from motor_de_consumo import MotorDeConsumo, add_arguments, options
+
+
+class ArchivadorSignosVitales:
+
+    def __init__(self, root='archivo', chunk_rows=4096, interval=1.0, fsync=False):
+        self.root = root
+        self.chunk_rows = chunk_rows
+        self.interval = interval
+        self.fsync = fsync
+        # (signo vital, día) -> escritor del archivo de ese día
+        self.writers = {}
+        self.lock = threading.Lock()
+        self.running = False
+        self.thread = None
+
+    def writer(self, vital, day):
+        writer = self.writers.get((vital, day))
+        if writer is not None:
+            return writer
+        with self.lock:
+            writer = self.writers.get((vital, day))
+            if writer is None:
+                writer = EscritorDeArchivo(archivo_de_signos.path(self.root, vital, day), vital,
+                                           self.chunk_rows, self.fsync)
+                self.writers[(vital, day)] = writer
+                # Sólo se mantienen abiertos el día actual y el anterior
+                for key in [key for key in self.writers if key[0] == vital and key[1] < day - 1]:
+                    self.writers.pop(key).close()
+        return writer
+
+    def process(self, vital, message):
+        day = archivo_de_signos.day(codec.timestamp(message))
+        while True:
+            pending = self.writer(vital, day).append(message)
+            if pending is not None:
+                return pending
+            # Otro hilo cerró el escritor (por ejemplo al cambiar de día), se vuelve a abrir
+
+    def append_columns(self, vital, day, columns):
+        while True:
+            pending = self.writer(vital, day).append_columns(columns)
+            if pending is not None:
+                return pending
+
+    def process_batch(self, vital, lote):
+        numeric, strings = archivo_de_signos.columns(vital)
+        if strings:
+            # Los textos de la lectura sólo están en los mensajes decodificados
+            for message in lote.messages():
+                lote.hold(self.process(vital, message))
+            return list(lote.events)
+        names = ['id', 'timestamp'] + [name for name, code in numeric]
+        days = lote.column('timestamp') // DIA
+        for day in set(days.tolist()):
+            mask = days == day
+            if mask.all():
+                columns = dict((name, lote.column(name)) for name in names)
+            else:
+                # Un lote que cruza la medianoche se reparte entre los archivos de cada día
+                columns = dict((name, lote.column(name)[mask]) for name in names)
+            lote.hold(self.append_columns(vital, int(day), columns))
+            # Si falla el día siguiente no se vuelven a agregar las lecturas de éste
+            lote.finish(mask.nonzero()[0].tolist())
+        return list(lote.events)
+
+    def run(self):
+        while self.running:
+            time.sleep(self.interval / 2)
+            now = time.time()
+            with self.lock:
+                writers = list(self.writers.values())
+            for writer in writers:
+                if writer.oldest is not None and now - writer.oldest >= self.interval:
+                    try:
+                        writer.flush()
+                    except Exception:
+                        # Un error de escritura no detiene la escritura de los demás bloques
+                        traceback.print_exc()
+
+    def consume(self, **config):
+        batch = bool(config.get('batch'))
+        handlers = dict((vital, functools.partial(self.process_batch if batch else self.process,
+                                                  vital)) for vital in codec.ESQUEMAS)
+        # Las lecturas esperan su confirmación hasta que se escribe su bloque, el distribuidor
+        # debe entregar las suficientes para completar un bloque de cada signo vital
+        config['prefetch'] = min(65535, max(config.get('prefetch', 1000),
+                                            self.chunk_rows * len(handlers)))
+        motor = MotorDeConsumo(handlers, **config)
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name='archivador')
+        self.thread.daemon = True
+        self.thread.start()
+        try:
+            motor.start()  # Se realiza la suscripción en el Distribuidor de Mensajes
+        except (KeyboardInterrupt, SystemExit):
+            # Se escriben los bloques en curso antes de confirmar sus lecturas y cerrar la conexión
+            motor.close(before_ack=self.close)
+            sys.exit("Conexión finalizada...")
+
+    def close(self):
+        self.running = False
+        with self.lock:
+            for writer in self.writers.values():
+                writer.close()
+            self.writers.clear()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Archivador de los signos vitales')
+    add_arguments(parser)
+    parser.add_argument('--carpeta', default='archivo', help='carpeta del archivo histórico')
+    parser.add_argument('--lecturas-por-bloque', type=int, default=4096,
+                        help='lecturas que se juntan antes de escribir un bloque')
+    parser.add_argument('--intervalo', type=float, default=1.0,
+                        help='segundos máximos que espera un bloque incompleto')
+    parser.add_argument('--fsync', action='store_true',
+                        help='sincroniza el disco después de escribir cada bloque')
+    args = parser.parse_args()
+    config = options(args)
+    if config['subscriber'] is None:
+        # El archivador necesita su propia copia de los mensajes para no quitárselos a los
+        # procesadores
+        config['subscriber'] = 'archivo'
+    archivador = ArchivadorSignosVitales(args.carpeta, args.lecturas_por_bloque, args.intervalo,
+                                         args.fsync)
+    archivador.consume(**config)
@@ -0,0 +1,443 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#-------------------------------------------------------------------------
+# Archivo: archivo_de_signos.py
+# Capitulo: 3 Estilo Publica-Subscribe
+# Autor(es): Perla Velasco & Yonathan Mtz.
+# Version: 1.0.0 Octubre 2026
+# Descripción:
+#
+#   Éste módulo define el formato en disco del archivo histórico de signos vitales: un
+#   archivo por signo vital y por día, formado por bloques en columnas que sólo se agregan al
+#   final.
+#
+#   Las características de éste módulo son las siguientes:
+#
+#                                       archivo_de_signos.py
+#           +-----------------------+-------------------------+------------------------+
+#           |  Nombre del elemento  |     Responsabilidad     |      Propiedades       |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Juntar las lecturas  |  - Cada bloque guarda  |
+#           |     Escritor de       |    de un día y escribir-|    una columna por     |
+#           |       Archivo         |    las en bloques.      |    campo en arreglos de|
+#           |                       |                         |    tipo fijo.          |
+#           |                       |                         |  - Las lecturas se or- |
+#           |                       |                         |    denan por wearable  |
+#           |                       |                         |    y hora.             |
+#           |                       |                         |  - El timestamp se     |
+#           |                       |                         |    guarda como diferen-|
+#           |                       |                         |    cia de 32 bits con  |
+#           |                       |                         |    el primero del blo- |
+#           |                       |                         |    que.                |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Buscar lecturas por  |  - Lee el archivo pro- |
+#           |     Lector de         |    wearable y rango de  |    yectado en memoria  |
+#           |       Archivo         |    tiempo.              |    (mmap) sin copiar   |
+#           |                       |                         |    las columnas.       |
+#           |                       |                         |  - Descarta bloques por|
+#           |                       |                         |    su encabezado y bus-|
+#           |                       |                         |    ca por bisección    |
+#           |                       |                         |    dentro del bloque.  |
+#           +-----------------------+-------------------------+------------------------+
+#
+#   A continuación se describen las funciones y métodos que se implementaron en éste módulo:
+#
+#                                        Funciones y Métodos:
+#           +------------------------+--------------------------+-----------------------+
+#           |         Nombre         |        Parámetros        |        Función        |
+#           +------------------------+--------------------------+-----------------------+
+#           |       columns()        |  - vital: signo vital.   |  - Regresa las colum- |
+#           |                        |  - formato, tipo: versión|    nas numéricas y de |
+#           |                        |     del formato y tipo   |    texto que se archi-|
+#           |                        |     del encabezado.      |    van.               |
+#           +------------------------+--------------------------+-----------------------+
+#           |         day()          |  - timestamp: milisegun- |  - Regresa el número  |
+#           |                        |     dos desde epoch.     |    de día UTC.        |
+#           +------------------------+--------------------------+-----------------------+
+#           |         path()         |  - root: carpeta.        |  - Regresa el archivo |
+#           |                        |  - vital: signo vital.   |    de un día.         |
+#           |                        |  - day: número de día.   |                       |
+#           +------------------------+--------------------------+-----------------------+
+#           |        files()         |  - root, vital.          |  - Regresa los archi- |
+#           |                        |  - start, end: milisegun-|    vos de los días del|
+#           |                        |     dos, None sin límite.|    rango.             |
+#           +------------------------+--------------------------+-----------------------+
+#           |         pad()          |  - data: bytes.          |  - Completa los bytes |
+#           |                        |                          |    a múltiplo de 8.   |
+#           +------------------------+--------------------------+-----------------------+
+#           |     read_blocks()      |  - data: contenido del   |  - Regresa los blo-   |
+#           |                        |     archivo.             |    ques completos y   |
+#           |                        |  - size: bytes.          |    dónde terminan.    |
+#           +------------------------+--------------------------+-----------------------+
+#           |  EscritorDeArchivo()   |  - path: archivo.        |  - Abre el archivo    |
+#           |                        |  - vital: signo vital.   |    para agregar blo-  |
+#           |                        |  - chunk_rows: lecturas  |    ques.              |
+#           |                        |     por bloque.          |                       |
+#           |                        |  - fsync: sincroniza el  |                       |
+#           |                        |     disco en cada bloque.|                       |
+#           +------------------------+--------------------------+-----------------------+
+#           |       recover()        |          Ninguno         |  - Descarta un bloque |
+#           |                        |                          |    escrito a medias.  |
+#           +------------------------+--------------------------+-----------------------+
+#           |        reset()         |          Ninguno         |  - Vacía el bloque en |
+#           |                        |                          |    curso.             |
+#           +------------------------+--------------------------+-----------------------+
+#           |       append()         |  - message: lectura de-  |  - Agrega una lectura |
+#           |                        |     codificada.          |    al bloque en curso |
+#           |                        |                          |    y regresa el evento|
+#           |                        |                          |    que se activa al   |
+#           |                        |                          |    escribirlo, o None |
+#           |                        |                          |    si ya se cerró.    |
+#           +------------------------+--------------------------+-----------------------+
+#           |   append_columns()     |  - columns: columnas de  |  - Agrega varias lec- |
+#           |                        |     numpy de un lote.    |    turas al bloque en |
+#           |                        |                          |    curso, igual que   |
+#           |                        |                          |    append().          |
+#           +------------------------+--------------------------+-----------------------+
+#           |        touch()         |          Ninguno         |  - Escribe el bloque  |
+#           |                        |                          |    si está completo.  |
+#           +------------------------+--------------------------+-----------------------+
+#           |        flush()         |          Ninguno         |  - Escribe el bloque  |
+#           |                        |                          |    en curso.          |
+#           +------------------------+--------------------------+-----------------------+
+#           |        write()         |          Ninguno         |  - Ordena las lecturas|
+#           |                        |                          |    y escribe el bloque|
+#           |                        |                          |    con una sola escri-|
+#           |                        |                          |    tura.              |
+#           +------------------------+--------------------------+-----------------------+
+#           |   LectorDeArchivo()    |  - path: archivo.        |  - Proyecta el archivo|
+#           |                        |                          |    en memoria y lee   |
+#           |                        |                          |    los encabezados de |
+#           |                        |                          |    los bloques.       |
+#           +------------------------+--------------------------+-----------------------+
+#           |       columns()        |  - bloque: bloque.       |  - Regresa las colum- |
+#           |                        |                          |    nas del bloque sin |
+#           |                        |                          |    copiarlas.         |
+#           +------------------------+--------------------------+-----------------------+
+#           |        rows()          |  - bloque: bloque.       |  - Regresa el rango de|
+#           |                        |  - data: columnas.       |    renglones del wea- |
+#           |                        |  - device: wearable, None|    rable en el rango  |
+#           |                        |     para todos.          |    de tiempo.         |
+#           |                        |  - start, end: milisegun-|                       |
+#           |                        |     dos.                 |                       |
+#           +------------------------+--------------------------+-----------------------+
+#           |        text()          |  - data: columnas.       |  - Regresa un texto de|
+#           |                        |  - name: columna.        |    una lectura.       |
+#           |                        |  - index: renglón.       |                       |
+#           +------------------------+--------------------------+-----------------------+
+#           |        scan()          |  - device: wearable, None|  - Regresa las lectu- |
+#           |                        |     para todos.          |    ras que cumplen el |
+#           |                        |  - start, end: milisegun-|    filtro.            |
+#           |                        |     dos, None sin límite.|                       |
+#           +------------------------+--------------------------+-----------------------+
+#           |        close()         |          Ninguno         |  - Cierra el archivo. |
+#           +------------------------+--------------------------+-----------------------+
+#
+#           Nota: el archivo inicia con un encabezado de 16 bytes (SMARC001, el tipo del
+#           signo vital y la versión del formato, independiente de la del codec) y le
+#           siguen los bloques: encabezado de 48 bytes (BLQ1, lecturas, primer timestamp,
+#           timestamp mínimo y máximo, id mínimo y máximo, bytes y crc32) y las columnas
+#           id, timestamp, campos numéricos y textos, cada una alineada a 8 bytes. Los
+#           textos se guardan como posiciones de inicio y los bytes en UTF-8.
+#
+#-------------------------------------------------------------------------
+import array
+import bisect
+import calendar
+import glob
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+sys.path.append('../')
+import codec
+
+MAGIC = b'SMARC001'
+# Magic, tipo del signo vital y versión del formato
+ARCHIVO = struct.Struct('<8sBB6x')
+BLOQUE = struct.Struct('<4sIqqqIIII')
+MAGIC_BLOQUE = b'BLQ1'
+DIA = 86400000
+
+# Columnas numéricas y de texto de cada signo vital en cada versión del formato del archivo.
+# No dependen de la versión del codec: un cambio en los mensajes no cambia la forma de leer los
+# archivos que ya se escribieron
+FORMATO = 1
+FORMATOS = {
+    1: {1: ('body_temperature', (('body_temperature', 'd'),), ()),
+        2: ('heart_rate', (('heart_rate', 'H'),), ()),
+        3: ('blood_preasure', (('blood_preasure', 'H'),), ()),
+        4: ('positions', (('x_position', 'd'), ('y_position', 'd'), ('z_position', 'd')), ()),
+        5: ('medicine', (('dose', 'B'), ('hour', 'B')), ('medicine', 'first_intake'))},
+}
+TIPOS = dict((vital, tipo) for tipo, (vital, numeric, strings) in FORMATOS[FORMATO].items())
+
+
+def columns(vital, formato=FORMATO, tipo=None):
+    if tipo is None:
+        tipo = TIPOS[vital]
+    vital, numeric, strings = FORMATOS[formato][tipo]
+    return list(numeric), list(strings)
+
+
+def day(timestamp):
+    return int(timestamp) // DIA
+
+
+def path(root, vital, day):
+    return os.path.join(root, vital, time.strftime('%Y-%m-%d', time.gmtime(day * 86400)) + '.smarc')
+
+
+def files(root, vital, start=None, end=None):
+    result = []
+    for name in sorted(glob.glob(os.path.join(root, vital, '*.smarc'))):
+        first = calendar.timegm(time.strptime(os.path.basename(name)[:10], '%Y-%m-%d')) * 1000
+        if (start is None or first + DIA > start) and (end is None or first < end):
+            result.append(name)
+    return result
+
+
+def pad(data):
+    return data + b'\x00' * (-len(data) % 8)
+
+
+class Bloque:
+    __slots__ = ('offset', 'count', 'base', 'min_ts', 'max_ts', 'min_id', 'max_id', 'length',
+                 'crc')
+
+    def __init__(self, offset, count, base, min_ts, max_ts, min_id, max_id, length, crc):
+        self.offset = offset
+        self.count = count
+        self.base = base
+        self.min_ts = min_ts
+        self.max_ts = max_ts
+        self.min_id = min_id
+        self.max_id = max_id
+        self.length = length
+        self.crc = crc
+
+
+def read_blocks(data, size):
+    # Se recorren sólo los encabezados, las columnas se saltan con su longitud
+    blocks = []
+    offset = ARCHIVO.size
+    while offset + BLOQUE.size <= size:
+        values = BLOQUE.unpack_from(data, offset)
+        if values[0] != MAGIC_BLOQUE or offset + BLOQUE.size + values[7] > size:
+            break
+        blocks.append(Bloque(offset + BLOQUE.size, *values[1:]))
+        offset += BLOQUE.size + values[7]
+    return blocks, offset
+
+
+class EscritorDeArchivo:
+
+    def __init__(self, path, vital, chunk_rows=4096, fsync=False):
+        self.vital = vital
+        self.numeric, self.strings = columns(vital)
+        self.chunk_rows = chunk_rows
+        self.fsync = fsync
+        self.lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(path, 'ab+')
+        self.file.seek(0, os.SEEK_END)
+        if self.file.tell() < ARCHIVO.size:
+            self.file.truncate(0)
+            self.file.write(ARCHIVO.pack(MAGIC, TIPOS[vital], FORMATO))
+            self.file.flush()
+        else:
+            self.recover()
+        self.path = path
+        self.reset()
+        self.oldest = None
+        # Se activa al escribir el bloque en curso, así se confirman sus lecturas
+        self.pending = threading.Event()
+        self.closed = False
+
+    def recover(self):
+        self.file.seek(0)
+        data = self.file.read()
+        blocks, end = read_blocks(data, len(data))
+        if blocks and zlib.crc32(data[blocks[-1].offset:end]) != blocks[-1].crc:
+            end = blocks[-1].offset - BLOQUE.size
+        if end < len(data):
+            # Un bloque escrito a medias al detenerse el archivador se descarta
+            self.file.truncate(end)
+        self.file.seek(0, os.SEEK_END)
+
+    def reset(self):
+        self.ids = array.array('I')
+        self.timestamps = array.array('q')
+        self.values = [array.array(code) for name, code in self.numeric]
+        self.texts = [[] for name in self.strings]
+
+    def append(self, message):
+        with self.lock:
+            if self.closed:
+                return None
+            self.ids.append(int(message['id']))
+            self.timestamps.append(codec.timestamp(message))
+            for x in range(0, len(self.numeric)):
+                name, code = self.numeric[x]
+                self.values[x].append(float(message[name]) if code == 'd' else int(message[name]))
+            for x in range(0, len(self.strings)):
+                self.texts[x].append(message[self.strings[x]])
+            pending = self.pending
+            self.touch()
+            return pending
+
+    def append_columns(self, columns):
+        # Las columnas de numpy de un lote se agregan sin convertir cada valor
+        with self.lock:
+            if self.closed:
+                return None
+            self.ids.frombytes(columns['id'].astype('<u4').tobytes())
+            self.timestamps.frombytes(columns['timestamp'].astype('<i8').tobytes())
+            for x in range(0, len(self.numeric)):
+                name, code = self.numeric[x]
+                self.values[x].frombytes(columns[name].astype(code).tobytes())
+            for x in range(0, len(self.strings)):
+                self.texts[x].extend(columns[self.strings[x]])
+            pending = self.pending
+            self.touch()
+            return pending
+
+    def touch(self):
+        if self.oldest is None:
+            self.oldest = time.time()
+        if len(self.ids) >= self.chunk_rows:
+            self.write()
+
+    def flush(self):
+        with self.lock:
+            if not self.closed:
+                self.write()
+
+    def write(self):
+        count = len(self.ids)
+        if not count:
+            return
+        # Las lecturas de un wearable quedan juntas y en orden para buscarlas por bisección
+        order = sorted(range(0, count), key=lambda x: (self.ids[x], self.timestamps[x]))
+        ids = array.array('I', [self.ids[x] for x in order])
+        base = min(self.timestamps)
+        offsets = array.array('i', [self.timestamps[x] - base for x in order])
+        parts = [pad(ids.tobytes()), pad(offsets.tobytes())]
+        for values in self.values:
+            parts.append(pad(array.array(values.typecode, [values[x] for x in order]).tobytes()))
+        for texts in self.texts:
+            encoded = [texts[x].encode('utf-8') for x in order]
+            starts = array.array('I', [0])
+            for text in encoded:
+                starts.append(starts[-1] + len(text))
+            parts.append(pad(starts.tobytes()))
+            parts.append(pad(b''.join(encoded)))
+        payload = b''.join(parts)
+        header = BLOQUE.pack(MAGIC_BLOQUE, count, base, base, max(self.timestamps), ids[0], ids[-1],
+                             len(payload), zlib.crc32(payload))
+        # Encabezado y columnas en una sola escritura
+        self.file.write(header + payload)
+        self.file.flush()
+        if self.fsync:
+            os.fsync(self.file.fileno())
+        self.reset()
+        self.oldest = None
+        self.pending.set()
+        self.pending = threading.Event()
+
+    def close(self):
+        with self.lock:
+            if self.closed:
+                return
+            self.write()
+            self.file.close()
+            self.closed = True
+
+
+class LectorDeArchivo:
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        size = os.fstat(self.file.fileno()).st_size
+        self.map = mmap.mmap(self.file.fileno(), size, access=mmap.ACCESS_READ)
+        magic, tipo, formato = ARCHIVO.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise ValueError(path + ' no es un archivo de signos vitales')
+        # Los archivos escritos antes de guardar la versión tienen un 0 y usan el formato 1
+        formato = formato or 1
+        if formato not in FORMATOS or tipo not in FORMATOS[formato]:
+            raise ValueError(path + ' tiene un formato desconocido: ' + str(formato) + ', tipo ' +
+                             str(tipo))
+        self.vital = FORMATOS[formato][tipo][0]
+        self.numeric, self.strings = columns(self.vital, formato, tipo)
+        self.blocks, end = read_blocks(self.map, size)
+        self.view = memoryview(self.map)
+
+    def columns(self, bloque):
+        # Vistas sobre el archivo proyectado en memoria, no se copian las columnas
+        result = {}
+        offset = bloque.offset
+        count = bloque.count
+        for name, code in [('id', 'I'), ('timestamp', 'i')] + self.numeric:
+            size = struct.calcsize(code) * count
+            result[name] = self.view[offset:offset + size].cast(code)
+            offset += size + (-size % 8)
+        for name in self.strings:
+            size = 4 * (count + 1)
+            starts = self.view[offset:offset + size].cast('I')
+            offset += size + (-size % 8)
+            result[name] = (starts, offset)
+            offset += starts[count] + (-starts[count] % 8)
+        return result
+
+    def rows(self, bloque, data, device=None, start=None, end=None):
+        first, last = 0, bloque.count
+        ids = data['id']
+        if device is not None:
+            first = bisect.bisect_left(ids, device)
+            last = bisect.bisect_right(ids, device, first)
+            # Las lecturas de un wearable están ordenadas por hora
+            offsets = data['timestamp']
+            if start is not None:
+                first = bisect.bisect_left(offsets, start - bloque.base, first, last)
+            if end is not None:
+                last = bisect.bisect_left(offsets, end - bloque.base, first, last)
+        return first, last
+
+    def text(self, data, name, index):
+        starts, offset = data[name]
+        return bytes(self.view[offset + starts[index]:offset + starts[index + 1]]).decode('utf-8')
+
+    def scan(self, device=None, start=None, end=None):
+        for bloque in self.blocks:
+            # Los bloques que no pueden tener lecturas del filtro se descartan por su encabezado
+            if device is not None and not bloque.min_id <= device <= bloque.max_id:
+                continue
+            if start is not None and bloque.max_ts < start:
+                continue
+            if end is not None and bloque.min_ts >= end:
+                continue
+            data = self.columns(bloque)
+            first, last = self.rows(bloque, data, device, start, end)
+            offsets = data['timestamp']
+            for x in range(first, last):
+                timestamp = bloque.base + offsets[x]
+                if (start is not None and timestamp < start) or (end is not None and timestamp >= end):
+                    continue
+                message = {'id': data['id'][x], 'timestamp': timestamp}
+                for name, code in self.numeric:
+                    message[name] = data[name][x]
+                for name in self.strings:
+                    message[name] = self.text(data, name, x)
+                yield message
+
+    def close(self):
+        self.view.release()
+        self.map.close()
+        self.file.close()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#-------------------------------------------------------------------------
+# Archivo: configuracion_de_reglas.py
+# Capitulo: 3 Estilo Publica-Subscribe
+# Autor(es): Perla Velasco & Yonathan Mtz.
+# Version: 1.0.0 Octubre 2026
+# Descripción:
+#
+#   Éste módulo carga los umbrales y las ventanas de los procesadores de un archivo JSON, por
+#   signo vital y por wearable, y los vuelve a cargar cuando el archivo cambia sin detener a
+#   los procesadores.
+#
+#   Las características de éste módulo son las siguientes:
+#
+#                                    configuracion_de_reglas.py
+#           +-----------------------+-------------------------+------------------------+
+#           |  Nombre del elemento  |     Responsabilidad     |      Propiedades       |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Decidir si un valor  |  - Se compila una vez  |
+#           |        Umbral         |    de un signo vital es |    por carga, sin umbra|
+#           |                       |    extremo.             |    les por wearable la |
+#           |                       |                         |    comparación no busca|
+#           |                       |                         |    el id.              |
+#           |                       |                         |  - Compara un lote com-|
+#           |                       |                         |    pleto con numpy.    |
+#           |                       |                         |  - No se modifica, una |
+#           |                       |                         |    carga crea otro.    |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Cargar el archivo de |  - Sin archivo usa los |
+#           |     Configuracion     |    reglas.              |    umbrales de siempre.|
+#           |       de Reglas       |  - Avisar a los procesa-|  - Revisa la fecha y el|
+#           |                       |    dores de los cambios.|    tamaño del archivo  |
+#           |                       |                         |    en un hilo.         |
+#           |                       |                         |  - Un archivo inválido |
+#           |                       |                         |    no reemplaza a los  |
+#           |                       |                         |    umbrales cargados.  |
+#           +-----------------------+-------------------------+------------------------+
+#
+#   A continuación se describen los métodos que se implementaron en éste módulo:
+#
+#                                               Métodos:
+#           +------------------------+--------------------------+-----------------------+
+#           |         Nombre         |        Parámetros        |        Función        |
+#           +------------------------+--------------------------+-----------------------+
+#           |                        |  - config: diccionario   |  - Regresa un Umbral  |
+#           |       compilar()       |     del archivo.         |    por signo vital.   |
+#           |                        |  - window: ventana por   |                       |
+#           |                        |     omisión.             |                       |
+#           +------------------------+--------------------------+-----------------------+
+#           |                        |  - value: valor del sig- |  - Regresa True si el |
+#           |       exceeds()        |     no vital.            |    valor es extremo   |
+#           |                        |  - message: lectura.     |    para el wearable.  |
+#           +------------------------+--------------------------+-----------------------+
+#           |                        |  - values: columna del   |  - Regresa un arreglo |
+#           |         mask()         |     lote.                |    de booleanos con   |
+#           |                        |  - lote: mensajes.       |    los valores extre- |
+#           |                        |                          |    mos.               |
+#           +------------------------+--------------------------+-----------------------+
+#           |        limit()         |  - id: wearable.         |  - Regresa el umbral  |
+#           |                        |                          |    del wearable.      |
+#           +------------------------+--------------------------+-----------------------+
+#           |                        |  - callback: función que |  - Entrega los umbra- |
+#           |      subscribe()       |     recibe los umbrales. |    les actuales y los |
+#           |                        |                          |    de cada recarga.   |
+#           +------------------------+--------------------------+-----------------------+
+#           |        reload()        |          Ninguno         |  - Carga el archivo si|
+#           |                        |                          |    cambió.            |
+#           +------------------------+--------------------------+-----------------------+
+#           |    start(), stop()     |          Ninguno         |  - Inician o detienen |
+#           |                        |                          |    la revisión del ar-|
+#           |                        |                          |    chivo.             |
+#           +------------------------+--------------------------+-----------------------+
+#
+#           Nota: el archivo tiene la forma
+#
+#               {"signos_vitales": {"heart_rate": {"umbral": 110, "ventana": 60}, ...},
+#                "wearables": {"39722608": {"heart_rate": {"umbral": 120}}}}
+#
+#           Los signos vitales que no aparecen conservan el umbral por omisión.
+#
+#-------------------------------------------------------------------------
+import json
+import os
+import sys
+import threading
+import traceback
+sys.path.append('../')
+import metricas
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Umbrales que se usan cuando el archivo no define otros
+UMBRALES = {'body_temperature': 69, 'heart_rate': 110, 'blood_preasure': 110, 'positions': 2}
+# Signos vitales que pueden exigir que el valor extremo se mantenga durante una ventana
+VENTANAS = ('body_temperature', 'heart_rate', 'blood_preasure')
+
+RECARGAS = metricas.counter('smam_recargas_de_reglas_total',
+                            'Cargas del archivo de reglas', ('resultado',))
+
+
+class Umbral:
+    __slots__ = ('vital', 'threshold', 'window', 'overrides', 'ids', 'limits', 'exceeds')
+
+    def __init__(self, vital, threshold, window=None, overrides=None):
+        self.vital = vital
+        self.threshold = threshold
+        self.window = window
+        # Umbral de los wearables que no usan el del signo vital
+        self.overrides = overrides or {}
+        self.ids = None
+        self.limits = None
+        if not self.overrides:
+            # El caso común compara contra una constante, igual que antes de leer el archivo
+            self.exceeds = lambda value, message: value > threshold
+        else:
+            get = self.overrides.get
+            # Los mensajes de texto y JSON traen el id como cadena, los umbrales usan enteros
+            self.exceeds = lambda value, message: value > get(int(message['id']), threshold)
+            if numpy is not None:
+                ids = sorted(self.overrides)
+                self.ids = numpy.array(ids, dtype='i8')
+                self.limits = numpy.array([self.overrides[id] for id in ids], dtype='f8')
+
+    def limit(self, id):
+        return self.overrides.get(int(id), self.threshold)
+
+    def mask(self, values, lote):
+        if self.ids is None:
+            return values > self.threshold
+        # Se busca el umbral de cada wearable del lote entre los ids ordenados
+        ids = lote.column('id').astype('i8')
+        positions = numpy.minimum(numpy.searchsorted(self.ids, ids), len(self.ids) - 1)
+        limits = numpy.where(self.ids[positions] == ids, self.limits[positions], self.threshold)
+        return values > limits
+
+
+def number(value, name):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(name + ' debe ser un número: ' + repr(value))
+    return value
+
+
+def compilar(config, window=None):
+    if not isinstance(config, dict):
+        raise ValueError('El archivo de reglas debe contener un objeto')
+    unknown = set(config) - {'signos_vitales', 'wearables'}
+    if unknown:
+        raise ValueError('Secciones desconocidas en el archivo de reglas: ' +
+                         ', '.join(sorted(unknown)))
+    thresholds = dict(UMBRALES)
+    windows = dict((vital, window) for vital in VENTANAS)
+    for vital, entry in config.get('signos_vitales', {}).items():
+        if vital not in UMBRALES or not isinstance(entry, dict):
+            raise ValueError('Regla inválida para el signo vital ' + repr(vital))
+        for key in set(entry) - {'umbral', 'ventana'}:
+            raise ValueError('Campo desconocido en ' + vital + ': ' + repr(key))
+        if 'umbral' in entry:
+            thresholds[vital] = number(entry['umbral'], vital + '.umbral')
+        if 'ventana' in entry:
+            if vital not in VENTANAS:
+                raise ValueError(vital + ' no admite ventana')
+            # null o 0 notifican cada valor extremo
+            ventana = entry['ventana']
+            if ventana is not None:
+                ventana = number(ventana, vital + '.ventana') or None
+            windows[vital] = ventana
+    overrides = dict((vital, {}) for vital in UMBRALES)
+    for id, entries in config.get('wearables', {}).items():
+        try:
+            key = int(id)
+        except ValueError:
+            raise ValueError('Id de wearable inválido: ' + repr(id))
+        if not isinstance(entries, dict):
+            raise ValueError('Reglas inválidas para el wearable ' + id)
+        for vital, entry in entries.items():
+            if vital not in UMBRALES or not isinstance(entry, dict) or set(entry) != {'umbral'}:
+                raise ValueError('Regla inválida para el wearable ' + id + ': ' + repr(vital))
+            overrides[vital][key] = number(entry['umbral'], id + '.' + vital + '.umbral')
+    return dict((vital, Umbral(vital, thresholds[vital], windows.get(vital), overrides[vital]))
+                for vital in UMBRALES)
+
+
+def load(path, window=None):
+    with open(path) as file:
+        return compilar(json.load(file), window)
+
+
+class ConfiguracionDeReglas:
+
+    def __init__(self, path=None, window=None, interval=2.0):
+        self.path = path
+        self.window = window
+        self.interval = interval
+        self.signature = None
+        self.listeners = []
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+        self.rules = compilar({}, window)
+        if path is not None:
+            # Al iniciar, un archivo inválido sí detiene al procesador
+            self.signature = self.stat()
+            self.rules = load(path, window)
+            RECARGAS.labels('ok').inc()
+
+    def stat(self):
+        result = os.stat(self.path)
+        return (result.st_ino, result.st_mtime_ns, result.st_size)
+
+    def subscribe(self, callback):
+        with self.lock:
+            self.listeners.append(callback)
+            callback(self.rules)
+
+    def reload(self):
+        signature = None
+        try:
+            signature = self.stat()
+            if signature == self.signature:
+                return False
+            rules = load(self.path, self.window)
+        except Exception:
+            # Se conservan los umbrales cargados hasta que el archivo se corrija
+            if signature != self.signature:
+                traceback.print_exc()
+                RECARGAS.labels('error').inc()
+                self.signature = signature
+            return False
+        with self.lock:
+            self.signature = signature
+            self.rules = rules
+            for callback in self.listeners:
+                callback(rules)
+        RECARGAS.labels('ok').inc()
+        print('Reglas cargadas de ' + self.path)
+        return True
+
+    def start(self):
+        if self.path is None or self.thread is not None:
+            return
+
+        def watch():
+            while not self.stopped.wait(self.interval):
+                self.reload()
+        self.thread = threading.Thread(target=watch, name='reglas')
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
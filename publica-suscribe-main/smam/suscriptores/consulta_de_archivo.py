@@ -0,0 +1,365 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#-------------------------------------------------------------------------
+# Archivo: consulta_de_archivo.py
+# Capitulo: 3 Estilo Publica-Subscribe
+# Autor(es): Perla Velasco & Yonathan Mtz.
+# Version: 1.0.0 Octubre 2026
+# Descripción:
+#
+#   Éste módulo responde consultas sobre el archivo histórico de signos vitales, por ejemplo
+#   el ritmo cardiaco de un wearable en las últimas 24 horas, sin recorrer todo el archivo.
+#
+#   Las características de éste módulo son las siguientes:
+#
+#                                      consulta_de_archivo.py
+#           +-----------------------+-------------------------+------------------------+
+#           |  Nombre del elemento  |     Responsabilidad     |      Propiedades       |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Indicar en qué blo-  |  - Una entrada por     |
+#           |      Índice de        |    ques y renglones     |    wearable y bloque:  |
+#           |       Archivo         |    están las lecturas   |    renglones y rango de|
+#           |                       |    de cada wearable.    |    tiempo.             |
+#           |                       |                         |  - Se guarda junto al  |
+#           |                       |                         |    archivo (.idx) y só-|
+#           |                       |                         |    lo se agregan los   |
+#           |                       |                         |    bloques nuevos.     |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Mantener en memoria  |  - LRU acotado por     |
+#           |      Caché de         |    los bloques consulta-|    bytes.              |
+#           |       Bloques         |    dos recientemente.   |                        |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Regresar las lectu-  |  - Sólo lee los bloques|
+#           |     Consulta de       |    ras de un wearable en|    que indica el índi- |
+#           |       Archivo         |    un rango de tiempo.  |    ce.                 |
+#           |                       |  - Calcular mínimo, má- |                        |
+#           |                       |    ximo, promedio y per-|                        |
+#           |                       |    centiles por cubeta. |                        |
+#           +-----------------------+-------------------------+------------------------+
+#
+#   A continuación se describen los métodos que se implementaron en éste módulo:
+#
+#                                               Métodos:
+#           +------------------------+--------------------------+-----------------------+
+#           |         Nombre         |        Parámetros        |        Función        |
+#           +------------------------+--------------------------+-----------------------+
+#           |   IndiceDeArchivo()    |  - reader: lector del    |  - Carga el índice y  |
+#           |                        |     archivo.             |    agrega los bloques |
+#           |                        |                          |    que faltan.        |
+#           +------------------------+--------------------------+-----------------------+
+#           |         load()         |          Ninguno         |  - Lee el índice guar-|
+#           |                        |                          |    dado.              |
+#           +------------------------+--------------------------+-----------------------+
+#           |        update()        |  - reader: lector del    |  - Indexa los bloques |
+#           |                        |     archivo.             |    nuevos y los guar- |
+#           |                        |                          |    da.                |
+#           +------------------------+--------------------------+-----------------------+
+#           |        lookup()        |  - device: wearable.     |  - Regresa las entra- |
+#           |                        |  - start, end: milisegun-|    das del wearable en|
+#           |                        |     dos.                 |    el rango.          |
+#           +------------------------+--------------------------+-----------------------+
+#           |    CacheDeBloques()    |  - max_bytes: memoria    |  - Inicializa el ca-  |
+#           |                        |     máxima.              |    ché.               |
+#           +------------------------+--------------------------+-----------------------+
+#           |          get()         |  - key: archivo y bloque.|  - Regresa el bloque  |
+#           |                        |  - load: función que lee |    del caché o lo lee.|
+#           |                        |     el bloque.           |                       |
+#           +------------------------+--------------------------+-----------------------+
+#           |   ConsultaDeArchivo()  |  - root: carpeta del ar- |  - Inicializa la con- |
+#           |                        |     chivo.               |    sulta.             |
+#           |                        |  - cache_bytes: memoria  |                       |
+#           |                        |     del caché.           |                       |
+#           +------------------------+--------------------------+-----------------------+
+#           |         open()         |  - path: archivo.        |  - Regresa el lector  |
+#           |                        |                          |    y el índice del ar-|
+#           |                        |                          |    chivo.             |
+#           +------------------------+--------------------------+-----------------------+
+#           |         block()        |  - reader, number: bloque|  - Regresa las colum- |
+#           |                        |     del archivo.         |    nas del bloque.    |
+#           +------------------------+--------------------------+-----------------------+
+#           |       readings()       |  - vital, device.        |  - Regresa las lectu- |
+#           |                        |  - start, end: milisegun-|    ras del wearable en|
+#           |                        |     dos.                 |    el rango.          |
+#           +------------------------+--------------------------+-----------------------+
+#           |      aggregate()       |  - vital, device, start, |  - Regresa lecturas,  |
+#           |                        |     end.                 |    mínimo, máximo,    |
+#           |                        |  - bucket: milisegundos  |    promedio y percen- |
+#           |                        |     por cubeta.          |    tiles de cada cube-|
+#           |                        |  - field: campo.         |    ta.                |
+#           |                        |  - percentiles: lista.   |                       |
+#           +------------------------+--------------------------+-----------------------+
+#           |         close()        |          Ninguno         |  - Cierra los archi-  |
+#           |                        |                          |    vos.               |
+#           +------------------------+--------------------------+-----------------------+
+#
+#           Nota: el índice no guarda cada lectura, sólo dónde empiezan y terminan las de un
+#           wearable en cada bloque, dentro del bloque las lecturas se buscan por bisección.
+#
+#-------------------------------------------------------------------------
+import argparse
+import array
+import bisect
+import collections
+import json
+import os
+import struct
+import sys
+import time
+sys.path.append('../')
+import codec
+import archivo_de_signos
+from archivo_de_signos import LectorDeArchivo
+
+MAGIC = b'SMIDX001'
+# Encabezado: identificador, bytes y bloques del archivo ya indexados
+ENCABEZADO = struct.Struct('<8sQI4x')
+# Entrada: wearable, bloque, primer y último renglón, timestamp mínimo y máximo
+ENTRADA = struct.Struct('<IIIIqq')
+PERCENTILES = (50, 95)
+
+
+class IndiceDeArchivo:
+
+    def __init__(self, reader):
+        self.path = reader.path + '.idx'
+        # wearable -> [(bloque, primer renglón, último renglón, timestamp mínimo y máximo)]
+        self.devices = collections.defaultdict(list)
+        self.size = 0
+        self.blocks = 0
+        # Bytes del índice guardado con entradas válidas
+        self.length = ENCABEZADO.size
+        self.load()
+        self.update(reader)
+
+    def load(self):
+        try:
+            with open(self.path, 'rb') as file:
+                data = file.read()
+        except (IOError, OSError):
+            return
+        if len(data) < ENCABEZADO.size or ENCABEZADO.unpack_from(data)[0] != MAGIC:
+            return
+        magic, self.size, self.blocks = ENCABEZADO.unpack_from(data)
+        for values in ENTRADA.iter_unpack(data[ENCABEZADO.size:]):
+            # Las entradas de un bloque que no alcanzó a registrarse en el encabezado se ignoran
+            if values[1] >= self.blocks:
+                break
+            self.devices[values[0]].append(values[1:])
+            self.length += ENTRADA.size
+
+    def update(self, reader):
+        end = reader.blocks[-1].offset + reader.blocks[-1].length if reader.blocks else 0
+        rebuild = end < self.size or not os.path.exists(self.path)
+        if end < self.size:
+            # El archivo se recortó al recuperarse, el índice se construye de nuevo
+            self.devices.clear()
+            self.blocks = 0
+            self.length = ENCABEZADO.size
+        entries = []
+        for number in range(self.blocks, len(reader.blocks)):
+            bloque = reader.blocks[number]
+            data = reader.columns(bloque)
+            ids, offsets = data['id'], data['timestamp']
+            first = 0
+            # Las lecturas están ordenadas por wearable, se salta de un wearable al siguiente
+            while first < bloque.count:
+                device = ids[first]
+                last = bisect.bisect_right(ids, device, first)
+                entry = (number, first, last, bloque.base + offsets[first],
+                         bloque.base + offsets[last - 1])
+                self.devices[device].append(entry)
+                entries.append((device,) + entry)
+                first = last
+            del data, ids, offsets
+        self.blocks = len(reader.blocks)
+        if end == self.size and not rebuild:
+            return
+        self.size = end
+        if rebuild:
+            entries = [(device,) + entry for device in self.devices
+                       for entry in self.devices[device]]
+        try:
+            with open(self.path, 'wb' if rebuild else 'r+b') as file:
+                # Las entradas nuevas se agregan al final y después se actualiza el encabezado
+                if rebuild:
+                    file.write(ENCABEZADO.pack(MAGIC, 0, 0))
+                    self.length = ENCABEZADO.size
+                file.seek(self.length)
+                file.truncate()
+                file.write(b''.join(ENTRADA.pack(*entry) for entry in entries))
+                file.seek(0)
+                file.write(ENCABEZADO.pack(MAGIC, self.size, self.blocks))
+                self.length += ENTRADA.size * len(entries)
+        except (IOError, OSError):
+            # Sin permiso de escritura el índice sólo se mantiene en memoria
+            pass
+
+    def lookup(self, device, start=None, end=None):
+        return [entry for entry in self.devices.get(device, ())
+                if (start is None or entry[4] >= start) and (end is None or entry[3] < end)]
+
+
+class CacheDeBloques:
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.blocks = collections.OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, load):
+        value = self.blocks.get(key)
+        if value is not None:
+            self.hits += 1
+            self.blocks.move_to_end(key)
+            return value[0]
+        self.misses += 1
+        columns, size = load()
+        self.blocks[key] = (columns, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes and len(self.blocks) > 1:
+            # Se descartan los bloques consultados hace más tiempo
+            old_key, old = self.blocks.popitem(last=False)
+            self.bytes -= old[1]
+        return columns
+
+
+class ConsultaDeArchivo:
+
+    def __init__(self, root='archivo', cache_bytes=64 * 1024 * 1024):
+        self.root = root
+        self.cache = CacheDeBloques(cache_bytes)
+        # archivo -> (bytes, lector, índice)
+        self.files = {}
+
+    def open(self, path):
+        size = os.path.getsize(path)
+        opened = self.files.get(path)
+        if opened is not None and opened[0] == size:
+            return opened[1], opened[2]
+        # El archivador agregó bloques desde la última consulta, sólo se indexan los nuevos
+        if opened is not None:
+            opened[1].close()
+        reader = LectorDeArchivo(path)
+        index = opened[2] if opened is not None else None
+        if index is None:
+            index = IndiceDeArchivo(reader)
+        else:
+            index.update(reader)
+        self.files[path] = (size, reader, index)
+        return reader, index
+
+    def block(self, reader, number):
+        def load():
+            bloque = reader.blocks[number]
+            data = reader.columns(bloque)
+            # Se copian las columnas para no mantener vistas sobre el archivo proyectado
+            columns = {'id': array.array('I', data['id']),
+                       'timestamp': array.array('q', [bloque.base + x for x in data['timestamp']])}
+            size = bloque.count * 12
+            for name, code in reader.numeric:
+                columns[name] = array.array(code, data[name])
+                size += columns[name].itemsize * bloque.count
+            for name in reader.strings:
+                columns[name] = [reader.text(data, name, x) for x in range(0, bloque.count)]
+                size += sum(len(text) for text in columns[name]) + 8 * bloque.count
+            return columns, size
+        return self.cache.get((reader.path, number), load)
+
+    def readings(self, vital, device, start=None, end=None):
+        result = []
+        for path in archivo_de_signos.files(self.root, vital, start, end):
+            reader, index = self.open(path)
+            for number, first, last, min_ts, max_ts in index.lookup(device, start, end):
+                columns = self.block(reader, number)
+                timestamps = columns['timestamp']
+                if start is not None:
+                    first = bisect.bisect_left(timestamps, start, first, last)
+                if end is not None:
+                    last = bisect.bisect_left(timestamps, end, first, last)
+                for x in range(first, last):
+                    result.append(dict((name, columns[name][x]) for name in columns))
+        result.sort(key=lambda message: message['timestamp'])
+        return result
+
+    def aggregate(self, vital, device, start, end, bucket, field=None, percentiles=PERCENTILES):
+        if field is None:
+            field = archivo_de_signos.columns(vital)[0][0][0]
+        buckets = collections.defaultdict(list)
+        for message in self.readings(vital, device, start, end):
+            buckets[(message['timestamp'] - start) // bucket].append(message[field])
+        result = []
+        for number in sorted(buckets):
+            values = sorted(buckets[number])
+            summary = {'start': start + number * bucket, 'count': len(values),
+                       'min': values[0], 'max': values[-1],
+                       'mean': sum(values) / float(len(values))}
+            for p in percentiles:
+                summary['p' + str(p)] = values[min(len(values) - 1, int(len(values) * p / 100))]
+            result.append(summary)
+        return result
+
+    def close(self):
+        for size, reader, index in self.files.values():
+            reader.close()
+        self.files.clear()
+
+
+def parse_time(text):
+    # Milisegundos desde epoch o fecha local AAAA-MM-DDTHH:MM
+    if text.isdigit():
+        return int(text)
+    return int(time.mktime(time.strptime(text, '%Y-%m-%dT%H:%M'))) * 1000
+
+
+def print_readings(readings):
+    for message in readings:
+        values = ['{}={}'.format(name, message[name]) for name in message
+                  if name not in ('id', 'timestamp')]
+        print(time.strftime('%d:%m:%Y:%H:%M:%S', time.localtime(message['timestamp'] / 1000.0)) +
+              '  ' + '  '.join(values))
+
+
+def print_buckets(buckets, percentiles):
+    names = ['count', 'min', 'max', 'mean'] + ['p' + str(p) for p in percentiles]
+    print('{:<20}'.format('inicio') + ''.join('{:>10}'.format(name) for name in names))
+    for summary in buckets:
+        print('{:<20}'.format(time.strftime('%d:%m:%Y:%H:%M', time.localtime(summary['start'] / 1000.0))) +
+              ''.join('{:>10}'.format(round(summary[name], 2)) for name in names))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Consulta del archivo histórico de signos vitales')
+    parser.add_argument('vital', choices=sorted(codec.ESQUEMAS), help='signo vital')
+    parser.add_argument('--wearable', type=int, required=True, help='id del wearable')
+    parser.add_argument('--carpeta', default='archivo', help='carpeta del archivo histórico')
+    parser.add_argument('--ultimas', type=float, default=24, help='horas hasta ahora')
+    parser.add_argument('--desde', type=parse_time,
+                        help='inicio, en milisegundos o AAAA-MM-DDTHH:MM (en lugar de --ultimas)')
+    parser.add_argument('--hasta', type=parse_time, help='fin, por omisión ahora')
+    parser.add_argument('--cubeta', type=float,
+                        help='minutos por cubeta, con ésta opción se imprimen los agregados')
+    parser.add_argument('--campo', help='campo que se agrega, por omisión el primero')
+    parser.add_argument('--percentiles', default='50,95', help='percentiles de cada cubeta')
+    parser.add_argument('--cache', type=int, default=64, help='megabytes del caché de bloques')
+    parser.add_argument('--json', action='store_true', help='imprime el resultado en JSON')
+    args = parser.parse_args()
+    end = args.hasta if args.hasta is not None else int(time.time() * 1000)
+    start = args.desde if args.desde is not None else end - int(args.ultimas * 3600000)
+    consulta = ConsultaDeArchivo(args.carpeta, args.cache * 1024 * 1024)
+    if args.cubeta:
+        percentiles = [float(p) if '.' in p else int(p) for p in args.percentiles.split(',')]
+        result = consulta.aggregate(args.vital, args.wearable, start, end,
+                                    int(args.cubeta * 60000), args.campo, percentiles)
+        if args.json:
+            print(json.dumps(result, indent=2))
+        else:
+            print_buckets(result, percentiles)
+    else:
+        result = consulta.readings(args.vital, args.wearable, start, end)
+        if args.json:
+            print(json.dumps(result, indent=2))
+        else:
+            print_readings(result)
+    consulta.close()
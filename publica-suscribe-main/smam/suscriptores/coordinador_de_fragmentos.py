@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#-------------------------------------------------------------------------
+# Archivo: coordinador_de_fragmentos.py
+# Capitulo: 3 Estilo Publica-Subscribe
+# Autor(es): Perla Velasco & Yonathan Mtz.
+# Version: 1.0.0 Octubre 2026
+# Descripción:
+#
+#   Ésta clase reparte los fragmentos de un suscriptor entre sus instancias activas, cada
+#   instancia anuncia que sigue activa en el distribuidor de mensajes y todas calculan el mismo
+#   reparto a partir de las instancias que conocen.
+#
+#   Las características de ésta clase son las siguientes:
+#
+#                                   coordinador_de_fragmentos.py
+#           +-----------------------+-------------------------+------------------------+
+#           |  Nombre del elemento  |     Responsabilidad     |      Propiedades       |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Anunciar a las demás |  - Latidos en el ex-   |
+#           |     Coordinador de    |    instancias que la    |    change smam.coordi- |
+#           |      Fragmentos       |    instancia está acti- |    nacion con el nombre|
+#           |                       |    va.                  |    del suscriptor como |
+#           |                       |  - Calcular los frag-   |    routing key.        |
+#           |                       |    mentos que atiende   |  - Reparto por hash de |
+#           |                       |    la instancia.        |    rendezvous, al en-  |
+#           |                       |                         |    trar o salir una    |
+#           |                       |                         |    instancia sólo cam- |
+#           |                       |                         |    bian de dueño sus   |
+#           |                       |                         |    fragmentos.         |
+#           |                       |                         |  - Una instancia sin   |
+#           |                       |                         |    latidos durante el  |
+#           |                       |                         |    timeout se conside- |
+#           |                       |                         |    ra caída.           |
+#           +-----------------------+-------------------------+------------------------+
+#
+#   A continuación se describen los métodos que se implementaron en ésta clase:
+#
+#                                               Métodos:
+#           +------------------------+--------------------------+-----------------------+
+#           |         Nombre         |        Parámetros        |        Función        |
+#           +------------------------+--------------------------+-----------------------+
+#           |                        |  - group: nombre del sus-|  - Inicializa el coor-|
+#           |       __init__()       |     criptor.             |    dinador.           |
+#           |                        |  - shards: número de     |                       |
+#           |                        |     fragmentos.          |                       |
+#           |                        |  - member: nombre de la  |                       |
+#           |                        |     instancia, por omi-  |                       |
+#           |                        |     sión host y pid.     |                       |
+#           |                        |  - interval: segundos    |                       |
+#           |                        |     entre latidos.       |                       |
+#           |                        |  - timeout: segundos sin |                       |
+#           |                        |     latidos para dar por |                       |
+#           |                        |     caída una instancia. |                       |
+#           +------------------------+--------------------------+-----------------------+
+#           |        setup()         |  - channel: canal de     |  - Declara la cola de |
+#           |                        |     coordinación.        |    latidos de la ins- |
+#           |                        |                          |    tancia.            |
+#           +------------------------+--------------------------+-----------------------+
+#           |                        |  - channel, method, pro- |  - Registra el latido |
+#           |     on_heartbeat()     |     perties, body: pro-  |    o la salida de una |
+#           |                        |     pios de Rabbit.      |    instancia.         |
+#           +------------------------+--------------------------+-----------------------+
+#           |         beat()         |  - leaving: indica que la|  - Publica un latido. |
+#           |                        |     instancia sale.      |                       |
+#           +------------------------+--------------------------+-----------------------+
+#           |         tick()         |  - now: segundos.        |  - Envía el latido,   |
+#           |                        |                          |    olvida a las ins-  |
+#           |                        |                          |    tancias caídas y   |
+#           |                        |                          |    regresa los frag-  |
+#           |                        |                          |    mentos propios.    |
+#           +------------------------+--------------------------+-----------------------+
+#           |      assignment()      |          Ninguno         |  - Calcula los frag-  |
+#           |                        |                          |    mentos de la ins-  |
+#           |                        |                          |    tancia.            |
+#           +------------------------+--------------------------+-----------------------+
+#           |         leave()        |          Ninguno         |  - Avisa a las demás  |
+#           |                        |                          |    instancias que la  |
+#           |                        |                          |    instancia sale.    |
+#           +------------------------+--------------------------+-----------------------+
+#
+#           Nota: una instancia nueva espera un intervalo y medio antes de tomar fragmentos
+#           para conocer a las instancias activas, mientras tanto los mensajes de los frag-
+#           mentos que le corresponden esperan en sus colas.
+#
+#-------------------------------------------------------------------------
+import hashlib
+import json
+import os
+import socket
+import time
+
+EXCHANGE = 'smam.coordinacion'
+
+
+def weight(shard, member):
+    # Se usa md5 porque hash() cambia entre procesos y todas las instancias deben coincidir
+    digest = hashlib.md5((str(shard) + ':' + member).encode('utf-8')).hexdigest()
+    return int(digest[:16], 16)
+
+
+class CoordinadorDeFragmentos:
+
+    def __init__(self, group, shards, member=None, interval=2.0, timeout=6.0):
+        self.group = group
+        self.shards = shards
+        if member is None:
+            member = socket.gethostname() + ':' + str(os.getpid())
+        self.member = member
+        self.interval = interval
+        self.timeout = timeout
+        # Instancias conocidas y el momento de su último latido
+        self.members = {}
+        self.view = None
+        self.owned = set()
+        self.channel = None
+        self.started = None
+        self.last_beat = None
+
+    def setup(self, channel):
+        self.channel = channel
+        channel.exchange_declare(exchange=EXCHANGE, exchange_type='topic', durable=True)
+        # La cola es exclusiva de la instancia y el distribuidor la elimina al cerrar la conexión
+        result = channel.queue_declare(queue='', exclusive=True, auto_delete=True)
+        queue = result.method.queue
+        channel.queue_bind(queue=queue, exchange=EXCHANGE, routing_key=self.group)
+        channel.basic_consume(queue=queue, on_message_callback=self.on_heartbeat, auto_ack=True)
+
+    def on_heartbeat(self, channel, method, properties, body):
+        message = json.loads(body)
+        if message['leaving']:
+            self.members.pop(message['member'], None)
+        else:
+            self.members[message['member']] = time.time()
+
+    def beat(self, leaving=False):
+        self.channel.basic_publish(exchange=EXCHANGE, routing_key=self.group,
+                                   body=json.dumps({'member': self.member, 'leaving': leaving}))
+
+    def tick(self, now):
+        if self.started is None:
+            self.started = now
+        if self.last_beat is None or now - self.last_beat >= self.interval:
+            self.last_beat = now
+            self.beat()
+        self.members[self.member] = now
+        for member, seen in list(self.members.items()):
+            if now - seen > self.timeout:
+                del self.members[member]
+        if now - self.started < self.interval * 1.5:
+            return None
+        view = tuple(sorted(self.members))
+        if view != self.view:
+            # El reparto sólo se recalcula cuando cambian las instancias conocidas
+            self.view = view
+            self.owned = self.assignment()
+        return self.owned
+
+    def assignment(self):
+        owned = set()
+        for shard in range(0, self.shards):
+            # Cada fragmento es de la instancia con mayor peso, sin importar cuántas haya
+            owner = max(self.members, key=lambda member: weight(shard, member))
+            if owner == self.member:
+                owned.add(shard)
+        return owned
+
+    def leave(self):
+        if self.channel is not None and self.channel.is_open:
+            self.beat(leaving=True)
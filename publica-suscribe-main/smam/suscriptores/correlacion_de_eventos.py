@@ -0,0 +1,337 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#-------------------------------------------------------------------------
+# Archivo: correlacion_de_eventos.py
+# Capitulo: 3 Estilo Publica-Subscribe
+# Autor(es): Perla Velasco & Yonathan Mtz.
+# Version: 1.0.0 Octubre 2026
+# Descripción:
+#
+#   Esta clase define el rol de un suscriptor que relaciona los eventos de varios signos vitales
+#   de un mismo wearable, por ejemplo una caída seguida de un ritmo cardiaco elevado en menos
+#   de 30 segundos, lo que ningún procesador ve al atender sólo su propia cola.
+#
+#   Las características de éste módulo son las siguientes:
+#
+#                                   correlacion_de_eventos.py
+#           +-----------------------+-------------------------+------------------------+
+#           |  Nombre del elemento  |     Responsabilidad     |      Propiedades       |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Indicar si un mensaje|  - Un solo valor para  |
+#           |        Evento         |    de un signo vital es |    mensajes y para co- |
+#           |                       |    un evento.           |    lumnas de un lote.  |
+#           |                       |                         |  - El valor se compara |
+#           |                       |                         |    con el umbral de la |
+#           |                       |                         |    configuración de    |
+#           |                       |                         |    reglas.             |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Definir un evento A  |  - Se busca en ambos   |
+#           |        Patrón         |    seguido de un evento |    sentidos, las colas |
+#           |                       |    B en menos de T se-  |    pueden entregar B   |
+#           |                       |    gundos.              |    antes que A.        |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Guardar los eventos  |  - Estado por wearable |
+#           |     Correlación de    |    recientes de cada    |    y patrón, con un    |
+#           |        Eventos        |    wearable.            |    máximo de wearables |
+#           |                       |  - Notificar los patro- |    y de eventos.       |
+#           |                       |    nes encontrados.     |  - Marca de agua: el   |
+#           |                       |                         |    menor de los últimos|
+#           |                       |                         |    timestamps de cada  |
+#           |                       |                         |    signo vital menos el|
+#           |                       |                         |    retraso permitido.  |
+#           |                       |                         |  - Los eventos anterio-|
+#           |                       |                         |    res a la marca de   |
+#           |                       |                         |    agua se descartan.  |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Recibir los mensajes |  - Una regla por signo |
+#           |  Regla de Correlación |    de un signo vital en |    vital, se registra  |
+#           |                       |    el registro de re-   |    como las demás.     |
+#           |                       |    glas.                |                        |
+#           +-----------------------+-------------------------+------------------------+
+#
+#   A continuación se describen los métodos que se implementaron en éste módulo:
+#
+#                                               Métodos:
+#           +------------------------+--------------------------+-----------------------+
+#           |   matches(), mask()    |  - message o lote.       |  - Indican si el men- |
+#           |                        |  - umbral: umbral del    |    saje o cada mensaje|
+#           |                        |     signo vital.         |    del lote es un     |
+#           |                        |                          |    evento.            |
+#           +------------------------+--------------------------+-----------------------+
+#           |        rules()         |          Ninguno         |  - Regresa una regla  |
+#           |                        |                          |    por signo vital.   |
+#           +------------------------+--------------------------+-----------------------+
+#           |                        |  - umbrales: umbrales    |  - Reemplaza los um-  |
+#           |      configure()       |     compilados de cada   |    brales de los even-|
+#           |                        |     signo vital.         |    tos al recargar las|
+#           |                        |                          |    reglas.            |
+#           +------------------------+--------------------------+-----------------------+
+#           |       process()        |  - vital: signo vital.   |  - Avanza la marca de |
+#           |                        |  - message: mensaje.     |    agua y busca los   |
+#           |                        |                          |    patrones del even- |
+#           |                        |                          |    to.                |
+#           +------------------------+--------------------------+-----------------------+
+#           |    process_batch()     |  - vital: signo vital.   |  - Evalúa las condi-  |
+#           |                        |  - lote: lote de mensa-  |    ciones sobre todo  |
+#           |                        |     jes.                 |    el lote, procesa   |
+#           |                        |                          |    sólo los eventos y |
+#           |                        |                          |    después avanza la  |
+#           |                        |                          |    marca de agua.     |
+#           +------------------------+--------------------------+-----------------------+
+#           |       advance()        |  - vital: signo vital.   |  - Actualiza la marca |
+#           |                        |  - timestamp: milisegun- |    de agua.           |
+#           |                        |     dos.                 |                       |
+#           +------------------------+--------------------------+-----------------------+
+#           |       observe()        |  - id, timestamp.        |  - Busca el otro      |
+#           |                        |  - events: patrones del  |    evento del patrón  |
+#           |                        |     evento.              |    o guarda éste.     |
+#           +------------------------+--------------------------+-----------------------+
+#           |        sweep()         |          Ninguno         |  - Descarta los weara-|
+#           |                        |                          |    bles sin eventos   |
+#           |                        |                          |    vigentes.          |
+#           +------------------------+--------------------------+-----------------------+
+#           |        notify()        |  - pattern, id, first,   |  - Envía la alerta al |
+#           |                        |     second, message.     |    monitor.           |
+#           +------------------------+--------------------------+-----------------------+
+#
+#           Nota: sólo los mensajes que cumplen la condición de un evento (una caída, un pico
+#           de ritmo cardiaco) llegan al estado; a los demás sólo se les evalúa la condición y
+#           se avanza la marca de agua. Los umbrales de la caída y del ritmo cardiaco son los
+#           de positions y heart_rate en el archivo de reglas (--umbrales), sin su ventana.
+#
+#-------------------------------------------------------------------------
+import argparse
+import collections
+import sys
+import threading
+sys.path.append('../')
+import codec
+import lecturas
+import metricas
+from monitor import Monitor
+from motor_de_consumo import MotorDeConsumo, add_arguments, options
+from registro_de_reglas import RegistroDeReglas
+from configuracion_de_reglas import ConfiguracionDeReglas
+
+# Eventos que se guardan por wearable y patrón mientras esperan al otro evento
+EVENTOS_POR_WEARABLE = 16
+
+CORRELACIONES = metricas.counter('smam_correlaciones_total',
+                                 'Patrones encontrados por la correlación de eventos', ('patron',))
+TARDIOS = metricas.counter('smam_eventos_tardios_total',
+                           'Eventos que llegaron después de la marca de agua', ('vital',))
+CORRELACION_WEARABLES = metricas.gauge('smam_correlacion_wearables',
+                                       'Wearables con eventos en espera en la correlación')
+
+
+class Evento:
+
+    def __init__(self, vital, value):
+        self.vital = vital
+        # El valor recibe una función que regresa un campo: un número para un mensaje o una
+        # columna de numpy para un lote; se compara con el umbral del signo vital
+        self.value = value
+
+    def matches(self, message, umbral):
+        return umbral.exceeds(self.value(lambda name: float(message[name])), message)
+
+    def mask(self, lote, umbral):
+        return umbral.mask(self.value(lote.column), lote)
+
+
+class Patron:
+
+    def __init__(self, name, first, then, within=30.0, description=''):
+        self.name = name
+        self.first = first
+        self.then = then
+        self.within = int(within * 1000)
+        self.description = description
+
+
+CAIDA = Evento('positions',
+               lambda get: get('x_position') + get('y_position') + get('z_position'))
+TAQUICARDIA = Evento('heart_rate', lambda get: get('heart_rate'))
+EMERGENCIA = Patron('caida_y_taquicardia', CAIDA, TAQUICARDIA, 30,
+                    'una caída seguida de ritmo cardiaco elevado')
+
+
+class Estado:
+    __slots__ = ('firsts', 'seconds')
+
+    def __init__(self):
+        self.firsts = collections.deque(maxlen=EVENTOS_POR_WEARABLE)
+        self.seconds = collections.deque(maxlen=EVENTOS_POR_WEARABLE)
+
+    def expire(self, oldest):
+        for events in (self.firsts, self.seconds):
+            while events and events[0] < oldest:
+                events.popleft()
+        return not self.firsts and not self.seconds
+
+
+class ReglaDeCorrelacion:
+
+    def __init__(self, correlation, vital):
+        self.correlation = correlation
+        self.queue = vital
+
+    def process(self, message):
+        self.correlation.process(self.queue, message)
+
+    def process_batch(self, lote):
+        self.correlation.process_batch(self.queue, lote)
+
+
+class CorrelacionDeEventos:
+
+    def __init__(self, patterns=(EMERGENCIA,), lateness=5.0, max_devices=100000, rules=None):
+        self.patterns = patterns
+        # Milisegundos que puede retrasarse un signo vital respecto a los demás
+        self.lateness = int(lateness * 1000)
+        self.max_devices = max_devices
+        # signo vital -> [(patrón, True si es el primer evento del patrón)]
+        self.streams = {}
+        for pattern in patterns:
+            self.streams.setdefault(pattern.first.vital, []).append((pattern, True))
+            self.streams.setdefault(pattern.then.vital, []).append((pattern, False))
+        # Último timestamp de cada signo vital, la marca de agua espera al más atrasado
+        self.latest = dict((vital, None) for vital in self.streams)
+        self.watermark = None
+        self.window = max(pattern.within for pattern in patterns)
+        self.next_sweep = None
+        # (patrón, wearable) -> eventos en espera, en orden de uso
+        self.states = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.matches = 0
+        self.late = 0
+        CORRELACION_WEARABLES.set_function(lambda: len(self.states))
+        # Los umbrales de los eventos se toman de la configuración de reglas y se reemplazan
+        # cada vez que se recarga
+        if rules is None:
+            rules = ConfiguracionDeReglas()
+        rules.subscribe(self.configure)
+
+    def configure(self, umbrales):
+        self.umbrales = umbrales
+
+    def rules(self):
+        return [ReglaDeCorrelacion(self, vital) for vital in self.streams]
+
+    def process(self, vital, message):
+        timestamp = codec.timestamp(message)
+        umbral = self.umbrales[vital]
+        events = [(pattern, first) for pattern, first in self.streams[vital]
+                  if (pattern.first if first else pattern.then).matches(message, umbral)]
+        with self.lock:
+            self.advance(vital, timestamp)
+            found = self.observe(vital, int(message['id']), timestamp, events) if events else ()
+        for pattern, id, first, second in found:
+            self.notify(pattern, id, first, second, message)
+
+    def process_batch(self, vital, lote):
+        umbral = self.umbrales[vital]
+        mask = None
+        for pattern, first in self.streams[vital]:
+            event = pattern.first if first else pattern.then
+            mask = event.mask(lote, umbral) if mask is None else mask | event.mask(lote, umbral)
+        # Sólo se decodifican completos los mensajes que son eventos; se observan antes de
+        # avanzar la marca de agua al último mensaje del lote, de otro modo los eventos del
+        # inicio del lote quedarían detrás de ella
+        for message in lote.select(mask):
+            self.process(vital, message)
+        with self.lock:
+            self.advance(vital, int(lote.column('timestamp').max()))
+
+    def advance(self, vital, timestamp):
+        latest = self.latest[vital]
+        if latest is not None and timestamp <= latest:
+            return
+        self.latest[vital] = timestamp
+        if None in self.latest.values():
+            # Mientras falte algún signo vital no se descarta ningún evento por tiempo
+            return
+        self.watermark = min(self.latest.values()) - self.lateness
+        if self.next_sweep is None:
+            self.next_sweep = self.watermark + self.window
+        elif self.watermark >= self.next_sweep:
+            self.sweep()
+            self.next_sweep = self.watermark + self.window
+
+    def observe(self, vital, id, timestamp, events):
+        if self.watermark is not None and timestamp < self.watermark:
+            # El evento llegó tarde, los eventos con los que podía relacionarse ya se descartaron
+            self.late += 1
+            TARDIOS.labels(vital).inc()
+            return ()
+        found = []
+        for pattern, first in events:
+            key = (pattern, id)
+            estado = self.states.get(key)
+            if estado is None:
+                estado = self.states[key] = Estado()
+                if len(self.states) > self.max_devices:
+                    # Se descarta el wearable que lleva más tiempo sin eventos
+                    self.states.popitem(last=False)
+            else:
+                self.states.move_to_end(key)
+                if self.watermark is not None:
+                    estado.expire(self.watermark - pattern.within)
+            # El otro evento puede haber llegado antes por su propia cola
+            if first:
+                others, low, high = estado.seconds, timestamp, timestamp + pattern.within
+            else:
+                others, low, high = estado.firsts, timestamp - pattern.within, timestamp
+            other = next((value for value in others if low <= value <= high), None)
+            if other is None:
+                (estado.firsts if first else estado.seconds).append(timestamp)
+                continue
+            # Cada evento forma parte de un solo patrón
+            others.remove(other)
+            self.matches += 1
+            CORRELACIONES.labels(pattern.name).inc()
+            found.append((pattern, id) + ((timestamp, other) if first else (other, timestamp)))
+        return found
+
+    def sweep(self):
+        for key in list(self.states):
+            if self.states[key].expire(self.watermark - key[0].within):
+                del self.states[key]
+
+    def notify(self, pattern, id, first, second, message):
+        monitor = Monitor()
+        monitor.print_correlation_notification(lecturas.format_datetime(second), id,
+                                               pattern.description, (second - first) / 1000.0,
+                                               message.get('model'))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Correlación de eventos de varios signos vitales')
+    add_arguments(parser)
+    parser.add_argument('--dentro', type=float, default=30,
+                        help='segundos máximos entre la caída y el ritmo cardiaco elevado')
+    parser.add_argument('--retraso', type=float, default=5,
+                        help='segundos que puede retrasarse un signo vital respecto a los demás')
+    parser.add_argument('--max-wearables', type=int, default=100000,
+                        help='wearables con eventos en espera que se guardan en memoria')
+    parser.add_argument('--umbrales',
+                        help='archivo JSON con los umbrales por signo vital y por wearable de la '
+                             'caída (positions) y del ritmo cardiaco, se recarga cuando cambia')
+    args = parser.parse_args()
+    config = options(args)
+    if config['subscriber'] is None:
+        # La correlación necesita su propia copia de los mensajes para no quitárselos a los
+        # procesadores
+        config['subscriber'] = 'correlacion'
+    pattern = Patron(EMERGENCIA.name, CAIDA, TAQUICARDIA, args.dentro, EMERGENCIA.description)
+    rules = ConfiguracionDeReglas(args.umbrales)
+    rules.start()
+    correlation = CorrelacionDeEventos((pattern,), args.retraso, args.max_wearables, rules)
+    registry = RegistroDeReglas()
+    for rule in correlation.rules():
+        registry.register(rule)
+    motor = MotorDeConsumo(registry.handlers(batch=bool(config.get('batch'))), **config)
+    try:
+        motor.start()  # Se realiza la suscripción en el Distribuidor de Mensajes
+    except (KeyboardInterrupt, SystemExit):
+        motor.close()  # Se cierra la conexión
+        sys.exit("Conexión finalizada...")
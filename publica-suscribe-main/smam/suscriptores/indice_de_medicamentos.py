@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#-------------------------------------------------------------------------
+# Archivo: indice_de_medicamentos.py
+# Capitulo: 3 Estilo Publica-Subscribe
+# Autor(es): Perla Velasco & Yonathan Mtz.
+# Version: 1.0.0 Octubre 2026
+# Descripción:
+#
+#   Ésta clase guarda el calendario de las tomas de medicamento de cada wearable para avisar
+#   cada toma sin volver a calcular las horas con cada mensaje.
+#
+#   Las características de ésta clase son las siguientes:
+#
+#                                    indice_de_medicamentos.py
+#           +-----------------------+-------------------------+------------------------+
+#           |  Nombre del elemento  |     Responsabilidad     |      Propiedades       |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Calcular una sola vez|  - Un calendario por   |
+#           |       Índice de       |    el calendario de cada|    wearable, medicamen-|
+#           |     Medicamentos      |    medicamento.         |    to, primera toma e  |
+#           |                       |  - Regresar las tomas   |    intervalo.          |
+#           |                       |    que ya corresponden. |  - Las siguientes tomas|
+#           |                       |                         |    se guardan en un    |
+#           |                       |                         |    heap, O(log n) por  |
+#           |                       |                         |    toma.               |
+#           |                       |                         |  - Cubre todas las     |
+#           |                       |                         |    tomas futuras.      |
+#           +-----------------------+-------------------------+------------------------+
+#
+#   A continuación se describen los métodos que se implementaron en ésta clase:
+#
+#                                               Métodos:
+#           +------------------------+--------------------------+-----------------------+
+#           |                        |  - expiry: segundos sin  |  - Inicializa el ín-  |
+#           |       __init__()       |     mensajes tras los que|    dice.              |
+#           |                        |     se olvida un calen-  |                       |
+#           |                        |     dario.               |                       |
+#           |                        |  - max_schedules: calen- |                       |
+#           |                        |     darios en memoria.   |                       |
+#           +------------------------+--------------------------+-----------------------+
+#           |        update()        |  - message: mensaje de   |  - Registra el calen- |
+#           |                        |     medicamento.         |    dario del mensaje y|
+#           |                        |  - now: segundos desde   |    regresa las tomas  |
+#           |                        |     epoch del mensaje.   |    que corresponden.  |
+#           +------------------------+--------------------------+-----------------------+
+#           |       schedule()       |  - key: wearable, medi-  |  - Calcula la primera |
+#           |                        |     camento, primera toma|    toma a partir de   |
+#           |                        |     e intervalo.         |    now.               |
+#           |                        |  - now: segundos.        |                       |
+#           +------------------------+--------------------------+-----------------------+
+#           |         due()          |  - now: segundos.        |  - Saca del heap las  |
+#           |                        |                          |    tomas anteriores a |
+#           |                        |                          |    now y programa las |
+#           |                        |                          |    siguientes.        |
+#           +------------------------+--------------------------+-----------------------+
+#
+#           Nota: el calendario avanza con la hora más reciente de los mensajes recibidos,
+#           de modo que una toma se avisa aunque el wearable que la programó no envíe un
+#           mensaje en ese minuto.
+#
+#-------------------------------------------------------------------------
+import collections
+import heapq
+import itertools
+import threading
+import time
+
+
+class Dosis:
+    __slots__ = ('key', 'due', 'step', 'message', 'seen', 'active')
+
+    def __init__(self, key, due, step):
+        self.key = key
+        self.due = due
+        self.step = step
+        self.message = None
+        self.seen = None
+        self.active = True
+
+
+class IndiceDeMedicamentos:
+
+    def __init__(self, expiry=86400, max_schedules=100000):
+        self.expiry = expiry
+        self.max_schedules = max_schedules
+        self.schedules = collections.OrderedDict()
+        # Siguiente toma de cada calendario: (segundos, orden de llegada, dosis)
+        self.heap = []
+        self.counter = itertools.count()
+        self.watermark = None
+        self.lock = threading.Lock()
+
+    def update(self, message, now):
+        key = (message['id'], message['medicine'], message['first_intake'], int(message['hour']))
+        with self.lock:
+            dosis = self.schedules.get(key)
+            if dosis is None:
+                dosis = self.schedule(key, now)
+            else:
+                self.schedules.move_to_end(key)
+            if dosis is not None:
+                dosis.message = message
+                dosis.seen = now
+            if self.watermark is None or now > self.watermark:
+                self.watermark = now
+            return self.due(self.watermark)
+
+    def schedule(self, key, now):
+        step = key[3] * 3600
+        if step <= 0:
+            return None
+        hour, minute = key[2].split(':')
+        # La primera toma del día del mensaje se mueve por intervalos completos hasta el minuto
+        # actual, así se respetan los calendarios cuyo intervalo no divide el día
+        current = now - now % 60
+        start = time.localtime(now)
+        due = time.mktime((start.tm_year, start.tm_mon, start.tm_mday, int(hour), int(minute),
+                           0, 0, 0, -1))
+        due += (current - due) // step * step
+        if due < current:
+            due += step
+        dosis = Dosis(key, due, step)
+        self.schedules[key] = dosis
+        heapq.heappush(self.heap, (due, next(self.counter), dosis))
+        if len(self.schedules) > self.max_schedules:
+            # Se olvida el calendario que lleva más tiempo sin mensajes
+            self.schedules.popitem(last=False)[1].active = False
+        return dosis
+
+    def due(self, now):
+        fired = []
+        while self.heap and self.heap[0][0] <= now:
+            due, order, dosis = heapq.heappop(self.heap)
+            if not dosis.active:
+                continue
+            if now - dosis.seen > self.expiry:
+                dosis.active = False
+                del self.schedules[dosis.key]
+                continue
+            fired.append((due, dosis.message))
+            dosis.due = due + dosis.step
+            heapq.heappush(self.heap, (dosis.due, order, dosis))
+        return fired
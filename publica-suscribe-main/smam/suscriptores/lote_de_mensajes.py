@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#-------------------------------------------------------------------------
+# Archivo: lote_de_mensajes.py
+# Capitulo: 3 Estilo Publica-Subscribe
+# Autor(es): Perla Velasco & Yonathan Mtz.
+# Version: 1.0.0 Octubre 2026
+# Descripción:
+#
+#   Ésta clase agrupa los mensajes de una cola que el motor de consumo evalúa juntos y los
+#   presenta como columnas de numpy para evaluar las reglas de todo el lote a la vez.
+#
+#   Las características de ésta clase son las siguientes:
+#
+#                                       lote_de_mensajes.py
+#           +-----------------------+-------------------------+------------------------+
+#           |  Nombre del elemento  |     Responsabilidad     |      Propiedades       |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Decodificar los cam- |  - Los mensajes binari-|
+#           |       Lote de         |    pos numéricos de va- |    os se decodifican en|
+#           |       Mensajes        |    rios mensajes en co- |    una sola operación  |
+#           |                       |    lumnas.              |    de numpy.           |
+#           |                       |  - Decodificar completo |  - Los demás formatos  |
+#           |                       |    sólo los mensajes    |    se decodifican uno  |
+#           |                       |    que se notifican.    |    por uno.            |
+#           +-----------------------+-------------------------+------------------------+
+#
+#   A continuación se describen los métodos que se implementaron en ésta clase:
+#
+#                                               Métodos:
+#           +------------------------+--------------------------+-----------------------+
+#           |                        |  - vital: cola de los    |  - Inicializa el lote.|
+#           |       __init__()       |     mensajes.            |                       |
+#           |                        |  - bodies: mensajes reci-|                       |
+#           |                        |     bidos.               |                       |
+#           |                        |  - content_types: for-   |                       |
+#           |                        |     mato de cada mensaje.|                       |
+#           +------------------------+--------------------------+-----------------------+
+#           |        column()        |  - name: campo numérico. |  - Regresa el campo de|
+#           |                        |                          |    todos los mensajes |
+#           |                        |                          |    como arreglo.      |
+#           +------------------------+--------------------------+-----------------------+
+#           |    decode_columns()    |          Ninguno         |  - Decodifica los cam-|
+#           |                        |                          |    pos numéricos del  |
+#           |                        |                          |    lote.              |
+#           +------------------------+--------------------------+-----------------------+
+#           |       message()        |  - index: posición en el |  - Decodifica un men- |
+#           |                        |     lote.                |    saje completo.     |
+#           +------------------------+--------------------------+-----------------------+
+#           |       messages()       |          Ninguno         |  - Decodifica todos   |
+#           |                        |                          |    los mensajes.      |
+#           +------------------------+--------------------------+-----------------------+
+#           |        select()        |  - mask: arreglo de bool.|  - Decodifica los men-|
+#           |                        |                          |    sajes marcados.    |
+#           +------------------------+--------------------------+-----------------------+
+#           |    begin(), finish(),  |  - indices: posiciones   |  - Llevan la cuenta de|
+#           |   remaining(), hold()  |     en el lote.          |    los mensajes que la|
+#           |                        |  - event: evento que se  |    regla terminó de   |
+#           |                        |     espera para confir-  |    evaluar y de los   |
+#           |                        |     mar.                 |    eventos que espe-  |
+#           |                        |                          |    ran.               |
+#           +------------------------+--------------------------+-----------------------+
+#           |        single()        |  - index: posición en el |  - Regresa un lote con|
+#           |                        |     lote.                |    un solo mensaje.   |
+#           +------------------------+--------------------------+-----------------------+
+#           |       evaluate()       |  - function: regla que   |  - Evalúa el lote y,  |
+#           |                        |     evalúa lotes.        |    si la regla falla, |
+#           |                        |  - lote: lote de mensa-  |    repite uno por uno |
+#           |                        |     jes.                 |    sólo los mensajes  |
+#           |                        |                          |    que no terminó.    |
+#           +------------------------+--------------------------+-----------------------+
+#
+#           Nota: numpy es opcional, sólo se necesita para evaluar por lotes. Un mensaje que
+#           select() o messages() entregó a la regla se da por terminado cuando la regla pide
+#           el siguiente, así al fallar la regla no se repiten las alertas, las ventanas ni el
+#           índice de medicamentos de los mensajes que ya evaluó.
+#
+#-------------------------------------------------------------------------
+import struct
+import sys
+import traceback
+sys.path.append('../')
+import codec
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Tipos de numpy equivalentes a los códigos de struct del codec
+TIPOS = {'B': 'u1', 'H': '<u2', 'I': '<u4', 'q': '<i8', 'd': '<f8'}
+
+_dtypes = {}
+
+
+def dtype(esquema):
+    # Los campos numéricos del registro binario vistos como un arreglo estructurado
+    result = _dtypes.get(esquema.vital)
+    if result is None:
+        names = ('id',) + esquema.numeric
+        offsets = []
+        offset = 2  # versión y tipo
+        for code in esquema.codes:
+            offsets.append(offset)
+            offset += struct.calcsize('<' + code)
+        result = numpy.dtype({'names': list(names),
+                              'formats': [TIPOS[code] for code in esquema.codes],
+                              'offsets': offsets, 'itemsize': esquema.struct.size})
+        _dtypes[esquema.vital] = result
+    return result
+
+
+class ErrorDeLote(Exception):
+
+    def __init__(self, failed):
+        Exception.__init__(self, 'Mensajes del lote con error: ' + str(sorted(failed)))
+        # Posiciones de los mensajes que fallaron después de repetirlos uno por uno
+        self.failed = set(failed)
+
+
+class LoteDeMensajes:
+
+    def __init__(self, vital, bodies, content_types):
+        self.vital = vital
+        self.bodies = bodies
+        self.content_types = content_types
+        self.columns = None
+        self.decoded = {}
+        # Mensajes que la regla en curso no ha terminado de evaluar, None para todos
+        self.unfinished = None
+        # Eventos que deben activarse antes de confirmar los mensajes terminados
+        self.events = set()
+
+    def __len__(self):
+        return len(self.bodies)
+
+    def column(self, name):
+        if self.columns is None:
+            self.columns = self.decode_columns()
+        return self.columns[name]
+
+    def decode_columns(self):
+        esquema = codec.ESQUEMAS.get(self.vital)
+        if esquema is not None and all(c == codec.CONTENT_TYPE_STRUCT for c in self.content_types):
+            size = esquema.struct.size
+            # Se juntan los encabezados de tamaño fijo y se decodifican en una sola operación
+            header = bytes((codec.VERSION, esquema.tipo))
+            if all(body[:2] == header for body in self.bodies):
+                records = numpy.frombuffer(b''.join([body[:size] for body in self.bodies]),
+                                           dtype(esquema))
+                return dict((name, records[name]) for name in records.dtype.names)
+        # Con otros formatos se decodifica cada mensaje y se construyen las columnas
+        messages = [self.message(index) for index in range(0, len(self.bodies))]
+        names = ('id',) + esquema.numeric if esquema is not None else messages[0].keys()
+        # Los mensajes anteriores sin timestamp lo calculan a partir de su fecha
+        columns = {'timestamp': numpy.array([codec.timestamp(message) for message in messages])}
+        for name in names:
+            if name == 'timestamp':
+                continue
+            try:
+                columns[name] = numpy.array([float(message[name]) for message in messages])
+            except (KeyError, TypeError, ValueError):
+                continue
+        return columns
+
+    def message(self, index):
+        message = self.decoded.get(index)
+        if message is None:
+            message = codec.decode(self.bodies[index], self.content_types[index])
+            self.decoded[index] = message
+        return message
+
+    def messages(self):
+        return self.walk(range(0, len(self.bodies)))
+
+    def select(self, mask):
+        return self.walk(numpy.flatnonzero(mask).tolist())
+
+    def walk(self, indices):
+        # Los mensajes que la regla no recibe no tienen efectos, sólo quedan pendientes los
+        # que se entregan y se terminan al pedir el siguiente
+        self.unfinished = [False] * len(self.bodies)
+        for index in indices:
+            self.unfinished[index] = True
+        return self.iterate(indices)
+
+    def iterate(self, indices):
+        for index in indices:
+            yield self.message(index)
+            self.unfinished[index] = False
+
+    def begin(self):
+        self.unfinished = None
+        self.events = set()
+
+    def hold(self, event):
+        # Por ejemplo el bloque del archivador en el que se agregaron los mensajes
+        self.events.add(event)
+        return event
+
+    def finish(self, indices):
+        # Para las reglas que agregan columnas del lote sin recorrer los mensajes
+        if self.unfinished is None:
+            self.unfinished = [True] * len(self.bodies)
+        for index in indices:
+            self.unfinished[index] = False
+
+    def remaining(self):
+        if self.unfinished is None:
+            return list(range(0, len(self.bodies)))
+        return [index for index in range(0, len(self.bodies)) if self.unfinished[index]]
+
+    def single(self, index):
+        return LoteDeMensajes(self.vital, self.bodies[index:index + 1],
+                              self.content_types[index:index + 1])
+
+
+def evaluate(function, lote):
+    # Regresa [(posiciones, resultado)] de los mensajes evaluados y las posiciones que fallaron
+    lote.begin()
+    try:
+        return [(list(range(0, len(lote))), function(lote))], []
+    except ErrorDeLote as error:
+        # Las reglas de la cola ya repitieron sus mensajes, sólo se reportan los que fallaron
+        return ([([index for index in range(0, len(lote)) if index not in error.failed],
+                  tuple(lote.events) or None)], sorted(error.failed))
+    except Exception:
+        traceback.print_exc()
+    # Se repiten uno por uno sólo los mensajes que la regla no terminó
+    remaining = lote.remaining()
+    pending = set(remaining)
+    results = [([index for index in range(0, len(lote)) if index not in pending],
+                tuple(lote.events) or None)]
+    failed = []
+    for index in remaining:
+        try:
+            results.append(([index], function(lote.single(index))))
+        except Exception:
+            failed.append(index)
+    return results, failed
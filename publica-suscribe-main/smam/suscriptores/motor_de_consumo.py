@@ -0,0 +1,518 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#-------------------------------------------------------------------------
+# Archivo: motor_de_consumo.py
+# Capitulo: 3 Estilo Publica-Subscribe
+# Autor(es): Perla Velasco & Yonathan Mtz.
+# Version: 1.0.0 Octubre 2026
+# Descripción:
+#
+#   Ésta clase recibe los mensajes del distribuidor y los reparte entre varios hilos de trabajo
+#   para que los procesadores evalúen muchos signos vitales a la vez.
+#
+#   Las características de ésta clase son las siguientes:
+#
+#                                      motor_de_consumo.py
+#           +-----------------------+-------------------------+------------------------+
+#           |  Nombre del elemento  |     Responsabilidad     |      Propiedades       |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Recibir los mensajes |  - Ventana de prefetch |
+#           |       Motor de        |    de una o más colas.  |    configurable.       |
+#           |       Consumo         |  - Evaluar los mensajes |  - Los mensajes se eva-|
+#           |                       |    en un pool de hilos. |    lúan en hilos de    |
+#           |                       |  - Confirmar los mensa- |    trabajo y se confir-|
+#           |                       |    jes procesados.      |    man en el hilo de   |
+#           |                       |                         |    la conexión.        |
+#           |                       |                         |  - Confirma en lotes   |
+#           |                       |                         |    con multiple=True.  |
+#           |                       |                         |  - Un procesador puede |
+#           |                       |                         |    diferir la confirma-|
+#           |                       |                         |    ción regresando     |
+#           |                       |                         |    eventos.            |
+#           |                       |                         |  - Las alertas se es-  |
+#           |                       |                         |    criben a través de  |
+#           |                       |                         |    un sumidero de aler-|
+#           |                       |                         |    tas.                |
+#           |                       |                         |  - Las instancias de un|
+#           |                       |                         |    suscriptor se re-   |
+#           |                       |                         |    parten los fragmen- |
+#           |                       |                         |    tos y se reajustan  |
+#           |                       |                         |    al entrar o salir   |
+#           |                       |                         |    una instancia.      |
+#           |                       |                         |  - Publica sus métricas|
+#           |                       |                         |    en un endpoint HTTP |
+#           |                       |                         |    local (metricas.py).|
+#           |                       |                         |  - Recibe los avisos   |
+#           |                       |                         |    del registro de dis-|
+#           |                       |                         |    positivos.          |
+#           +-----------------------+-------------------------+------------------------+
+#
+#   A continuación se describen los métodos que se implementaron en ésta clase:
+#
+#                                               Métodos:
+#           +------------------------+--------------------------+-----------------------+
+#           |         Nombre         |        Parámetros        |        Función        |
+#           +------------------------+--------------------------+-----------------------+
+#           |                        |  - handlers: diccionario |  - Configura el motor.|
+#           |       __init__()       |     signo vital -> fun-  |                       |
+#           |                        |     ción que evalúa el   |                       |
+#           |                        |     mensaje.             |                       |
+#           |                        |  - prefetch: mensajes sin|                       |
+#           |                        |     confirmar permitidos.|                       |
+#           |                        |  - workers: hilos de tra-|                       |
+#           |                        |     bajo.                |                       |
+#           |                        |  - ack_batch: mensajes   |                       |
+#           |                        |     por confirmación.    |                       |
+#           |                        |  - ack_interval: segundos|                       |
+#           |                        |     entre confirmaciones.|                       |
+#           |                        |  - batch: mensajes por   |                       |
+#           |                        |     lote de evaluación, 0|                       |
+#           |                        |     para evaluar uno por |                       |
+#           |                        |     uno.                 |                       |
+#           |                        |  - cooldown: segundos en |                       |
+#           |                        |     que se omiten las    |                       |
+#           |                        |     alertas repetidas,   |                       |
+#           |                        |     None para imprimirlas|                       |
+#           |                        |     directamente.        |                       |
+#           |                        |  - subscriber: nombre de |                       |
+#           |                        |     las colas propias,   |                       |
+#           |                        |     None para la cola    |                       |
+#           |                        |     compartida.          |                       |
+#           |                        |  - shards: colas en que  |                       |
+#           |                        |     se reparten los wea- |                       |
+#           |                        |     rables.              |                       |
+#           |                        |  - claimed: colas repar- |                       |
+#           |                        |     tidas que se atien-  |                       |
+#           |                        |     den, None para repar-|                       |
+#           |                        |     tirlas con las demás |                       |
+#           |                        |     instancias.          |                       |
+#           |                        |  - metrics: puerto del   |                       |
+#           |                        |     endpoint de métricas,|                       |
+#           |                        |     None para no publi-  |                       |
+#           |                        |     carlas.              |                       |
+#           |                        |  - devices: archivo del  |                       |
+#           |                        |     registro de disposi- |                       |
+#           |                        |     tivos, None si sólo  |                       |
+#           |                        |     se usan los avisos.  |                       |
+#           +------------------------+--------------------------+-----------------------+
+#           |        start()         |          Ninguno         |  - Se suscribe a las  |
+#           |                        |                          |    colas y atiende la |
+#           |                        |                          |    conexión hasta que |
+#           |                        |                          |    se detiene.        |
+#           +------------------------+--------------------------+-----------------------+
+#           |                        |  - queue: signo vital del|  - Envía el mensaje a |
+#           |      on_message()      |     mensaje.             |    un hilo de trabajo |
+#           |                        |  - channel, method, pro- |    o lo agrega al lote|
+#           |                        |     perties, body: pro-  |    de su cola.        |
+#           |                        |     pios de Rabbit.      |                       |
+#           +------------------------+--------------------------+-----------------------+
+#           |   on_announcement()    |  - channel, method, pro- |  - Reemplaza los datos|
+#           |                        |     perties, body: pro-  |    del wearable que   |
+#           |                        |     pios de Rabbit.      |    avisa el registro. |
+#           +------------------------+--------------------------+-----------------------+
+#           |         work()         |  - handler, queue, tag,  |  - Decodifica y evalúa|
+#           |                        |     properties, body.    |    el mensaje en un   |
+#           |                        |                          |    hilo de trabajo.   |
+#           +------------------------+--------------------------+-----------------------+
+#           |        flush()         |  - queue: cola del lote. |  - Envía el lote in-  |
+#           |                        |                          |    completo de la cola|
+#           |                        |                          |    a un hilo de tra-  |
+#           |                        |                          |    bajo.              |
+#           +------------------------+--------------------------+-----------------------+
+#           |      work_batch()      |  - handler, queue, tags, |  - Evalúa un lote de  |
+#           |                        |     content_types,       |    mensajes en un hilo|
+#           |                        |     bodies.              |    de trabajo; si la  |
+#           |                        |                          |    regla falla repite |
+#           |                        |                          |    sólo los mensajes  |
+#           |                        |                          |    que no terminó.    |
+#           +------------------------+--------------------------+-----------------------+
+#           |       complete()       |  - tags: etiquetas.      |  - Marca los mensajes |
+#           |                        |  - pending: eventos que  |    para confirmarlos  |
+#           |                        |     regresó el procesa-  |    ya o cuando se ac- |
+#           |                        |     dor o None.          |    tiven sus eventos. |
+#           +------------------------+--------------------------+-----------------------+
+#           |       measure()        |          Ninguno         |  - Consulta los mensa-|
+#           |                        |                          |    jes que esperan en |
+#           |                        |                          |    cada cola.         |
+#           +------------------------+--------------------------+-----------------------+
+#           |      rebalance()       |          Ninguno         |  - Deja de atender los|
+#           |                        |                          |    fragmentos que ya  |
+#           |                        |                          |    no le corresponden |
+#           |                        |                          |    y atiende los nue- |
+#           |                        |                          |    vos.               |
+#           +------------------------+--------------------------+-----------------------+
+#           |     request_ack()      |          Ninguno         |  - Solicita la confir-|
+#           |                        |                          |    mación al hilo de  |
+#           |                        |                          |    la conexión al jun-|
+#           |                        |                          |    tar un lote.       |
+#           +------------------------+--------------------------+-----------------------+
+#           |         ack()          |          Ninguno         |  - Confirma con un    |
+#           |                        |                          |    solo ack los men-  |
+#           |                        |                          |    sajes procesados.  |
+#           +------------------------+--------------------------+-----------------------+
+#           |         stop()         |          Ninguno         |  - Solicita detener el|
+#           |                        |                          |    consumo.           |
+#           +------------------------+--------------------------+-----------------------+
+#           |        close()         |  - before_ack: función   |  - Termina los mensa- |
+#           |                        |     que se llama antes de|    jes en curso, los  |
+#           |                        |     la última confirma-  |    confirma y cierra  |
+#           |                        |     ción.                |    la conexión.       |
+#           +------------------------+--------------------------+-----------------------+
+#
+#-------------------------------------------------------------------------
+import argparse
+import collections
+import concurrent.futures
+import functools
+import sys
+import threading
+import time
+import traceback
+import pika
+sys.path.append('../')
+import codec
+import lecturas
+import metricas
+import topologia
+import transporte
+from monitor import Monitor
+from sumidero_de_alertas import SumideroDeAlertas
+from coordinador_de_fragmentos import CoordinadorDeFragmentos
+import lote_de_mensajes
+from lote_de_mensajes import LoteDeMensajes
+from registro_de_dispositivos import ArchivoDeDispositivos
+
+FORMATOS = {codec.CONTENT_TYPE_STRUCT: 'struct', codec.CONTENT_TYPE_JSON: 'json', None: 'texto'}
+# Cubetas en segundos del retraso de los signos vitales, de 1 milisegundo a 10 minutos
+RETRASOS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 600.0)
+# Segundos entre cada consulta de los mensajes en las colas
+INTERVALO_DE_COLAS = 5
+
+EVALUADOS = metricas.counter('smam_mensajes_evaluados_total',
+                             'Mensajes evaluados por los procesadores', ('vital', 'resultado'))
+DECODIFICACION = metricas.histogram('smam_decodificacion_segundos',
+                                    'Segundos en decodificar un mensaje', ('vital', 'formato'))
+EVALUACION = metricas.histogram('smam_evaluacion_segundos',
+                                'Segundos del procesador en evaluar un mensaje', ('vital',))
+EVALUACION_DE_LOTES = metricas.histogram('smam_evaluacion_lote_segundos',
+                                         'Segundos del procesador en evaluar un lote', ('vital',))
+RETRASO = metricas.histogram('smam_retraso_segundos',
+                             'Segundos desde que el wearable mide el signo vital hasta que se '
+                             'evalúa, en lotes el del mensaje más antiguo', ('vital',), RETRASOS)
+EN_COLA = metricas.gauge('smam_mensajes_en_cola', 'Mensajes que esperan en la cola', ('cola',))
+SIN_CONFIRMAR = metricas.gauge('smam_mensajes_sin_confirmar',
+                               'Mensajes entregados que aún no se confirman')
+
+
+class MotorDeConsumo:
+
+    def __init__(self, handlers, host='localhost', prefetch=1000, workers=4, ack_batch=200,
+                 ack_interval=0.05, batch=0, cooldown=None, subscriber=None, shards=0,
+                 claimed=None, metrics=None, devices=None):
+        if batch and lote_de_mensajes.numpy is None:
+            raise RuntimeError('La evaluación por lotes necesita numpy')
+        self.handlers = handlers
+        self.host = host
+        self.prefetch = prefetch
+        self.workers = workers
+        self.ack_batch = ack_batch
+        self.ack_interval = ack_interval
+        self.batch = batch
+        self.cooldown = cooldown
+        self.sink = None
+        self.subscriber = subscriber
+        self.shards = shards
+        self.claimed = claimed
+        self.coordinator = None
+        # Puerto del endpoint de métricas, None para no publicarlas
+        self.metrics = metrics
+        self.measured = 0
+        if devices is not None:
+            # Los wearables que no están en memoria se buscan en el archivo del registro
+            lecturas.CACHE.source = ArchivoDeDispositivos(devices).lookup
+        if subscriber is not None and shards and claimed is None:
+            self.coordinator = CoordinadorDeFragmentos(subscriber, shards)
+        # Colas de cada fragmento y consumidores de los fragmentos que atiende la instancia
+        self.shard_queues = {}
+        self.queues = []
+        self.consumers = {}
+        self.owned = set()
+        # Mensajes de cada cola que esperan completar un lote: etiquetas, formatos y cuerpos
+        self.batches = dict((queue, ([], [], [])) for queue in handlers)
+        self.connection = None
+        self.channel = None
+        self.executor = None
+        self.running = False
+        # stop() puede llegar antes de que start() termine de conectarse, por ejemplo un
+        # SIGTERM del supervisor; en ese caso no se inicia el ciclo de mensajes
+        self.stopped = False
+        self.ack_scheduled = False
+        # Etiquetas recibidas en orden de entrega, sólo las usa el hilo de la conexión
+        self.delivered = collections.deque()
+        self.completed = set()
+        self.rejected = set()
+        # Etiquetas que terminan los hilos de trabajo
+        self.done = collections.deque()
+        self.failed = collections.deque()
+        # (etiquetas, eventos) de los mensajes que el procesador pidió confirmar hasta que se
+        # activen sus eventos, por ejemplo cuando su bloque ya está en el archivo
+        self.waiting = collections.deque()
+        self.processed = 0
+        self.errors = 0
+        # Métricas de cada cola, se buscan una sola vez para no repetirlo en cada mensaje
+        self.meters = dict((queue, (EVALUADOS.labels(queue, 'ok'), EVALUADOS.labels(queue, 'error'),
+                                    EVALUACION.labels(queue), EVALUACION_DE_LOTES.labels(queue),
+                                    RETRASO.labels(queue)))
+                           for queue in handlers)
+
+    def start(self):
+        # Se establece la conexión con el Distribuidor de Mensajes (RabbitMQ o en memoria)
+        self.connection = transporte.connect(self.host)
+        self.channel = self.connection.channel()
+        self.channel.basic_qos(prefetch_count=self.prefetch)
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.workers)
+        if self.cooldown is not None:
+            # Las alertas de todos los hilos de trabajo se escriben desde el hilo del sumidero
+            self.sink = SumideroDeAlertas(self.cooldown)
+            Monitor.sink = self.sink
+        if self.metrics is not None:
+            SIN_CONFIRMAR.set_function(lambda: len(self.delivered))
+            metricas.serve(self.metrics)
+        if self.coordinator is not None:
+            # Los latidos usan su propio canal para no mezclar sus etiquetas con las de los mensajes
+            self.coordinator.setup(self.connection.channel())
+        # Los avisos del registro de dispositivos también usan su propio canal
+        announcements = self.connection.channel()
+        queue = topologia.declare_announcements(announcements)
+        announcements.basic_consume(queue=queue, on_message_callback=self.on_announcement,
+                                    auto_ack=True)
+        # El registro responde en la misma cola con los wearables registrados antes de iniciar
+        snapshots = topologia.declare_snapshots(announcements)
+        announcements.basic_publish(exchange='', routing_key=snapshots, body=b'',
+                                    properties=pika.BasicProperties(reply_to=queue))
+        for vital in self.handlers:
+            # Se declaran las colas del suscriptor y se enlazan al exchange de los signos vitales
+            queues = topologia.declare(self.channel, vital, self.subscriber, self.shards,
+                                       self.claimed)
+            self.queues.extend(queues)
+            for x in range(0, len(queues)):
+                if self.coordinator is not None:
+                    # Las colas de los fragmentos se atienden hasta que el coordinador las asigna
+                    self.shard_queues.setdefault(x, []).append((queues[x], vital))
+                    continue
+                self.channel.basic_consume(queue=queues[x],
+                                           on_message_callback=functools.partial(self.on_message, vital))
+        self.running = not self.stopped
+        while self.running:
+            self.connection.process_data_events(time_limit=self.ack_interval)
+            # Los lotes incompletos no esperan más de un intervalo de confirmación
+            for queue in self.batches:
+                self.flush(queue)
+            self.ack()
+            if self.coordinator is not None:
+                self.rebalance()
+            if self.metrics is not None and time.time() - self.measured >= INTERVALO_DE_COLAS:
+                self.measure()
+
+    def on_message(self, queue, channel, method, properties, body):
+        self.delivered.append(method.delivery_tag)
+        if not self.batch:
+            self.executor.submit(self.work, self.handlers[queue], queue, method.delivery_tag,
+                                 properties, body)
+            return
+        tags, content_types, bodies = self.batches[queue]
+        tags.append(method.delivery_tag)
+        content_types.append(properties.content_type)
+        bodies.append(body)
+        if len(tags) >= self.batch:
+            self.flush(queue)
+
+    def on_announcement(self, channel, method, properties, body):
+        try:
+            lecturas.CACHE.update(codec.decode_device(body))
+        except Exception:
+            traceback.print_exc()
+
+    def work(self, handler, queue, tag, properties, body):
+        ok, error, evaluation, batches, lag = self.meters[queue]
+        start = time.perf_counter()
+        try:
+            message = codec.decode(body, properties.content_type)
+            decoded = time.perf_counter()
+            pending = handler(message)
+        except Exception:
+            traceback.print_exc()
+            error.inc()
+            self.failed.append(tag)
+        else:
+            evaluation.observe(time.perf_counter() - decoded)
+            DECODIFICACION.labels(queue, FORMATOS.get(properties.content_type, 'texto')).observe(
+                decoded - start)
+            measured = message.get('timestamp')
+            if measured is not None:
+                lag.observe(time.time() - int(measured) / 1000.0)
+            ok.inc()
+            self.complete((tag,), pending)
+        self.request_ack()
+
+    def flush(self, queue):
+        tags, content_types, bodies = self.batches[queue]
+        if tags:
+            self.batches[queue] = ([], [], [])
+            self.executor.submit(self.work_batch, self.handlers[queue], queue, tags, content_types,
+                                 bodies)
+
+    def work_batch(self, handler, queue, tags, content_types, bodies):
+        ok, error, evaluation, batches, lag = self.meters[queue]
+        start = time.perf_counter()
+        lote = LoteDeMensajes(queue, bodies, content_types)
+        # Si la regla falla sólo se repiten uno por uno los mensajes que no terminó, así no se
+        # duplican sus alertas, y sólo se rechazan los que vuelven a fallar
+        results, failed = lote_de_mensajes.evaluate(handler, lote)
+        for indices, pending in results:
+            if indices:
+                self.complete([tags[x] for x in indices], pending)
+        for x in failed:
+            self.failed.append(tags[x])
+        ok.inc(len(tags) - len(failed))
+        if failed:
+            error.inc(len(failed))
+        elif len(results) == 1:
+            batches.observe(time.perf_counter() - start)
+            lag.observe(time.time() - lote.column('timestamp').min() / 1000.0)
+        self.request_ack()
+
+    def complete(self, tags, pending):
+        if pending is None:
+            self.done.extend(tags)
+            return
+        if isinstance(pending, threading.Event):
+            pending = (pending,)
+        self.waiting.append((tags, tuple(pending)))
+
+    def measure(self):
+        # Se consulta sin modificarla cuántos mensajes esperan en cada cola
+        self.measured = time.time()
+        for queue in self.queues:
+            result = self.channel.queue_declare(queue=queue, passive=True)
+            EN_COLA.labels(queue).set(result.method.message_count)
+
+    def rebalance(self):
+        owned = self.coordinator.tick(time.time())
+        if owned is None or owned == self.owned:
+            return
+        for shard in sorted(self.owned - owned):
+            # Los mensajes ya entregados se terminan de evaluar y se confirman como siempre, los
+            # que aún no se entregan los regresa pika a la cola para la nueva instancia
+            for tag in self.consumers.pop(shard):
+                self.channel.basic_cancel(tag)
+        for shard in sorted(owned - self.owned):
+            self.consumers[shard] = [
+                self.channel.basic_consume(queue=queue,
+                                           on_message_callback=functools.partial(self.on_message, vital))
+                for queue, vital in self.shard_queues[shard]]
+        self.owned = owned
+        print('Fragmentos asignados: ' + str(sorted(owned)))
+
+    def request_ack(self):
+        # Se solicita una confirmación al hilo de la conexión al juntar un lote
+        if len(self.done) >= self.ack_batch and not self.ack_scheduled:
+            self.ack_scheduled = True
+            self.connection.add_callback_threadsafe(self.ack)
+
+    def ack(self):
+        self.ack_scheduled = False
+        while self.failed:
+            tag = self.failed.popleft()
+            # Un mensaje que no se pudo evaluar se rechaza sin volver a encolarlo
+            self.channel.basic_nack(delivery_tag=tag, requeue=False)
+            self.rejected.add(tag)
+        while self.done:
+            self.completed.add(self.done.popleft())
+        for x in range(0, len(self.waiting)):
+            tags, events = self.waiting.popleft()
+            if all(event.is_set() for event in events):
+                self.completed.update(tags)
+            else:
+                self.waiting.append((tags, events))
+        # Sólo se puede confirmar el prefijo de mensajes que ya terminaron
+        last = None
+        while self.delivered:
+            tag = self.delivered[0]
+            if tag in self.completed:
+                self.completed.remove(tag)
+                self.processed += 1
+                last = tag
+            elif tag in self.rejected:
+                self.rejected.remove(tag)
+                self.errors += 1
+            else:
+                break
+            self.delivered.popleft()
+        if last is not None:
+            self.channel.basic_ack(delivery_tag=last, multiple=True)
+
+    def stop(self):
+        self.stopped = True
+        self.running = False
+
+    def close(self, before_ack=None):
+        self.running = False
+        if self.executor is not None:
+            for queue in self.batches:
+                self.flush(queue)
+            self.executor.shutdown(wait=True)
+        if before_ack is not None:
+            # Por ejemplo el archivador escribe sus bloques para confirmar las lecturas que esperan
+            before_ack()
+        if self.connection is not None and self.connection.is_open:
+            self.ack()
+            if self.coordinator is not None:
+                # Las demás instancias toman los fragmentos sin esperar el timeout
+                self.coordinator.leave()
+            self.connection.close()  # Se cierra la conexión
+        if self.sink is not None:
+            Monitor.sink = None
+            self.sink.close()
+
+
+def add_arguments(parser):
+    # Opciones del motor de consumo comunes a todos los procesadores
+    parser.add_argument('--host', default='localhost',
+                        help='distribuidor de mensajes: host de RabbitMQ o memoria para el '
+                             'distribuidor en memoria del proceso')
+    parser.add_argument('--prefetch', type=int, default=1000,
+                        help='mensajes sin confirmar que entrega el distribuidor')
+    parser.add_argument('--hilos', type=int, default=4, help='hilos de trabajo')
+    parser.add_argument('--lote-ack', type=int, default=200, help='mensajes por confirmación')
+    parser.add_argument('--lote', type=int, default=0,
+                        help='mensajes que se evalúan juntos con numpy, 0 para uno por uno')
+    parser.add_argument('--enfriamiento', type=float, default=60,
+                        help='segundos en que se omiten las alertas repetidas de un wearable')
+    parser.add_argument('--suscriptor',
+                        help='nombre de las colas propias del suscriptor, por omisión se comparte '
+                             'la cola de cada signo vital')
+    parser.add_argument('--fragmentos', type=int, default=0,
+                        help='colas en que se reparten los wearables por el hash de su id')
+    parser.add_argument('--fragmento', type=int, action='append',
+                        help='cola repartida que atiende ésta instancia, por omisión se reparten '
+                             'entre las instancias activas del suscriptor')
+    parser.add_argument('--metricas', type=int,
+                        help='puerto del endpoint HTTP local con las métricas en formato de '
+                             'Prometheus (/metrics)')
+    parser.add_argument('--dispositivos',
+                        help='archivo del registro de dispositivos en el que se buscan los '
+                             'wearables que no están en memoria')
+
+
+def options(args):
+    return {'host': args.host, 'prefetch': args.prefetch, 'workers': args.hilos,
+            'ack_batch': args.lote_ack, 'batch': args.lote, 'cooldown': args.enfriamiento,
+            'subscriber': args.suscriptor, 'shards': args.fragmentos, 'claimed': args.fragmento,
+            'metrics': args.metricas, 'devices': args.dispositivos}
+
+
+def parse_args(description):
+    parser = argparse.ArgumentParser(description=description)
+    add_arguments(parser)
+    return options(parser.parse_args())
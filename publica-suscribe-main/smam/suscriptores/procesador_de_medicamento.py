@@ -25,7 +25,10 @@
 #           |                       |                         |  - Notifica al monitor |
 #           |                       |                         |    cuando se detecta   |
 #           |                       |                         |    que un medicamento  |
-#           |                       |                         |    debe ser ingerido.   |  
+#           |                       |                         |    debe ser ingerido.  |
+#           |                       |                         |  - Avisa todas las to- |
+#           |                       |                         |    mas desde un índice |
+#           |                       |                         |    de calendarios.     |
 #           +-----------------------+-------------------------+------------------------+
 #
 #   A continuación se describen los métodos que se implementaron en ésta clase:
@@ -34,88 +37,64 @@
 #           +------------------------+--------------------------+-----------------------+
 #           |         Nombre         |        Parámetros        |        Función        |
 #           +------------------------+--------------------------+-----------------------+
-#           |                        |                          |  - Recibe la ínforma- |
-#           |       consume()        |          Ninguno         |    ción de los medica-|
+#           |       __init__()       |          Ninguno         |  - Inicializa el ín-  |
+#           |                        |                          |    dice de calenda-   |
+#           |                        |                          |    rios.              |
+#           +------------------------+--------------------------+-----------------------+
+#           |                        |  - config: opciones del  |  - Recibe la ínforma- |
+#           |       consume()        |     motor de consumo.    |    ción de los medica-|
 #           |                        |                          |    mentos.            |
 #           |                        |                          |                       |
 #           +------------------------+--------------------------+-----------------------+
-#           |                        |  - ch: propio de Rabbit. |  - Procesa y detecta  |
-#           |                        |  - method: propio de     |    valores propios del|
-#           |                        |     Rabbit.              |    consumo de medica- |
-#           |       callback()       |  - properties: propio de |    mentos.            |
-#           |                        |     Rabbit.              |                       |
-#           |                        |  - body: mensaje recibi- |                       |
-#           |                        |     do.                  |                       |
+#           |                        |  - message: mensaje del  |  - Procesa y detecta  |
+#           |       process()        |     signo vital decodi-  |    valores propios del|
+#           |                        |     ficado.              |    consumo de medica- |
+#           |                        |                          |    mentos.            |
 #           +------------------------+--------------------------+-----------------------+
-#           |    string_to_json()    |  - string: texto a con-  |  - Convierte un string|
-#           |                        |     vertir en JSON.      |    en un objeto JSON. |
+#           |                        |  - lote: mensajes de la  |  - Procesa los mensa- |
+#           |    process_batch()     |     cola.                |    jes del lote uno   |
+#           |                        |                          |    por uno.           |
 #           +------------------------+--------------------------+-----------------------+
 #
-#
-#           Nota: "propio de Rabbit" implica que se utilizan de manera interna para realizar
-#            de manera correcta la recepcion de datos, para éste ejemplo no shubo necesidad
-#            de utilizarlos y para evitar la sobrecarga de información se han omitido sus
-#            detalles. Para más información acerca del funcionamiento interno de RabbitMQ
-#            puedes visitar: https://www.rabbitmq.com/
-#
 #-------------------------------------------------------------------------
-import pika
 import sys
 sys.path.append('../')
 from monitor import Monitor
+from motor_de_consumo import MotorDeConsumo, parse_args
+from indice_de_medicamentos import IndiceDeMedicamentos
+import codec
 import time
-import datetime 
 
 
-class ProcesadorRitmoCardiaco:
+class ProcesadorDeMedicamento:
+    queue = 'medicine'
+
+    def __init__(self):
+        self.index = IndiceDeMedicamentos()
 
-    def consume(self):
+    def consume(self, **config):
+        # Los mensajes se evalúan en un pool de hilos y se confirman en lotes
+        handler = self.process_batch if config.get('batch') else self.process
+        motor = MotorDeConsumo({self.queue: handler}, **config)
         try:
-            # Se establece la conexión con el Distribuidor de Mensajes
-            connection = pika.BlockingConnection(pika.ConnectionParameters(host='localhost'))
-            # Se solicita un canal por el cuál se enviarán los signos vitales
-            channel = connection.channel()
-            # Se declara una cola para leer los mensajes enviados por el
-            # Publicador
-            channel.queue_declare(queue='medicine', durable=True)
-            channel.basic_qos(prefetch_count=1)
-            channel.basic_consume(on_message_callback=self.callback, queue='medicine')
-            channel.start_consuming()  # Se realiza la suscripción en el Distribuidor de Mensajes
+            motor.start()  # Se realiza la suscripción en el Distribuidor de Mensajes
         except (KeyboardInterrupt, SystemExit):
-            channel.close()  # Se cierra la conexión
+            motor.close()  # Se cierra la conexión
             sys.exit("Conexión finalizada...")
-            time.sleep(1)
-            sys.exit("Programa terminado...")
 
-    def callback(self, ch, method, properties, body):
-        json_message = self.string_to_json(body)
-        date = json_message['datetime']
-        #Se obtienen las horas y minutos actuales.
-        current = date[11] + date[12] + ":" + date[14] + date[15]
-        current_time = datetime.datetime.strptime(current, '%H:%M').time()
-        #Se obtienen las horas y minutos de la primera ingesta de medicamento.
-        intake_time = datetime.datetime.strptime(json_message['first_intake'], '%H:%M').time()
-        #Se calcula la hora de siguiente ingesta,
-        #debe ser igual a la hora actual para notificar.
-        if  abs((intake_time.hour + int(json_message['hour'] ) - 24)) == current_time.hour and intake_time.minute == current_time.minute:
+    def process(self, json_message):
+        #El calendario de cada medicamento se calcula una sola vez, al recibir su primer mensaje;
+        #el índice regresa las tomas que ya corresponden a la hora del mensaje.
+        for due, message in self.index.update(json_message, codec.timestamp(json_message) / 1000.0):
             monitor = Monitor()
-            monitor.print_med_notification(json_message['datetime'], json_message['id'],
-             json_message['dose'], json_message['medicine'], json_message['model'], json_message['hour'])
-
-        time.sleep(1)
-        ch.basic_ack(delivery_tag=method.delivery_tag)
+            monitor.print_med_notification(time.strftime('%d:%m:%Y:%H:%M:%S', time.localtime(due)),
+             message['id'], message['dose'], message['medicine'], message['model'], message['hour'])
 
-    def string_to_json(self, string):
-        message = {}
-        string = string.decode('utf-8')
-        string = string.replace('{', '')
-        string = string.replace('}', '')
-        values = string.split(', ')
-        for x in values:
-            v = x.split(': ')
-            message[v[0].replace('\'', '')] = v[1].replace('\'', '')
-        return message
+    def process_batch(self, lote):
+        # El índice de calendarios avanza con cada mensaje en orden de llegada
+        for json_message in lote.messages():
+            self.process(json_message)
 
 if __name__ == '__main__':
-    p_ritmo_cardiaco = ProcesadorRitmoCardiaco()
-    p_ritmo_cardiaco.consume()
+    p_medicamento = ProcesadorDeMedicamento()
+    p_medicamento.consume(**parse_args('Procesador de medicamentos'))
@@ -33,81 +33,82 @@
 #           +------------------------+--------------------------+-----------------------+
 #           |         Nombre         |        Parámetros        |        Función        |
 #           +------------------------+--------------------------+-----------------------+
-#           |                        |                          |  - Recibe los signos  |
-#           |       consume()        |          Ninguno         |    vitales vitales    |
+#           |                        |  - rules: configuración  |  - Inicializa el pro- |
+#           |       __init__()       |     de reglas, por omi-  |    cesador.           |
+#           |                        |     sión sin archivo.    |                       |
+#           +------------------------+--------------------------+-----------------------+
+#           |                        |  - umbrales: umbrales    |  - Reemplaza el umbral|
+#           |      configure()       |     compilados de cada   |    de la suma de los  |
+#           |                        |     signo vital.         |    ejes.              |
+#           +------------------------+--------------------------+-----------------------+
+#           |                        |  - config: opciones del  |  - Recibe los signos  |
+#           |       consume()        |     motor de consumo.    |    vitales vitales    |
 #           |                        |                          |    desde el distribui-|
 #           |                        |                          |    dor de mensajes.   |
 #           +------------------------+--------------------------+-----------------------+
-#           |                        |  - ch: propio de Rabbit. |  - Procesa y detecta  |
-#           |                        |  - method: propio de     |    valores extremos de|
-#           |                        |     Rabbit.              |    la presión         |
-#           |       callback()       |  - properties: propio de |    arterial.          |
-#           |                        |     Rabbit.              |                       |
-#           |                        |  - body: mensaje recibi- |                       |
-#           |                        |     do.                  |                       |
+#           |                        |  - message: mensaje del  |  - Procesa y detecta  |
+#           |       process()        |     signo vital decodi-  |    valores extremos de|
+#           |                        |     ficado.              |    la presión         |
+#           |                        |                          |    arterial.          |
 #           +------------------------+--------------------------+-----------------------+
-#           |    string_to_json()    |  - string: texto a con-  |  - Convierte un string|
-#           |                        |     vertir en JSON.      |    en un objeto JSON. |
+#           |                        |  - lote: mensajes de la  |  - Detecta las caídas |
+#           |    process_batch()     |     cola decodificados en|    de todo el lote a  |
+#           |                        |     columnas.            |    la vez.            |
 #           +------------------------+--------------------------+-----------------------+
 #
-#
-#           Nota: "propio de Rabbit" implica que se utilizan de manera interna para realizar
-#            de manera correcta la recepcion de datos, para éste ejemplo no shubo necesidad
-#            de utilizarlos y para evitar la sobrecarga de información se han omitido sus
-#            detalles. Para más información acerca del funcionamiento interno de RabbitMQ
-#            puedes visitar: https://www.rabbitmq.com/
-#
 #-------------------------------------------------------------------------
-import pika
+import argparse
 import sys
 sys.path.append('../')
 from monitor import Monitor
-import time
+from motor_de_consumo import MotorDeConsumo, add_arguments, options
+from configuracion_de_reglas import ConfiguracionDeReglas
 
 
 class ProcesadorPosicion:
+    queue = 'positions'
+
+    def __init__(self, rules=None):
+        if rules is None:
+            rules = ConfiguracionDeReglas()
+        rules.subscribe(self.configure)
+
+    def configure(self, umbrales):
+        self.umbral = umbrales[self.queue]
 
-    def consume(self):
+    def consume(self, **config):
+        # Los mensajes se evalúan en un pool de hilos y se confirman en lotes
+        handler = self.process_batch if config.get('batch') else self.process
+        motor = MotorDeConsumo({self.queue: handler}, **config)
         try:
-            # Se establece la conexión con el Distribuidor de Mensajes
-            connection = pika.BlockingConnection(pika.ConnectionParameters(host='localhost'))
-            # Se solicita un canal por el cuál se enviarán los signos vitales
-            channel = connection.channel()
-            # Se declara una cola para leer los mensajes enviados por el
-            # Publicador
-            channel.queue_declare(queue='positions', durable=True)
-            channel.basic_qos(prefetch_count=1)
-            channel.basic_consume(on_message_callback=self.callback, queue='positions')
-            channel.start_consuming()  # Se realiza la suscripción en el Distribuidor de Mensajes
+            motor.start()  # Se realiza la suscripción en el Distribuidor de Mensajes
         except (KeyboardInterrupt, SystemExit):
-            channel.close()  # Se cierra la conexión
+            motor.close()  # Se cierra la conexión
             sys.exit("Conexión finalizada...")
-            time.sleep(1)
-            sys.exit("Programa terminado...")
 
-    def callback(self, ch, method, properties, body):
-        json_message = self.string_to_json(body)
+    def process(self, json_message):
         # Se suman los valores de los ejes del acelerometro.
         suma = float(json_message['x_position']) + float(json_message['y_position'])+ float(json_message['z_position'])
         #Si los ejes están en (0,1,0) o valores parecidos, cercanos a uno, el acelerometro se encuentra en reposo.
-        #De otra forma, sumando más de dos, se presenta una fuerza mayor, es decir, es probable que esté cayendo.
-        if suma > 2:
+        #De otra forma, sumando más de dos (o el umbral del archivo de reglas), se presenta una fuerza mayor, es decir, es probable que esté cayendo.
+        if self.umbral.exceeds(suma, json_message):
             monitor = Monitor()
             monitor.print_notification(json_message['datetime'], json_message['id'], suma, 'movimiento', json_message['model'])
-        time.sleep(1)
-        ch.basic_ack(delivery_tag=method.delivery_tag)
 
-    def string_to_json(self, string):
-        message = {}
-        string = string.decode('utf-8')
-        string = string.replace('{', '')
-        string = string.replace('}', '')
-        values = string.split(', ')
-        for x in values:
-            v = x.split(': ')
-            message[v[0].replace('\'', '')] = v[1].replace('\'', '')
-        return message
+    def process_batch(self, lote):
+        # Se suman los ejes de todo el lote en una sola operación
+        suma = lote.column('x_position') + lote.column('y_position') + lote.column('z_position')
+        for json_message in lote.select(self.umbral.mask(suma, lote)):
+            self.process(json_message)
 
 if __name__ == '__main__':
-    p_presion = ProcesadorPosicion()
-    p_presion.consume()
+    parser = argparse.ArgumentParser(description='Procesador de posición')
+    add_arguments(parser)
+    parser.add_argument('--umbrales',
+                        help='archivo JSON con los umbrales por signo vital y por wearable, se '
+                             'recarga cuando cambia')
+    args = parser.parse_args()
+    rules = ConfiguracionDeReglas(args.umbrales)
+    rules.start()
+    p_presion = ProcesadorPosicion(rules)
+    p_presion.consume(**options(args))
@@ -21,7 +21,9 @@
 #           |     Procesador de     |    extremos de la       |    Xiaomi My Band.     |
 #           |        Presión        |    presión arterial.    |  - Define el valor ex- |
 #           |                       |                         |    tremo de la presión |
-#           |                       |                         |    arterial en 110.    |
+#           |                       |                         |    arterial en 110 o en|
+#           |                       |                         |    el archivo de re-   |
+#           |                       |                         |    glas.               |
 #           |                       |                         |  - Notifica al monitor |
 #           |                       |                         |    cuando un valor ex- |
 #           |                       |                         |    tremo es detectado. |
@@ -33,78 +35,113 @@
 #           +------------------------+--------------------------+-----------------------+
 #           |         Nombre         |        Parámetros        |        Función        |
 #           +------------------------+--------------------------+-----------------------+
-#           |                        |                          |  - Recibe los signos  |
-#           |       consume()        |          Ninguno         |    vitales vitales    |
+#           |                        |  - window: segundos que  |  - Inicializa el pro- |
+#           |       __init__()       |     debe mantenerse el   |    cesador.           |
+#           |                        |     valor extremo para   |                       |
+#           |                        |     notificar, None para |                       |
+#           |                        |     notificar cada valor.|                       |
+#           |                        |  - rules: configuración  |                       |
+#           |                        |     de reglas, por omi-  |                       |
+#           |                        |     sión sin archivo.    |                       |
+#           +------------------------+--------------------------+-----------------------+
+#           |                        |  - umbrales: umbrales    |  - Reemplaza el umbral|
+#           |      configure()       |     compilados de cada   |    y la ventana al re-|
+#           |                        |     signo vital.         |    cargar las reglas. |
+#           +------------------------+--------------------------+-----------------------+
+#           |                        |  - config: opciones del  |  - Recibe los signos  |
+#           |       consume()        |     motor de consumo.    |    vitales vitales    |
 #           |                        |                          |    desde el distribui-|
 #           |                        |                          |    dor de mensajes.   |
 #           +------------------------+--------------------------+-----------------------+
-#           |                        |  - ch: propio de Rabbit. |  - Procesa y detecta  |
-#           |                        |  - method: propio de     |    valores extremos de|
-#           |                        |     Rabbit.              |    la presión         |
-#           |       callback()       |  - properties: propio de |    arterial.          |
-#           |                        |     Rabbit.              |                       |
-#           |                        |  - body: mensaje recibi- |                       |
-#           |                        |     do.                  |                       |
+#           |                        |  - message: mensaje del  |  - Procesa y detecta  |
+#           |       process()        |     signo vital decodi-  |    valores extremos de|
+#           |                        |     ficado.              |    la presión         |
+#           |                        |                          |    arterial.          |
 #           +------------------------+--------------------------+-----------------------+
-#           |    string_to_json()    |  - string: texto a con-  |  - Convierte un string|
-#           |                        |     vertir en JSON.      |    en un objeto JSON. |
+#           |                        |  - lote: mensajes de la  |  - Detecta los valores|
+#           |    process_batch()     |     cola decodificados en|    extremos de todo el|
+#           |                        |     columnas.            |    lote a la vez.     |
 #           +------------------------+--------------------------+-----------------------+
 #
-#
-#           Nota: "propio de Rabbit" implica que se utilizan de manera interna para realizar
-#            de manera correcta la recepcion de datos, para éste ejemplo no shubo necesidad
-#            de utilizarlos y para evitar la sobrecarga de información se han omitido sus
-#            detalles. Para más información acerca del funcionamiento interno de RabbitMQ
-#            puedes visitar: https://www.rabbitmq.com/
-#
 #-------------------------------------------------------------------------
-import pika
+import argparse
 import sys
 sys.path.append('../')
+import codec
 from monitor import Monitor
-import time
+from motor_de_consumo import MotorDeConsumo, add_arguments, options
+from almacen_de_ventanas import ReglaSostenida
+from configuracion_de_reglas import ConfiguracionDeReglas
 
 
 class ProcesadorPresion:
+    queue = 'blood_preasure'
+
+    def __init__(self, window=None, rules=None):
+        # El umbral y la ventana se toman de la configuración de reglas y se reemplazan cada
+        # vez que se recarga, sin detener el consumo
+        self.rule = None
+        if rules is None:
+            rules = ConfiguracionDeReglas(window=window)
+        rules.subscribe(self.configure)
+
+    def configure(self, umbrales):
+        umbral = umbrales[self.queue]
+        sustained = self.rule[1] if self.rule is not None else None
+        if umbral.window is None:
+            sustained = None
+        elif sustained is None or sustained.store.window != umbral.window:
+            # Con una ventana se notifica cuando el valor extremo se mantiene y no por cada
+            # pico; si la ventana no cambia se conservan las de los wearables
+            sustained = ReglaSostenida(umbral.threshold, umbral.window)
+        # Los hilos de trabajo leen el umbral y la ventana juntos, de la misma carga
+        self.rule = (umbral, sustained)
 
-    def consume(self):
+    def consume(self, **config):
+        # Los mensajes se evalúan en un pool de hilos y se confirman en lotes
+        handler = self.process_batch if config.get('batch') else self.process
+        motor = MotorDeConsumo({self.queue: handler}, **config)
         try:
-            # Se establece la conexión con el Distribuidor de Mensajes
-            connection = pika.BlockingConnection(pika.ConnectionParameters(host='localhost'))
-            # Se solicita un canal por el cuál se enviarán los signos vitales
-            channel = connection.channel()
-            # Se declara una cola para leer los mensajes enviados por el
-            # Publicador
-            channel.queue_declare(queue='blood_preasure', durable=True)
-            channel.basic_qos(prefetch_count=1)
-            channel.basic_consume(on_message_callback=self.callback, queue='blood_preasure')
-            channel.start_consuming()  # Se realiza la suscripción en el Distribuidor de Mensajes
+            motor.start()  # Se realiza la suscripción en el Distribuidor de Mensajes
         except (KeyboardInterrupt, SystemExit):
-            channel.close()  # Se cierra la conexión
+            motor.close()  # Se cierra la conexión
             sys.exit("Conexión finalizada...")
-            time.sleep(1)
-            sys.exit("Programa terminado...")
 
-    def callback(self, ch, method, properties, body):
-        json_message = self.string_to_json(body)
-        if int(json_message['blood_preasure']) > 110:
+    def process(self, json_message):
+        value = int(json_message['blood_preasure'])
+        umbral, sustained = self.rule
+        if sustained is None:
+            alert = umbral.exceeds(value, json_message)
+        else:
+            id = json_message['id']
+            alert = sustained.check(id, codec.timestamp(json_message) / 1000.0, value,
+                                    umbral.limit(id))
+        if alert:
             monitor = Monitor()
             monitor.print_notification(json_message['datetime'], json_message['id'], json_message[
                                        'blood_preasure'], 'presión arterial', json_message['model'])
-        time.sleep(1)
-        ch.basic_ack(delivery_tag=method.delivery_tag)
 
-    def string_to_json(self, string):
-        message = {}
-        string = string.decode('utf-8')
-        string = string.replace('{', '')
-        string = string.replace('}', '')
-        values = string.split(', ')
-        for x in values:
-            v = x.split(': ')
-            message[v[0].replace('\'', '')] = v[1].replace('\'', '')
-        return message
+    def process_batch(self, lote):
+        umbral, sustained = self.rule
+        if sustained is not None:
+            # La ventana de cada wearable se actualiza en el orden de llegada
+            for json_message in lote.messages():
+                self.process(json_message)
+            return
+        # Se compara todo el lote contra el umbral de cada wearable en una sola operación
+        for json_message in lote.select(umbral.mask(lote.column('blood_preasure'), lote)):
+            self.process(json_message)
 
 if __name__ == '__main__':
-    p_presion = ProcesadorPresion()
-    p_presion.consume()
+    parser = argparse.ArgumentParser(description='Procesador de presión arterial')
+    add_arguments(parser)
+    parser.add_argument('--ventana', type=float,
+                        help='segundos que debe mantenerse el valor extremo para notificar')
+    parser.add_argument('--umbrales',
+                        help='archivo JSON con los umbrales y ventanas por signo vital y por '
+                             'wearable, se recarga cuando cambia')
+    args = parser.parse_args()
+    rules = ConfiguracionDeReglas(args.umbrales, args.ventana)
+    rules.start()
+    p_presion = ProcesadorPresion(args.ventana, rules)
+    p_presion.consume(**options(args))
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#-------------------------------------------------------------------------
+# Archivo: procesador_de_signos_vitales.py
+# Capitulo: 3 Estilo Publica-Subscribe
+# Autor(es): Perla Velasco & Yonathan Mtz.
+# Version: 1.0.0 Octubre 2026
+# Descripción:
+#
+#   Esta clase define el rol de un suscriptor que atiende todas las colas de signos vitales
+#   en un solo proceso y con una sola conexión.
+#
+#   Las características de ésta clase son las siguientes:
+#
+#                                 procesador_de_signos_vitales.py
+#           +-----------------------+-------------------------+------------------------+
+#           |  Nombre del elemento  |     Responsabilidad     |      Propiedades       |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Procesar los valores |  - Se suscribe a las   |
+#           |     Procesador de     |    extremos de todos    |    colas body_tempera- |
+#           |    Signos Vitales     |    los signos vitales.  |    ture, heart_rate,   |
+#           |                       |                         |    blood_preasure,     |
+#           |                       |                         |    positions y medici- |
+#           |                       |                         |    ne.                 |
+#           |                       |                         |  - Los procesadores de |
+#           |                       |                         |    cada signo vital se |
+#           |                       |                         |    registran como re-  |
+#           |                       |                         |    glas.               |
+#           |                       |                         |  - Se pueden ejecutar  |
+#           |                       |                         |    N instancias idén-  |
+#           |                       |                         |    ticas.              |
+#           |                       |                         |  - Opcionalmente rela- |
+#           |                       |                         |    ciona caídas y rit- |
+#           |                       |                         |    mo cardiaco elevado.|
+#           |                       |                         |  - Los umbrales se car-|
+#           |                       |                         |    gan de un archivo   |
+#           |                       |                         |    que se recarga al   |
+#           |                       |                         |    cambiar.            |
+#           +-----------------------+-------------------------+------------------------+
+#
+#   A continuación se describen los métodos que se implementaron en ésta clase:
+#
+#                                               Métodos:
+#           +------------------------+--------------------------+-----------------------+
+#           |         Nombre         |        Parámetros        |        Función        |
+#           +------------------------+--------------------------+-----------------------+
+#           |                        |  - registry: registro de |  - Inicializa el pro- |
+#           |       __init__()       |     reglas, por omisión  |    cesador.           |
+#           |                        |     el de los cinco pro- |                       |
+#           |                        |     cesadores.           |                       |
+#           +------------------------+--------------------------+-----------------------+
+#           |                        |  - queues: colas a aten- |  - Recibe los signos  |
+#           |       consume()        |     der.                 |    vitales de todas   |
+#           |                        |  - config: opciones del  |    las colas por una  |
+#           |                        |     motor de consumo.    |    sola conexión.     |
+#           +------------------------+--------------------------+-----------------------+
+#
+#-------------------------------------------------------------------------
+import argparse
+import sys
+from motor_de_consumo import MotorDeConsumo, add_arguments, options
+from registro_de_reglas import RegistroDeReglas
+from procesador_de_temperatura import ProcesadorTemperatura
+from procesador_de_ritmo_cardiaco import ProcesadorRitmoCardiaco
+from procesador_de_presion import ProcesadorPresion
+from procesador_de_posicion import ProcesadorPosicion
+from procesador_de_medicamento import ProcesadorDeMedicamento
+from correlacion_de_eventos import CorrelacionDeEventos
+from configuracion_de_reglas import ConfiguracionDeReglas
+
+
+def default_registry(window=None, rules=None):
+    # Los procesadores comparten la configuración de reglas y se actualizan con cada recarga
+    if rules is None:
+        rules = ConfiguracionDeReglas(window=window)
+    registry = RegistroDeReglas()
+    registry.register(ProcesadorTemperatura(window, rules))
+    registry.register(ProcesadorRitmoCardiaco(window, rules))
+    registry.register(ProcesadorPresion(window, rules))
+    registry.register(ProcesadorPosicion(rules))
+    registry.register(ProcesadorDeMedicamento())
+    return registry
+
+
+class ProcesadorSignosVitales:
+
+    def __init__(self, registry=None):
+        if registry is None:
+            registry = default_registry()
+        self.registry = registry
+
+    def consume(self, queues=None, **config):
+        # Todas las colas se atienden con una sola conexión y un solo pool de hilos
+        handlers = self.registry.handlers(queues, bool(config.get('batch')))
+        motor = MotorDeConsumo(handlers, **config)
+        try:
+            motor.start()  # Se realiza la suscripción en el Distribuidor de Mensajes
+        except (KeyboardInterrupt, SystemExit):
+            motor.close()  # Se cierra la conexión
+            sys.exit("Conexión finalizada...")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Procesador de todos los signos vitales')
+    add_arguments(parser)
+    parser.add_argument('--colas', nargs='+', help='colas a atender, por omisión todas')
+    parser.add_argument('--regla', action='append', default=[],
+                        help='regla adicional a registrar, en la forma modulo.Clase')
+    parser.add_argument('--ventana', type=float,
+                        help='segundos que debe mantenerse un valor extremo para notificar')
+    parser.add_argument('--correlacion', action='store_true',
+                        help='busca además caídas seguidas de ritmo cardiaco elevado en el mismo '
+                             'wearable')
+    parser.add_argument('--umbrales',
+                        help='archivo JSON con los umbrales y ventanas por signo vital y por '
+                             'wearable, se recarga cuando cambia')
+    args = parser.parse_args()
+    rules = ConfiguracionDeReglas(args.umbrales, args.ventana)
+    rules.start()
+    p_signos_vitales = ProcesadorSignosVitales(default_registry(args.ventana, rules))
+    if args.correlacion:
+        for rule in CorrelacionDeEventos(rules=rules).rules():
+            p_signos_vitales.registry.register(rule)
+    for path in args.regla:
+        p_signos_vitales.registry.register_plugin(path)
+    unknown = set(args.colas or ()) - set(p_signos_vitales.registry.queues())
+    if unknown:
+        parser.error('no hay reglas registradas para las colas: ' + ', '.join(sorted(unknown)) +
+                     ' (colas disponibles: ' + ', '.join(p_signos_vitales.registry.queues()) + ')')
+    p_signos_vitales.consume(args.colas, **options(args))
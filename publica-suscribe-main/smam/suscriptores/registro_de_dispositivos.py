@@ -0,0 +1,294 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#-------------------------------------------------------------------------
+# Archivo: registro_de_dispositivos.py
+# Capitulo: 3 Estilo Publica-Subscribe
+# Autor(es): Perla Velasco & Yonathan Mtz.
+# Version: 1.0.0 Octubre 2026
+# Descripción:
+#
+#   Esta clase define el rol de un suscriptor que recibe los registros de los wearables, los
+#   guarda en un archivo local y avisa a los procesadores de los wearables nuevos o modificados.
+#
+#   Las características de éste módulo son las siguientes:
+#
+#                                  registro_de_dispositivos.py
+#           +-----------------------+-------------------------+------------------------+
+#           |  Nombre del elemento  |     Responsabilidad     |      Propiedades       |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Guardar los regis-   |  - Sólo se escribe al  |
+#           |      Archivo de       |    tros en disco.       |    final, cada registro|
+#           |     Dispositivos      |  - Buscar un wearable   |    lleva su longitud y |
+#           |                       |    por id.              |    su crc32.           |
+#           |                       |                         |  - Guarda en memoria la|
+#           |                       |                         |    posición del último |
+#           |                       |                         |    registro de cada    |
+#           |                       |                         |    wearable.           |
+#           |                       |                         |  - Se compacta en un   |
+#           |                       |                         |    archivo nuevo.      |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Recibir los regis-   |  - Cola devices.       |
+#           |      Registro de      |    tros de los weara-   |  - Confirma el registro|
+#           |     Dispositivos      |    bles.                |    después de guardar- |
+#           |                       |  - Avisar de los weara- |    lo.                 |
+#           |                       |    bles nuevos o modi-  |  - Los registros repe- |
+#           |                       |    ficados.             |    tidos no se guardan |
+#           |                       |                         |    ni se avisan.       |
+#           |                       |                         |  - Responde a los pro- |
+#           |                       |                         |    cesadores que ini-  |
+#           |                       |                         |    cian con todos los  |
+#           |                       |                         |    wearables.          |
+#           +-----------------------+-------------------------+------------------------+
+#
+#   A continuación se describen los métodos que se implementaron en éste módulo:
+#
+#                                               Métodos:
+#           +------------------------+--------------------------+-----------------------+
+#           |         Nombre         |        Parámetros        |        Función        |
+#           +------------------------+--------------------------+-----------------------+
+#           |       refresh()        |          Ninguno         |  - Lee los registros  |
+#           |                        |                          |    que se agregaron al|
+#           |                        |                          |    archivo.           |
+#           +------------------------+--------------------------+-----------------------+
+#           |        lookup()        |  - id: wearable.         |  - Regresa el último  |
+#           |                        |                          |    registro del weara-|
+#           |                        |                          |    ble o None.        |
+#           +------------------------+--------------------------+-----------------------+
+#           |         load()         |          Ninguno         |  - Regresa todos los  |
+#           |                        |                          |    wearables del ar-  |
+#           |                        |                          |    chivo.             |
+#           +------------------------+--------------------------+-----------------------+
+#           |        append()        |  - dispositivo: registro.|  - Agrega un registro |
+#           |                        |                          |    al archivo.        |
+#           +------------------------+--------------------------+-----------------------+
+#           |       compact()        |  - devices: wearables.   |  - Reescribe el ar-   |
+#           |                        |                          |    chivo con un regis-|
+#           |                        |                          |    tro por wearable.  |
+#           +------------------------+--------------------------+-----------------------+
+#           |         start()        |          Ninguno         |  - Se suscribe a la   |
+#           |                        |                          |    cola devices.      |
+#           +------------------------+--------------------------+-----------------------+
+#           |                        |  - channel, method, pro- |  - Guarda el registro |
+#           |      on_message()      |     perties, body: pro-  |    y avisa a los pro- |
+#           |                        |     pios de Rabbit.      |    cesadores.         |
+#           +------------------------+--------------------------+-----------------------+
+#           |                        |  - channel, method, pro- |  - Envía todos los    |
+#           |     on_snapshot()      |     perties, body: pro-  |    wearables a la cola|
+#           |                        |     pios de Rabbit.      |    reply_to del pro-  |
+#           |                        |                          |    cesador.           |
+#           +------------------------+--------------------------+-----------------------+
+#
+#           Nota: los procesadores que se ejecutan en el mismo equipo buscan en el archivo
+#           los wearables que no tienen en memoria (--dispositivos en motor_de_consumo.py).
+#
+#-------------------------------------------------------------------------
+import argparse
+import os
+import struct
+import sys
+import threading
+import traceback
+import zlib
+sys.path.append('../')
+import codec
+import metricas
+import topologia
+import transporte
+
+# Registro: longitud y crc32 del registro codificado del wearable
+RECORD = struct.Struct('<II')
+
+REGISTROS = metricas.counter('smam_registros_de_dispositivos_total',
+                             'Registros de wearables recibidos', ('resultado',))
+REGISTRADOS = metricas.gauge('smam_dispositivos_registrados', 'Wearables en el registro')
+INSTANTANEAS = metricas.counter('smam_solicitudes_de_dispositivos_total',
+                                'Solicitudes de los wearables registrados respondidas')
+
+
+class ArchivoDeDispositivos:
+
+    def __init__(self, path, fsync=False):
+        self.path = path
+        self.fsync = fsync
+        self.file = None
+        self.writer = None
+        self.inode = None
+        # Bytes leídos del archivo y posición del último registro de cada wearable
+        self.position = 0
+        self.offsets = {}
+        self.lock = threading.Lock()
+
+    def refresh(self):
+        try:
+            inode = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            return
+        if inode != self.inode:
+            # El archivo se compactó, se vuelve a leer desde el inicio
+            if self.file is not None:
+                self.file.close()
+            self.file = open(self.path, 'rb')
+            self.inode = os.fstat(self.file.fileno()).st_ino
+            self.position = 0
+            self.offsets = {}
+        self.file.seek(self.position)
+        data = self.file.read()
+        offset = 0
+        while len(data) - offset >= RECORD.size:
+            length, crc = RECORD.unpack_from(data, offset)
+            end = offset + RECORD.size + length
+            body = data[offset + RECORD.size:end]
+            if end > len(data) or zlib.crc32(body) != crc:
+                # El registro se está escribiendo, se lee en la siguiente consulta
+                break
+            self.offsets[codec.DISPOSITIVO.struct.unpack_from(body)[2]] = self.position + offset
+            offset = end
+        self.position += offset
+
+    def read(self, offset):
+        self.file.seek(offset)
+        length, crc = RECORD.unpack(self.file.read(RECORD.size))
+        return codec.decode_device(self.file.read(length))
+
+    def lookup(self, id):
+        with self.lock:
+            # Sólo se consulta para los wearables que no están en la cache, se revisa si el
+            # registro agregó algo desde la última vez
+            self.refresh()
+            offset = self.offsets.get(id)
+            return self.read(offset) if offset is not None else None
+
+    def load(self):
+        with self.lock:
+            self.refresh()
+            return dict((id, self.read(offset)) for id, offset in self.offsets.items())
+
+    def append(self, dispositivo):
+        body = codec.encode_device(dispositivo)
+        if self.writer is None:
+            self.writer = open(self.path, 'ab')
+        self.writer.write(RECORD.pack(len(body), zlib.crc32(body)) + body)
+        self.writer.flush()
+        if self.fsync:
+            os.fsync(self.writer.fileno())
+
+    def compact(self, devices):
+        # Se escribe un archivo nuevo y se reemplaza, los lectores lo detectan por su inode
+        temporary = self.path + '.tmp'
+        with open(temporary, 'wb') as file:
+            for dispositivo in devices.values():
+                body = codec.encode_device(dispositivo)
+                file.write(RECORD.pack(len(body), zlib.crc32(body)) + body)
+            file.flush()
+            os.fsync(file.fileno())
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        os.replace(temporary, self.path)
+
+    def close(self):
+        for file in (self.file, self.writer):
+            if file is not None:
+                file.close()
+        self.file = None
+        self.writer = None
+
+
+class RegistroDeDispositivos:
+
+    def __init__(self, path='dispositivos.smam', host='localhost', fsync=False, metrics=None):
+        self.host = host
+        self.archive = ArchivoDeDispositivos(path, fsync)
+        # Último registro de cada wearable
+        self.devices = self.archive.load()
+        # Registros en el archivo, al duplicar a los wearables se compacta
+        self.records = len(self.devices)
+        self.metrics = metrics
+        self.connection = None
+        self.channel = None
+        self.running = False
+
+    def start(self):
+        # Se establece la conexión con el Distribuidor de Mensajes (RabbitMQ o en memoria)
+        self.connection = transporte.connect(self.host)
+        self.channel = self.connection.channel()
+        topologia.declare_devices(self.channel)
+        self.channel.exchange_declare(exchange=topologia.ANUNCIOS, exchange_type='topic',
+                                      durable=True)
+        self.channel.basic_qos(prefetch_count=100)
+        self.channel.basic_consume(queue=topologia.DISPOSITIVOS, on_message_callback=self.on_message)
+        self.channel.basic_consume(queue=topologia.declare_snapshots(self.channel),
+                                   on_message_callback=self.on_snapshot)
+        if self.metrics is not None:
+            REGISTRADOS.set_function(lambda: len(self.devices))
+            metricas.serve(self.metrics)
+        self.running = True
+        while self.running:
+            self.connection.process_data_events(time_limit=1)
+
+    def on_message(self, channel, method, properties, body):
+        try:
+            dispositivo = codec.decode_device(body)
+        except Exception:
+            traceback.print_exc()
+            channel.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
+            return
+        current = self.devices.get(dispositivo.id)
+        if current is not None and (current.same(dispositivo) or
+                                    current.timestamp > dispositivo.timestamp):
+            # El wearable se reinició con los mismos datos o el registro llegó tarde
+            REGISTROS.labels('repetido').inc()
+        else:
+            self.archive.append(dispositivo)
+            self.devices[dispositivo.id] = dispositivo
+            self.records += 1
+            if self.records > 2 * len(self.devices) + 1000:
+                self.archive.compact(self.devices)
+                self.records = len(self.devices)
+            # Los procesadores reemplazan la copia que tienen en memoria
+            channel.basic_publish(exchange=topologia.ANUNCIOS,
+                                  routing_key=topologia.DISPOSITIVOS + '.' + str(dispositivo.id),
+                                  body=body)
+            REGISTROS.labels('nuevo' if current is None else 'actualizado').inc()
+        # Se confirma hasta que el registro está en el archivo
+        channel.basic_ack(delivery_tag=method.delivery_tag)
+
+    def on_snapshot(self, channel, method, properties, body):
+        # Un procesador que inicia pide los wearables que se registraron antes, se envían a su
+        # cola de avisos igual que un aviso; si la cola ya no existe el distribuidor los descarta
+        if properties.reply_to:
+            for dispositivo in list(self.devices.values()):
+                channel.basic_publish(exchange='', routing_key=properties.reply_to,
+                                      body=codec.encode_device(dispositivo))
+            INSTANTANEAS.inc()
+        channel.basic_ack(delivery_tag=method.delivery_tag)
+
+    def stop(self):
+        self.running = False
+
+    def close(self):
+        self.running = False
+        if self.connection is not None and self.connection.is_open:
+            self.connection.close()  # Se cierra la conexión
+        self.archive.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Registro de los wearables del SMAM')
+    parser.add_argument('--host', default='localhost',
+                        help='distribuidor de mensajes: host de RabbitMQ o memoria para el '
+                             'distribuidor en memoria del proceso')
+    parser.add_argument('--archivo', default='dispositivos.smam',
+                        help='archivo donde se guardan los registros de los wearables')
+    parser.add_argument('--fsync', action='store_true',
+                        help='sincroniza el disco después de guardar cada registro')
+    parser.add_argument('--metricas', type=int,
+                        help='puerto del endpoint HTTP local con las métricas en formato de '
+                             'Prometheus (/metrics)')
+    args = parser.parse_args()
+    registro = RegistroDeDispositivos(args.archivo, args.host, args.fsync, args.metricas)
+    try:
+        registro.start()  # Se realiza la suscripción en el Distribuidor de Mensajes
+    except (KeyboardInterrupt, SystemExit):
+        registro.close()  # Se cierra la conexión
+        sys.exit("Conexión finalizada...")
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#-------------------------------------------------------------------------
+# Archivo: registro_de_reglas.py
+# Capitulo: 3 Estilo Publica-Subscribe
+# Autor(es): Perla Velasco & Yonathan Mtz.
+# Version: 1.0.0 Octubre 2026
+# Descripción:
+#
+#   Ésta clase lleva el registro de las reglas que evalúan los signos vitales de cada cola.
+#
+#   Las características de ésta clase son las siguientes:
+#
+#                                     registro_de_reglas.py
+#           +-----------------------+-------------------------+------------------------+
+#           |  Nombre del elemento  |     Responsabilidad     |      Propiedades       |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Asociar las reglas   |  - Una regla es cual-  |
+#           |      Registro de      |    con la cola de la    |    quier objeto con    |
+#           |        Reglas         |    que reciben mensa-   |    atributo queue y    |
+#           |                       |    jes.                 |    método process().   |
+#           |                       |                         |  - Puede definir       |
+#           |                       |                         |    process_batch() para|
+#           |                       |                         |    evaluar lotes.      |
+#           |                       |                         |  - Una cola puede tener|
+#           |                       |                         |    varias reglas.      |
+#           +-----------------------+-------------------------+------------------------+
+#
+#   A continuación se describen los métodos que se implementaron en ésta clase:
+#
+#                                               Métodos:
+#           +------------------------+--------------------------+-----------------------+
+#           |         Nombre         |        Parámetros        |        Función        |
+#           +------------------------+--------------------------+-----------------------+
+#           |       register()       |  - rule: regla a regis-  |  - Registra la regla  |
+#           |                        |     trar.                |    en su cola.        |
+#           +------------------------+--------------------------+-----------------------+
+#           |   register_plugin()    |  - path: módulo.Clase de |  - Importa y registra |
+#           |                        |     la regla.            |    una regla.         |
+#           +------------------------+--------------------------+-----------------------+
+#           |        queues()        |          Ninguno         |  - Regresa las colas  |
+#           |                        |                          |    con reglas.        |
+#           +------------------------+--------------------------+-----------------------+
+#           |       handlers()       |  - queues: colas a aten- |  - Regresa la función |
+#           |                        |     der, todas si se     |    que evalúa las re- |
+#           |                        |     omite.               |    glas de cada cola. |
+#           |                        |  - batch: True para eva- |                       |
+#           |                        |     luar lotes de mensa- |                       |
+#           |                        |     jes.                 |                       |
+#           +------------------------+--------------------------+-----------------------+
+#           |    dispatch_batch()    |  - functions: reglas de  |  - Evalúa el lote con |
+#           |                        |     una cola.            |    cada regla; al fa- |
+#           |                        |                          |    llar una sólo ella |
+#           |                        |                          |    repite sus mensajes|
+#           |                        |                          |    pendientes.        |
+#           +------------------------+--------------------------+-----------------------+
+#
+#-------------------------------------------------------------------------
+import importlib
+import threading
+import lote_de_mensajes
+
+
+class RegistroDeReglas:
+
+    def __init__(self):
+        self.rules = {}
+
+    def register(self, rule):
+        self.rules.setdefault(rule.queue, []).append(rule)
+        return rule
+
+    def register_plugin(self, path):
+        module, name = path.rsplit('.', 1)
+        return self.register(getattr(importlib.import_module(module), name)())
+
+    def queues(self):
+        return list(self.rules)
+
+    def handlers(self, queues=None, batch=False):
+        if queues is None:
+            queues = self.queues()
+        unknown = [queue for queue in queues if queue not in self.rules]
+        if unknown:
+            raise ValueError('No hay reglas registradas para las colas: ' + ', '.join(unknown))
+        return dict((queue, self.dispatcher(self.rules[queue], batch)) for queue in queues)
+
+    def dispatcher(self, rules, batch=False):
+        if batch:
+            functions = [batch_function(rule) for rule in rules]
+        else:
+            functions = [rule.process for rule in rules]
+        # Con una sola regla se evita la llamada intermedia
+        if len(functions) == 1:
+            return functions[0]
+
+        if batch:
+            return dispatch_batch(functions)
+
+        def dispatch(message):
+            for function in functions:
+                function(message)
+        return dispatch
+
+
+def dispatch_batch(functions):
+
+    def dispatch(lote):
+        # Si una regla falla sólo ella repite los mensajes que no terminó, las demás reglas
+        # no vuelven a evaluar el lote
+        failed = set()
+        events = set()
+        for function in functions:
+            results, errors = lote_de_mensajes.evaluate(function, lote)
+            failed.update(errors)
+            # El lote se confirma hasta que se activen los eventos de todas las reglas
+            for indices, pending in results:
+                if isinstance(pending, threading.Event):
+                    pending = (pending,)
+                events.update(pending or ())
+        lote.events = events
+        if failed:
+            raise lote_de_mensajes.ErrorDeLote(failed)
+        return list(events) or None
+    return dispatch
+
+
+def batch_function(rule):
+    if hasattr(rule, 'process_batch'):
+        return rule.process_batch
+
+    # Las reglas que no evalúan lotes reciben los mensajes uno por uno
+    def process_batch(lote):
+        for message in lote.messages():
+            rule.process(message)
+    return process_batch
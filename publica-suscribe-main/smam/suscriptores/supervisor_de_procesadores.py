@@ -0,0 +1,350 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#-------------------------------------------------------------------------
+# Archivo: supervisor_de_procesadores.py
+# Capitulo: 3 Estilo Publica-Subscribe
+# Autor(es): Perla Velasco & Yonathan Mtz.
+# Version: 1.0.0 Octubre 2026
+# Descripción:
+#
+#   Ésta clase inicia varios procesos por cada tipo de procesador para que la decodificación y
+#   la evaluación de las reglas usen todos los núcleos del equipo, y los vigila mientras se
+#   ejecutan.
+#
+#   Las características de ésta clase son las siguientes:
+#
+#                                  supervisor_de_procesadores.py
+#           +-----------------------+-------------------------+------------------------+
+#           |  Nombre del elemento  |     Responsabilidad     |      Propiedades       |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Iniciar un grupo de  |  - Cada proceso tiene  |
+#           |      Supervisor de    |    procesos por cada    |    su propia conexión  |
+#           |      Procesadores     |    signo vital.         |    y su propio motor de|
+#           |                       |  - Reiniciar los proce- |    consumo.            |
+#           |                       |    sos que terminan de  |  - Los reinicios espe- |
+#           |                       |    forma inesperada.    |    ran cada vez más,   |
+#           |                       |  - Detener los procesos |    hasta max_backoff.  |
+#           |                       |    al terminar.         |  - Los procesos envían |
+#           |                       |  - Reportar los mensa-  |    sus contadores por  |
+#           |                       |    jes procesados.      |    una cola de multi-  |
+#           |                       |                         |    processing.         |
+#           +-----------------------+-------------------------+------------------------+
+#
+#   A continuación se describen los métodos que se implementaron en ésta clase:
+#
+#                                               Métodos:
+#           +------------------------+--------------------------+-----------------------+
+#           |         Nombre         |        Parámetros        |        Función        |
+#           +------------------------+--------------------------+-----------------------+
+#           |                        |  - pools: diccionario    |  - Inicializa el su-  |
+#           |       __init__()       |     signo vital -> pro-  |    pervisor.          |
+#           |                        |     cesos.               |                       |
+#           |                        |  - config: opciones del  |                       |
+#           |                        |     motor de consumo.    |                       |
+#           |                        |  - window: segundos que  |                       |
+#           |                        |     debe mantenerse un   |                       |
+#           |                        |     valor extremo.       |                       |
+#           |                        |  - rules: reglas adicio- |                       |
+#           |                        |     nales (modulo.Clase).|                       |
+#           |                        |  - interval: segundos    |                       |
+#           |                        |     entre reportes.      |                       |
+#           |                        |  - max_backoff: espera   |                       |
+#           |                        |     máxima antes de un   |                       |
+#           |                        |     reinicio.            |                       |
+#           |                        |  - thresholds: archivo de|                       |
+#           |                        |     reglas que vigila    |                       |
+#           |                        |     cada proceso.        |                       |
+#           +------------------------+--------------------------+-----------------------+
+#           |        start()         |          Ninguno         |  - Inicia los procesos|
+#           |                        |                          |    y los vigila hasta |
+#           |                        |                          |    recibir SIGINT o   |
+#           |                        |                          |    SIGTERM.           |
+#           +------------------------+--------------------------+-----------------------+
+#           |    serve_metrics()     |          Ninguno         |  - Publica los conta- |
+#           |                        |                          |    dores sumados en el|
+#           |                        |                          |    endpoint de métri- |
+#           |                        |                          |    cas.               |
+#           +------------------------+--------------------------+-----------------------+
+#           |        spawn()         |  - slot: lugar del proce-|  - Inicia el proceso  |
+#           |                        |     so en su grupo.      |    de un lugar.       |
+#           +------------------------+--------------------------+-----------------------+
+#           |        check()         |  - now: segundos.        |  - Registra los proce-|
+#           |                        |                          |    sos terminados y   |
+#           |                        |                          |    reinicia los que   |
+#           |                        |                          |    corresponden.      |
+#           +------------------------+--------------------------+-----------------------+
+#           |       collect()        |          Ninguno         |  - Lee los contadores |
+#           |                        |                          |    que envían los pro-|
+#           |                        |                          |    cesos.             |
+#           +------------------------+--------------------------+-----------------------+
+#           |        totals()        |          Ninguno         |  - Suma los contadores|
+#           |                        |                          |    de cada signo vi-  |
+#           |                        |                          |    tal.               |
+#           +------------------------+--------------------------+-----------------------+
+#           |        report()        |  - now: segundos.        |  - Imprime los conta- |
+#           |                        |                          |    dores y la tasa de |
+#           |                        |                          |    cada signo vital.  |
+#           +------------------------+--------------------------+-----------------------+
+#           |        stop()          |          Ninguno         |  - Solicita detener la|
+#           |                        |                          |    supervisión.       |
+#           +------------------------+--------------------------+-----------------------+
+#           |        close()         |          Ninguno         |  - Detiene los proce- |
+#           |                        |                          |    sos y espera a que |
+#           |                        |                          |    confirmen sus men- |
+#           |                        |                          |    sajes.             |
+#           +------------------------+--------------------------+-----------------------+
+#
+#           Nota: el procesador de medicamentos guarda el calendario de cada wearable en me-
+#           moria, por lo que con más de un proceso se debe usar --suscriptor y --fragmentos
+#           para que cada wearable llegue siempre al mismo proceso.
+#
+#-------------------------------------------------------------------------
+import argparse
+import functools
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from motor_de_consumo import MotorDeConsumo, add_arguments, options
+from procesador_de_signos_vitales import default_registry
+from configuracion_de_reglas import ConfiguracionDeReglas
+import codec
+import metricas
+import transporte
+
+COUNTERS = ('processed', 'errors', 'emitted', 'suppressed')
+# Una cola por signo vital del codec, las mismas que atiende default_registry()
+SIGNOS_VITALES = tuple(codec.ESQUEMAS)
+
+MENSAJES = metricas.gauge('smam_supervisor_mensajes',
+                          'Contadores sumados de los procesos de cada signo vital',
+                          ('vital', 'contador'))
+PROCESOS = metricas.gauge('smam_supervisor_procesos', 'Procesos vivos de cada signo vital',
+                          ('vital',))
+
+
+def snapshot(motor):
+    stats = {'processed': motor.processed, 'errors': motor.errors}
+    if motor.sink is not None:
+        stats.update(motor.sink.stats())
+    return stats
+
+
+def run_worker(vital, config, window, rules, reports, interval, thresholds=None):
+    # Sólo el supervisor atiende Ctrl+C, los procesos se detienen con SIGTERM
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Cada proceso vigila el archivo de reglas y recarga sus umbrales por su cuenta
+    configuracion = ConfiguracionDeReglas(thresholds, window)
+    configuracion.start()
+    registry = default_registry(window, configuracion)
+    for path in rules:
+        registry.register_plugin(path)
+    motor = MotorDeConsumo(registry.handlers([vital], bool(config.get('batch'))), **config)
+    signal.signal(signal.SIGTERM, lambda signum, frame: motor.stop())
+
+    def send_reports():
+        while True:
+            time.sleep(interval)
+            reports.put((os.getpid(), snapshot(motor)))
+    reporter = threading.Thread(target=send_reports, name='reporte')
+    reporter.daemon = True
+    reporter.start()
+    try:
+        motor.start()
+    finally:
+        motor.close()
+        reports.put((os.getpid(), snapshot(motor)))
+
+
+class Lugar:
+    __slots__ = ('vital', 'process', 'started', 'backoff', 'restart_at', 'restarts')
+
+    def __init__(self, vital):
+        self.vital = vital
+        self.process = None
+        self.started = None
+        self.backoff = 1.0
+        self.restart_at = 0
+        self.restarts = 0
+
+
+class SupervisorDeProcesadores:
+
+    def __init__(self, pools, config, window=None, rules=(), interval=5.0, max_backoff=30.0,
+                 thresholds=None):
+        self.config = dict(config)
+        # El supervisor publica la suma de los contadores en el puerto de métricas y cada proceso
+        # sus propias métricas en los puertos siguientes, uno por lugar
+        self.metrics = self.config.pop('metrics', None)
+        self.window = window
+        self.rules = list(rules)
+        self.interval = interval
+        self.max_backoff = max_backoff
+        if thresholds is not None:
+            # Un archivo inválido se reporta antes de iniciar los procesos
+            ConfiguracionDeReglas(thresholds, window)
+        self.thresholds = thresholds
+        self.slots = [Lugar(vital) for vital in pools for x in range(0, pools[vital])]
+        self.reports = multiprocessing.Queue()
+        # Últimos contadores de cada proceso vivo y la suma de los procesos que ya terminaron
+        self.stats = {}
+        self.vitals = {}
+        self.retired = dict((vital, dict.fromkeys(COUNTERS, 0)) for vital in pools)
+        self.last_totals = {}
+        self.last_report = None
+        self.running = False
+
+    def start(self):
+        self.running = True
+        signal.signal(signal.SIGINT, lambda signum, frame: self.stop())
+        signal.signal(signal.SIGTERM, lambda signum, frame: self.stop())
+        if self.metrics is not None:
+            self.serve_metrics()
+        for slot in self.slots:
+            self.spawn(slot)
+        self.last_report = time.time()
+        while self.running:
+            time.sleep(0.5)
+            now = time.time()
+            self.collect()
+            self.check(now)
+            if now - self.last_report >= self.interval:
+                self.report(now)
+        self.close()
+
+    def serve_metrics(self):
+        for vital in self.retired:
+            for name in COUNTERS:
+                MENSAJES.labels(vital, name).set_function(
+                    functools.partial(lambda vital, name: self.totals()[vital][name], vital, name))
+            PROCESOS.labels(vital).set_function(functools.partial(
+                lambda vital: len([slot for slot in self.slots
+                                   if slot.vital == vital and slot.process is not None]), vital))
+        metricas.serve(self.metrics)
+        print('Métricas del supervisor en el puerto ' + str(self.metrics) + ', de los procesos en ' +
+              'los puertos ' + str(self.metrics + 1) + ' a ' + str(self.metrics + len(self.slots)))
+
+    def spawn(self, slot):
+        config = self.config
+        if self.metrics is not None:
+            config = dict(config, metrics=self.metrics + 1 + self.slots.index(slot))
+        slot.process = multiprocessing.Process(
+            target=run_worker, name='procesador-' + slot.vital,
+            args=(slot.vital, config, self.window, self.rules, self.reports,
+                  self.interval, self.thresholds))
+        slot.process.start()
+        slot.started = time.time()
+        self.vitals[slot.process.pid] = slot.vital
+
+    def check(self, now):
+        for slot in self.slots:
+            if slot.process is not None and not slot.process.is_alive():
+                slot.process.join()
+                # Los contadores finales del proceso se suman antes de olvidarlo
+                self.collect()
+                stats = self.stats.pop(slot.process.pid, {})
+                for name in COUNTERS:
+                    self.retired[slot.vital][name] += stats.get(name, 0)
+                print('Proceso ' + str(slot.process.pid) + ' de ' + slot.vital +
+                      ' terminó con código ' + str(slot.process.exitcode))
+                # Un proceso que duró poco espera más antes del siguiente reinicio
+                if now - slot.started > 60:
+                    slot.backoff = 1.0
+                slot.restart_at = now + slot.backoff
+                slot.backoff = min(slot.backoff * 2, self.max_backoff)
+                slot.process = None
+            if slot.process is None and self.running and now >= slot.restart_at:
+                slot.restarts += 1
+                self.spawn(slot)
+
+    def collect(self):
+        while True:
+            try:
+                pid, stats = self.reports.get_nowait()
+            except queue.Empty:
+                break
+            if pid in self.vitals:
+                self.stats[pid] = stats
+
+    def totals(self):
+        totals = dict((vital, dict(counters)) for vital, counters in self.retired.items())
+        for pid, stats in self.stats.items():
+            for name in COUNTERS:
+                totals[self.vitals[pid]][name] += stats.get(name, 0)
+        return totals
+
+    def report(self, now):
+        totals = self.totals()
+        elapsed = now - self.last_report
+        print('{:<18}{:>10}{:>10}{:>12}{:>10}{:>10}{:>10}'.format(
+            'signo vital', 'procesos', 'reinicios', 'procesados', 'errores', 'alertas', 'm/s'))
+        for vital in sorted(totals):
+            slots = [slot for slot in self.slots if slot.vital == vital]
+            alive = len([slot for slot in slots if slot.process is not None])
+            previous = self.last_totals.get(vital, {}).get('processed', 0)
+            rate = (totals[vital]['processed'] - previous) / elapsed if elapsed > 0 else 0
+            print('{:<18}{:>10}{:>10}{:>12}{:>10}{:>10}{:>10.0f}'.format(
+                vital, alive, sum(slot.restarts for slot in slots),
+                totals[vital]['processed'], totals[vital]['errors'], totals[vital]['emitted'],
+                rate))
+        self.last_totals = totals
+        self.last_report = now
+
+    def stop(self):
+        self.running = False
+
+    def close(self):
+        processes = [slot.process for slot in self.slots if slot.process is not None]
+        for process in processes:
+            # Cada proceso termina sus mensajes en curso, los confirma y cierra su conexión
+            process.terminate()
+        deadline = time.time() + 10
+        for process in processes:
+            process.join(max(0, deadline - time.time()))
+            if process.is_alive():
+                # Process.kill() no existe en Python 3.6
+                os.kill(process.pid, signal.SIGKILL)
+                process.join()
+        self.collect()
+        self.report(time.time())
+        print("Conexiones finalizadas...")
+
+
+def parse_pools(text):
+    # "2" inicia dos procesos por signo vital, "heart_rate=4,positions=2" sólo los indicados
+    pools = {}
+    for item in text.split(','):
+        if '=' not in item:
+            for vital in SIGNOS_VITALES:
+                pools[vital] = int(item)
+            continue
+        vital, count = item.split('=')
+        vital = vital.strip()
+        if vital not in SIGNOS_VITALES:
+            raise argparse.ArgumentTypeError('signo vital desconocido: ' + vital)
+        pools[vital] = int(count)
+    return dict((vital, count) for vital, count in pools.items() if count > 0)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Supervisor de procesos de los procesadores')
+    add_arguments(parser)
+    parser.add_argument('--procesos', type=parse_pools, default=parse_pools('1'),
+                        help='procesos por signo vital, por ejemplo 2 o heart_rate=4,positions=2')
+    parser.add_argument('--regla', action='append', default=[],
+                        help='regla adicional a registrar, en la forma modulo.Clase')
+    parser.add_argument('--ventana', type=float,
+                        help='segundos que debe mantenerse un valor extremo para notificar')
+    parser.add_argument('--reporte', type=float, default=5.0, help='segundos entre reportes')
+    parser.add_argument('--umbrales',
+                        help='archivo JSON con los umbrales y ventanas por signo vital y por '
+                             'wearable, se recarga cuando cambia')
+    args = parser.parse_args()
+    if transporte.in_memory(args.host):
+        # Cada proceso tendría su propio distribuidor en memoria y no recibiría mensajes
+        parser.error('el supervisor necesita un distribuidor compartido, no --host memoria')
+    supervisor = SupervisorDeProcesadores(args.procesos, options(args), args.ventana, args.regla,
+                                          args.reporte, thresholds=args.umbrales)
+    supervisor.start()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#-------------------------------------------------------------------------
+# Archivo: test_lote_de_mensajes.py
+# Capitulo: 3 Estilo Publica-Subscribe
+# Autor(es): Perla Velasco & Yonathan Mtz.
+# Version: 1.0.0 Octubre 2026
+# Descripción:
+#
+#   Pruebas de la evaluación por lotes cuando una regla falla a la mitad del lote: cada
+#   regla debe tener sus efectos exactamente una vez por mensaje.
+#
+#   Se ejecutan desde la carpeta suscriptores con:
+#
+#       python -m unittest test_lote_de_mensajes
+#
+#-------------------------------------------------------------------------
+import json
+import threading
+import unittest
+import sys
+sys.path.append('../')
+import codec
+import lote_de_mensajes
+from lote_de_mensajes import LoteDeMensajes
+from registro_de_reglas import RegistroDeReglas
+
+
+class Regla:
+
+    def __init__(self, queue, failing=(), broken=(), select=False):
+        self.queue = queue
+        # Identificadores con los que la regla falla la primera vez que los evalúa
+        self.failing = set(failing)
+        # Identificadores con los que la regla falla siempre
+        self.broken = set(broken)
+        self.select = select
+        self.effects = []
+
+    def process(self, message):
+        if message['id'] in self.broken:
+            raise RuntimeError('falla siempre')
+        if message['id'] in self.failing:
+            self.failing.discard(message['id'])
+            raise RuntimeError('falla la regla')
+        self.effects.append(message['id'])
+
+    def process_batch(self, lote):
+        if self.select:
+            messages = lote.select(lote.column('heart_rate') > 100)
+        else:
+            messages = lote.messages()
+        for message in messages:
+            self.process(message)
+
+
+class Archivador(Regla):
+
+    def __init__(self, queue):
+        Regla.__init__(self, queue)
+        self.block = threading.Event()
+
+    def process_batch(self, lote):
+        for message in lote.messages():
+            self.process(message)
+            lote.hold(self.block)
+        return list(lote.events)
+
+
+def lote(count, queue='heart_rate'):
+    bodies = [json.dumps({'id': index, 'heart_rate': 90 + index * 5,
+                          'timestamp': 1000 * index}).encode('utf-8') for index in range(count)]
+    return LoteDeMensajes(queue, bodies, [codec.CONTENT_TYPE_JSON] * count)
+
+
+def done(results):
+    return sorted(index for indices, pending in results for index in indices)
+
+
+class PruebaDeLote(unittest.TestCase):
+
+    def test_una_regla_repite_solo_los_pendientes(self):
+        regla = Regla('heart_rate', failing=[3])
+        results, failed = lote_de_mensajes.evaluate(regla.process_batch, lote(6))
+        self.assertEqual(failed, [])
+        self.assertEqual(done(results), list(range(6)))
+        self.assertEqual(sorted(regla.effects), list(range(6)))
+
+    def test_una_regla_rechaza_el_mensaje_que_vuelve_a_fallar(self):
+        regla = Regla('heart_rate', broken=[3])
+        results, failed = lote_de_mensajes.evaluate(regla.process_batch, lote(6))
+        self.assertEqual(failed, [3])
+        self.assertEqual(done(results), [0, 1, 2, 4, 5])
+        self.assertEqual(sorted(regla.effects), [0, 1, 2, 4, 5])
+
+    def test_mensajes_seleccionados(self):
+        # Sólo los mensajes sobre el umbral tienen efectos, los demás ya están terminados
+        regla = Regla('heart_rate', failing=[4], select=True)
+        results, failed = lote_de_mensajes.evaluate(regla.process_batch, lote(8))
+        self.assertEqual(failed, [])
+        self.assertEqual(done(results), list(range(8)))
+        self.assertEqual(sorted(regla.effects), [3, 4, 5, 6, 7])
+
+    def test_varias_reglas_en_una_cola(self):
+        registro = RegistroDeReglas()
+        first = registro.register(Regla('heart_rate'))
+        second = registro.register(Regla('heart_rate', failing=[2]))
+        third = registro.register(Regla('heart_rate', select=True))
+        handler = registro.handlers(batch=True)['heart_rate']
+        results, failed = lote_de_mensajes.evaluate(handler, lote(5))
+        self.assertEqual(failed, [])
+        self.assertEqual(done(results), list(range(5)))
+        # La falla de una regla no repite los efectos de las otras
+        self.assertEqual(first.effects, list(range(5)))
+        self.assertEqual(sorted(second.effects), list(range(5)))
+        self.assertEqual(third.effects, [3, 4])
+
+    def test_varias_reglas_rechazan_el_mensaje_que_vuelve_a_fallar(self):
+        registro = RegistroDeReglas()
+        first = registro.register(Regla('heart_rate'))
+        second = registro.register(Regla('heart_rate', broken=[1]))
+        handler = registro.handlers(batch=True)['heart_rate']
+        results, failed = lote_de_mensajes.evaluate(handler, lote(4))
+        self.assertEqual(failed, [1])
+        self.assertEqual(done(results), [0, 2, 3])
+        self.assertEqual(first.effects, list(range(4)))
+        self.assertEqual(sorted(second.effects), [0, 2, 3])
+
+    def test_varias_reglas_conservan_los_eventos(self):
+        registro = RegistroDeReglas()
+        archivador = registro.register(Archivador('heart_rate'))
+        regla = registro.register(Regla('heart_rate', failing=[1]))
+        handler = registro.handlers(batch=True)['heart_rate']
+        results, failed = lote_de_mensajes.evaluate(handler, lote(4))
+        self.assertEqual(failed, [])
+        self.assertEqual(archivador.effects, list(range(4)))
+        self.assertEqual(sorted(regla.effects), list(range(4)))
+        # Los mensajes no se confirman hasta que el archivador escriba su bloque
+        self.assertEqual([pending for indices, pending in results], [[archivador.block]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#-------------------------------------------------------------------------
+# Archivo: topologia.py
+# Capitulo: 3 Estilo Publica-Subscribe
+# Autor(es): Perla Velasco & Yonathan Mtz.
+# Version: 1.0.0 Octubre 2026
+# Descripción:
+#
+#   Éste módulo define cómo se enrutan los signos vitales en el distribuidor de mensajes para
+#   que cada suscriptor reciba su propia copia de los mensajes.
+#
+#   Las características de éste módulo son las siguientes:
+#
+#                                           topologia.py
+#           +-----------------------+-------------------------+------------------------+
+#           |  Nombre del elemento  |     Responsabilidad     |      Propiedades       |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Declarar el exchange |  - Exchange de tipo    |
+#           |      Topología        |    de los signos vita-  |    topic llamado vitals|
+#           |                       |    les y las colas de   |  - Routing key vitals. |
+#           |                       |    cada suscriptor.     |    <tipo>.<id>.        |
+#           |                       |                         |  - Cada suscriptor     |
+#           |                       |                         |    tiene sus colas, el |
+#           |                       |                         |    distribuidor copia  |
+#           |                       |                         |    los mensajes.       |
+#           |                       |                         |  - Opcionalmente re-   |
+#           |                       |                         |    parte los wearables |
+#           |                       |                         |    en N colas por un   |
+#           |                       |                         |    hash consistente del|
+#           |                       |                         |    id, routing key     |
+#           |                       |                         |    vitals.<tipo>.<frag-|
+#           |                       |                         |    mento>.<id>.        |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Declarar la cola en  |  - Cola devices, reci- |
+#           |     Registro de       |    que se registran los |    be los registros por|
+#           |    Dispositivos       |    wearables y el ex-   |    su nombre o por el  |
+#           |                       |    change de los avisos |    exchange vitals.    |
+#           |                       |    del registro.        |  - Exchange smam.dispo-|
+#           |                       |                         |    sitivos, routing key|
+#           |                       |                         |    devices.<id>.       |
+#           |                       |                         |  - Cola devices.snap-  |
+#           |                       |                         |    shot, el registro   |
+#           |                       |                         |    responde con todos  |
+#           |                       |                         |    los wearables a la  |
+#           |                       |                         |    cola reply_to.      |
+#           +-----------------------+-------------------------+------------------------+
+#
+#   A continuación se describen las funciones que se implementaron en éste módulo:
+#
+#                                             Funciones:
+#           +------------------------+--------------------------+-----------------------+
+#           |         Nombre         |        Parámetros        |        Función        |
+#           +------------------------+--------------------------+-----------------------+
+#           |     routing_key()      |  - vital: signo vital.   |  - Regresa la routing |
+#           |                        |  - id: wearable.         |    key de un mensaje. |
+#           |                        |  - shards: colas en que  |                       |
+#           |                        |     se reparten los wea- |                       |
+#           |                        |     rables, 0 para no re-|                       |
+#           |                        |     partirlos.           |                       |
+#           +------------------------+--------------------------+-----------------------+
+#           |        shard()         |  - id: wearable.         |  - Regresa el fragmen-|
+#           |                        |  - shards: número de     |    to del wearable con|
+#           |                        |     fragmentos.          |    un hash consisten- |
+#           |                        |                          |    te.                |
+#           +------------------------+--------------------------+-----------------------+
+#           |       pattern()        |  - vital: signo vital.   |  - Regresa el patrón  |
+#           |                        |  - shard: fragmento, None|    de los mensajes de |
+#           |                        |     para todos.          |    un signo vital.    |
+#           +------------------------+--------------------------+-----------------------+
+#           |     shard_queue()      |  - name: suscriptor y    |  - Regresa el nombre  |
+#           |                        |     signo vital.         |    de una de las colas|
+#           |                        |  - shard: número de cola.|    repartidas.        |
+#           +------------------------+--------------------------+-----------------------+
+#           |   declare_exchange()   |  - channel: canal.       |  - Declara el exchange|
+#           |                        |                          |    de los signos vi-  |
+#           |                        |                          |    tales.             |
+#           +------------------------+--------------------------+-----------------------+
+#           |       declare()        |  - channel: canal.       |  - Declara las colas  |
+#           |                        |  - vital: signo vital.   |    de un suscriptor y |
+#           |                        |  - subscriber: nombre del|    regresa las que    |
+#           |                        |     suscriptor, None para|    debe atender.      |
+#           |                        |     la cola compartida.  |                       |
+#           |                        |  - shards: colas en que  |                       |
+#           |                        |     se reparten los wea- |                       |
+#           |                        |     rables.              |                       |
+#           |                        |  - claimed: colas que    |                       |
+#           |                        |     atiende la instancia,|                       |
+#           |                        |     None para todas.     |                       |
+#           +------------------------+--------------------------+-----------------------+
+#           |   declare_devices()    |  - channel: canal.       |  - Declara la cola de |
+#           |                        |                          |    los registros de   |
+#           |                        |                          |    los wearables.     |
+#           +------------------------+--------------------------+-----------------------+
+#           | declare_announcements()|  - channel: canal.       |  - Declara el exchange|
+#           |                        |                          |    de los avisos y re-|
+#           |                        |                          |    gresa una cola ex- |
+#           |                        |                          |    clusiva enlazada a |
+#           |                        |                          |    él.                |
+#           +------------------------+--------------------------+-----------------------+
+#           |  declare_snapshots()   |  - channel: canal.       |  - Declara la cola de |
+#           |                        |                          |    las solicitudes de |
+#           |                        |                          |    los wearables re-  |
+#           |                        |                          |    gistrados.         |
+#           +------------------------+--------------------------+-----------------------+
+#
+#           Nota: el fragmento se calcula con jump consistent hash (Lamping y Veach), al
+#           cambiar el número de fragmentos de N a N+1 sólo cambia de fragmento 1/(N+1) de
+#           los wearables. Los publicadores y los suscriptores deben usar el mismo N.
+#
+#-------------------------------------------------------------------------
+
+EXCHANGE = 'vitals'
+# Cola en la que se registran los wearables al iniciar
+DISPOSITIVOS = 'devices'
+# Exchange en el que el registro avisa de los wearables nuevos o modificados
+ANUNCIOS = 'smam.dispositivos'
+# Cola en la que los procesadores piden al registro los wearables registrados antes de iniciar
+SOLICITUDES = 'devices.snapshot'
+
+
+def routing_key(vital, id, shards=0):
+    if shards:
+        return EXCHANGE + '.' + vital + '.' + str(shard(id, shards)) + '.' + str(id)
+    return EXCHANGE + '.' + vital + '.' + str(id)
+
+
+def shard(id, shards):
+    key = int(id) & 0xFFFFFFFFFFFFFFFF
+    b = -1
+    j = 0
+    while j < shards:
+        b = j
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((b + 1) * (float(1 << 31) / float((key >> 33) + 1)))
+    return b
+
+
+def pattern(vital, shard=None):
+    # Con # se reciben los mensajes con y sin fragmento en la routing key
+    if shard is None:
+        return EXCHANGE + '.' + vital + '.#'
+    return EXCHANGE + '.' + vital + '.' + str(shard) + '.*'
+
+
+def shard_queue(name, shard):
+    return name + '.' + str(shard)
+
+
+def declare_exchange(channel):
+    channel.exchange_declare(exchange=EXCHANGE, exchange_type='topic', durable=True)
+
+
+def declare(channel, vital, subscriber=None, shards=0, claimed=None):
+    declare_exchange(channel)
+    if subscriber is None:
+        # La cola con el nombre del signo vital recibe tanto a los publicadores que usan el
+        # exchange por omisión como a los que publican en el exchange de los signos vitales
+        channel.queue_declare(queue=vital, durable=True)
+        channel.queue_bind(queue=vital, exchange=EXCHANGE, routing_key=pattern(vital))
+        return [vital]
+    name = subscriber + '.' + vital
+    if not shards:
+        channel.queue_declare(queue=name, durable=True)
+        channel.queue_bind(queue=name, exchange=EXCHANGE, routing_key=pattern(vital))
+        return [name]
+    # Cada cola recibe los wearables de su fragmento, los publicadores calculan el fragmento
+    # con el hash del id, así los mensajes de un wearable siempre llegan a la misma cola
+    queues = []
+    for x in range(0, shards):
+        queue = shard_queue(name, x)
+        channel.queue_declare(queue=queue, durable=True)
+        channel.queue_bind(queue=queue, exchange=EXCHANGE, routing_key=pattern(vital, x))
+        if claimed is None or x in claimed:
+            queues.append(queue)
+    return queues
+
+
+def declare_devices(channel):
+    declare_exchange(channel)
+    # Los wearables que publican en el exchange de los signos vitales usan la routing key devices
+    channel.queue_declare(queue=DISPOSITIVOS, durable=True)
+    channel.queue_bind(queue=DISPOSITIVOS, exchange=EXCHANGE, routing_key=DISPOSITIVOS)
+
+
+def declare_announcements(channel):
+    channel.exchange_declare(exchange=ANUNCIOS, exchange_type='topic', durable=True)
+    # La cola es exclusiva del proceso y el distribuidor la elimina al cerrar la conexión
+    result = channel.queue_declare(queue='', exclusive=True, auto_delete=True)
+    queue = result.method.queue
+    channel.queue_bind(queue=queue, exchange=ANUNCIOS, routing_key=DISPOSITIVOS + '.#')
+    return queue
+
+
+def declare_snapshots(channel):
+    # Una solicitud sólo sirve mientras existe la cola de avisos que la envía, la cola no se
+    # conserva al reiniciar el distribuidor
+    channel.queue_declare(queue=SOLICITUDES)
+    return SOLICITUDES
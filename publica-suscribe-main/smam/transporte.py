@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#-------------------------------------------------------------------------
+# Archivo: transporte.py
+# Capitulo: 3 Estilo Publica-Subscribe
+# Autor(es): Perla Velasco & Yonathan Mtz.
+# Version: 1.0.0 Octubre 2026
+# Descripción:
+#
+#   Éste módulo abre las conexiones con el Distribuidor de Mensajes. El distribuidor se elige
+#   con el host: un nombre o dirección para RabbitMQ (AMQP con pika) o memoria para el distri-
+#   buidor dentro del mismo proceso.
+#
+#   Las características de éste módulo son las siguientes:
+#
+#                                           transporte.py
+#           +-----------------------+-------------------------+------------------------+
+#           |  Nombre del elemento  |     Responsabilidad     |      Propiedades       |
+#           +-----------------------+-------------------------+------------------------+
+#           |                       |  - Abrir una conexión   |  - Host 'localhost' o  |
+#           |      Transporte       |    con el distribuidor  |    'amqp://localhost': |
+#           |                       |    que indica el host.  |    RabbitMQ.           |
+#           |                       |                         |  - Host 'memoria' o    |
+#           |                       |                         |    'memoria://nombre': |
+#           |                       |                         |    distribuidor en me- |
+#           |                       |                         |    moria, compartido   |
+#           |                       |                         |    por nombre en el    |
+#           |                       |                         |    proceso.            |
+#           |                       |                         |  - Se pueden registrar |
+#           |                       |                         |    otros transportes.  |
+#           +-----------------------+-------------------------+------------------------+
+#
+#   A continuación se describen las funciones que se implementaron en éste módulo:
+#
+#                                             Funciones:
+#           +------------------------+--------------------------+-----------------------+
+#           |         Nombre         |        Parámetros        |        Función        |
+#           +------------------------+--------------------------+-----------------------+
+#           |        parse()         |  - host: distribuidor.   |  - Regresa el esquema |
+#           |                        |                          |    y la dirección.    |
+#           +------------------------+--------------------------+-----------------------+
+#           |       register()       |  - scheme: esquema.      |  - Registra un trans- |
+#           |                        |  - blocking: función que |    porte.             |
+#           |                        |     abre una conexión    |                       |
+#           |                        |     como BlockingConnec- |                       |
+#           |                        |     tion.                |                       |
+#           |                        |  - asynchronous: función |                       |
+#           |                        |     que abre una conexión|                       |
+#           |                        |     como SelectConnec-   |                       |
+#           |                        |     tion.                |                       |
+#           +------------------------+--------------------------+-----------------------+
+#           |       connect()        |  - host: distribuidor.   |  - Abre una conexión  |
+#           |                        |                          |    síncrona.          |
+#           +------------------------+--------------------------+-----------------------+
+#           |   connect_async()      |  - host: distribuidor.   |  - Abre una conexión  |
+#           |                        |  - on_open, on_error,    |    asíncrona.         |
+#           |                        |     on_close: callbacks. |                       |
+#           +------------------------+--------------------------+-----------------------+
+#           |      in_memory()       |  - host: distribuidor.   |  - Indica si el dis-  |
+#           |                        |                          |    tribuidor está en  |
+#           |                        |                          |    el proceso.        |
+#           +------------------------+--------------------------+-----------------------+
+#           |        broker()        |  - name: nombre.         |  - Regresa el distri- |
+#           |                        |                          |    buidor en memoria  |
+#           |                        |                          |    con ese nombre.    |
+#           +------------------------+--------------------------+-----------------------+
+#
+#           Nota: el distribuidor en memoria no sale del proceso, los procesadores deben eje-
+#           cutarse en el mismo proceso que los wearables (ver ejecucion_local.py).
+#
+#-------------------------------------------------------------------------
+import threading
+import pika
+import distribuidor_en_memoria
+
+AMQP = 'amqp'
+MEMORIA = 'memoria'
+
+# esquema -> (conexión síncrona, conexión asíncrona)
+TRANSPORTES = {}
+# Distribuidores en memoria del proceso por nombre
+DISTRIBUIDORES = {}
+_lock = threading.Lock()
+
+
+def parse(host):
+    scheme, separator, address = host.partition('://')
+    if not separator:
+        return (MEMORIA, '') if host == MEMORIA else (AMQP, host)
+    return scheme, address
+
+
+def register(scheme, blocking, asynchronous=None):
+    TRANSPORTES[scheme] = (blocking, asynchronous)
+
+
+def connect(host='localhost'):
+    scheme, address = parse(host)
+    return TRANSPORTES[scheme][0](address)
+
+
+def connect_async(host, on_open, on_error, on_close):
+    scheme, address = parse(host)
+    asynchronous = TRANSPORTES[scheme][1]
+    if asynchronous is None:
+        raise ValueError('El transporte ' + scheme + ' no tiene conexiones asíncronas')
+    return asynchronous(address, on_open, on_error, on_close)
+
+
+def in_memory(host):
+    return parse(host)[0] == MEMORIA
+
+
+def broker(name=''):
+    with _lock:
+        if name not in DISTRIBUIDORES:
+            DISTRIBUIDORES[name] = distribuidor_en_memoria.DistribuidorEnMemoria()
+        return DISTRIBUIDORES[name]
+
+
+register(AMQP,
+         lambda address: pika.BlockingConnection(pika.ConnectionParameters(host=address)),
+         lambda address, on_open, on_error, on_close: pika.SelectConnection(
+             pika.ConnectionParameters(host=address), on_open_callback=on_open,
+             on_open_error_callback=on_error, on_close_callback=on_close))
+register(MEMORIA,
+         lambda address: distribuidor_en_memoria.ConexionEnMemoria(broker(address)),
+         lambda address, on_open, on_error, on_close: distribuidor_en_memoria.ConexionAsincronaEnMemoria(
+             broker(address), on_open, on_error, on_close))